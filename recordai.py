@@ -1,51 +1,151 @@
 #!/usr/bin/env python3
+import time
+_INICIO_IMPORTACAO = time.perf_counter()
 import gi
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import subprocess
 import threading
+import asyncio
+import random
 import tkinter as tk
 from tkinter import messagebox, ttk
 import sys
 import platform
 import webbrowser
-from pydub import AudioSegment, silence
-import speech_recognition as sr
-import google.generativeai as genai
+import numpy as np
 from dotenv import load_dotenv
 import json
 import re
-import tempfile
-import time
+import mmap
+import wave
+import queue
+import importlib
+import multiprocessing
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import collections
+import abc
 from collections import defaultdict
 import getpass
 import base64
-from google.genai import types
-from markdown import markdown as md2html
-from tkinterweb import HtmlFrame
+import hashlib
+import math
+import unicodedata
+import ctypes
+import ctypes.util
+import select
+import struct
+import bisect
+import sqlite3
 
-if sys.version_info < (3, 6):
-    print("Python 3.6+ é necessário.")
+if sys.version_info < (3, 10):
+    print("Python 3.10+ é necessário.")
     sys.exit(1)
 
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst, GLib
 
-Gst.init(None)
+# pydub, speech_recognition, google.generativeai, markdown e tkinterweb são importados no primeiro uso
+# (ou pré-carregados por aquecer_modulos depois que a janela aparece), assim como o Gst.init.
+_gst_lock = threading.Lock()
+_gst_iniciado = False
+
+def inicializar_gst():
+    # Gst.init varre o registro de plugins: fica fora da importação do módulo.
+    # (Gst.is_initialized não serve aqui: o override do PyGObject bloqueia as funções do Gst até o init.)
+    global _gst_iniciado
+    with _gst_lock:
+        if not _gst_iniciado:
+            Gst.init(None)
+            _gst_iniciado = True
 
 # Carrega variáveis do .env
 load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 GEMINI_MODEL = os.getenv('GEMINI_MODEL')
 RECORD_BLOCK_SECONDS = int(os.getenv('RECORD_BLOCK_SECONDS', '240'))
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
+# Blocos transcritos em paralelo: 'thread' para backends de rede, 'process' para decodificação/ASR local (CPU)
+TRANSCRICAO_WORKERS = max(1, int(os.getenv('TRANSCRICAO_WORKERS', '4')))
+TRANSCRICAO_POOL = os.getenv('TRANSCRICAO_POOL', 'thread').lower()
+TRANSCRICAO_IDIOMA = 'pt-BR'
+# Reconhecedor de fala: 'google' (rede) ou 'vosk' (local, CPU; modelo carregado uma vez por processo a partir de VOSK_MODELO)
+TRANSCRICAO_BACKEND = os.getenv('TRANSCRICAO_BACKEND', 'google').lower()
+VOSK_MODELO = os.getenv('VOSK_MODELO', 'modelos/vosk-model-small-pt-0.3')
+# Perguntas sobre a gravação enviam à IA só os trechos mais relevantes da transcrição
+IA_PERGUNTA_TOP_K = int(os.getenv('IA_PERGUNTA_TOP_K', '6'))
+IA_PERGUNTA_PALAVRAS_TRECHO = int(os.getenv('IA_PERGUNTA_PALAVRAS_TRECHO', '120'))
+# Transcrições acima deste tamanho são resumidas em partes (map) e depois consolidadas (reduce)
+IA_RESUMO_LIMITE_CHARS = int(os.getenv('IA_RESUMO_LIMITE_CHARS', '60000'))
+IA_RESUMO_CHARS_PARTE = int(os.getenv('IA_RESUMO_CHARS_PARTE', '30000'))
+IA_RESUMO_WORKERS = max(1, int(os.getenv('IA_RESUMO_WORKERS', '4')))
+# Cache em disco das respostas da IA (output/cache_ia.sqlite3)
+IA_CACHE = os.getenv('IA_CACHE', 'true').lower() in ('1', 'true', 'sim', 'yes')
+IA_CACHE_MAX_MB = float(os.getenv('IA_CACHE_MAX_MB', '200'))
+IA_CACHE_MAX_DIAS = float(os.getenv('IA_CACHE_MAX_DIAS', '30'))
+# Agendador das chamadas ao Gemini: concorrência, taxa (token bucket) e novas tentativas
+IA_CONCORRENCIA = max(1, int(os.getenv('IA_CONCORRENCIA', '4')))
+IA_REQUISICOES_POR_MINUTO = float(os.getenv('IA_REQUISICOES_POR_MINUTO', '60'))
+IA_RAJADA = max(1, int(os.getenv('IA_RAJADA', '5')))
+IA_MAX_TENTATIVAS = max(1, int(os.getenv('IA_MAX_TENTATIVAS', '5')))
+# Endpoint alternativo da API (ex.: servidor local falso para testes); usa o transporte REST
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+# Prioridades das requisições à IA (menor = atendida primeiro)
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_RESUMO = 1
+PRIORIDADE_FUNDO = 2
+# Fila persistente de tarefas (transcrição e resumo) em output/tarefas.sqlite3
+TAREFAS_WORKERS = max(1, int(os.getenv('TAREFAS_WORKERS', '2')))
+# Miniaturas dos prints, geradas uma vez em <gravacao>/.cache/thumbs
+MINIATURA_TAMANHO = (180, 120)
+MINIATURA_WORKERS = max(1, int(os.getenv('MINIATURA_WORKERS', '2')))
+# Captura de prints: nível de compressão do PNG (0-9; menor = mais rápido) e validade do layout de monitores em cache
+PRINT_COMPRESSAO = min(9, max(0, int(os.getenv('PRINT_COMPRESSAO', '1'))))
+PRINT_MONITORES_TTL = float(os.getenv('PRINT_MONITORES_TTL', '10'))
+# Versão dos prints enviada à IA: lado máximo, formato (jpeg/webp/png), qualidade e recorte na janela ativa
+PRINT_UPLOAD_LADO_MAX = int(os.getenv('PRINT_UPLOAD_LADO_MAX', '1920'))
+PRINT_UPLOAD_FORMATO = os.getenv('PRINT_UPLOAD_FORMATO', 'jpeg').lower()
+PRINT_UPLOAD_QUALIDADE = min(100, max(1, int(os.getenv('PRINT_UPLOAD_QUALIDADE', '85'))))
+PRINT_RECORTAR_JANELA = os.getenv('PRINT_RECORTAR_JANELA', 'false').lower() in ('1', 'true', 'sim', 'yes')
+# Prints repetidos (dHash a até N bits de distância): reutilizar a análise existente ou ignorar
+PRINT_DEDUP_DISTANCIA = int(os.getenv('PRINT_DEDUP_DISTANCIA', '6'))
+PRINT_DEDUP_MODO = os.getenv('PRINT_DEDUP_MODO', 'reutilizar').lower()
+PRINT_DEDUP_GLOBAL = os.getenv('PRINT_DEDUP_GLOBAL', 'false').lower() in ('1', 'true', 'sim', 'yes')
+# Prints automáticos durante a gravação: intervalo (s) e fração mínima da tela reduzida que precisa mudar
+PRINT_AUTOMATICO = os.getenv('PRINT_AUTOMATICO', 'false').lower() in ('1', 'true', 'sim', 'yes')
+PRINT_AUTO_INTERVALO = max(1.0, float(os.getenv('PRINT_AUTO_INTERVALO', '5')))
+PRINT_AUTO_LIMIAR = float(os.getenv('PRINT_AUTO_LIMIAR', '0.02'))
+# Formato entregue ao reconhecedor: PCM int16 mono a 16 kHz
+ASR_TAXA = 16000
+ASR_LARGURA = 2
+TRANSCRICAO_AO_VIVO = os.getenv('TRANSCRICAO_AO_VIVO', 'true').lower() in ('1', 'true', 'sim', 'yes')
+# Orçamentos de inicialização (ms; 0 desativa): importação do módulo e janela principal exibida
+INICIO_ORCAMENTO_IMPORTACAO_MS = float(os.getenv('INICIO_ORCAMENTO_IMPORTACAO_MS', '500'))
+INICIO_ORCAMENTO_JANELA_MS = float(os.getenv('INICIO_ORCAMENTO_JANELA_MS', '1500'))
+# Taxa do áudio capturado (mixer -> opusenc) e detecção de fala na captura: DTX do Opus no silêncio,
+# limiar de nível (dBFS) e silêncio mínimo (ms) para um trecho contar como pausa na linha do tempo de fala
+CAPTURA_TAXA = 48000
+CAPTURA_DTX = os.getenv('CAPTURA_DTX', 'true').lower() in ('1', 'true', 'sim', 'yes')
+VAD_LIMIAR_DB = float(os.getenv('VAD_LIMIAR_DB', '-45'))
+VAD_SILENCIO_MIN_MS = int(os.getenv('VAD_SILENCIO_MIN_MS', '800'))
+VAD_MARGEM_MS = 200
+# Usa a linha do tempo de fala (gravacao_NN.vad.json) para não transcrever trechos silenciosos
+TRANSCRICAO_PULAR_SILENCIO = os.getenv('TRANSCRICAO_PULAR_SILENCIO', 'true').lower() in ('1', 'true', 'sim', 'yes')
+# Cada bloco é dividido em falas (VAD por energia) enviadas ao reconhecedor como requisições independentes:
+# duração máxima de uma fala (s), pausa que separa duas falas (ms) e duração mínima para não ser descartada como ruído (ms)
+SEGMENTO_MAX_SEGUNDOS = max(1.0, float(os.getenv('SEGMENTO_MAX_SEGUNDOS', '30')))
+SEGMENTO_SILENCIO_MS = int(os.getenv('SEGMENTO_SILENCIO_MS', '500'))
+SEGMENTO_MIN_MS = 300
 class RecorderGUI:
-    def __init__(self, master):
+    GRID_LINHAS = 12
+
+    def __init__(self, master, verificar_inicio=False):
         self.master = master
+        self.verificar_inicio = verificar_inicio
+        self.inicio_dentro_orcamento = None
+        self._janela_exibida = False
         master.title("RecordAI - Gravação de Áudio do Sistema")
-        master.geometry("1120x600")
+        master.geometry("1120x680")
         master.resizable(False, False)
         master.configure(bg="#f7f7f7")
 
@@ -55,11 +155,25 @@ class RecorderGUI:
         style.configure("Treeview.Heading", font=("Arial", 13, "bold"))
 
         self.is_recording = False
-        self.pipeline = None
-        self.loop = None
+        self.captura = None
+        self.transcricao_ao_vivo = None
         self.filename = None
-        self.thread = None
         self.output_dir = "output"
+        self.catalogo = CatalogoGravacoes(self.output_dir)
+        configurar_cache_ia(self.output_dir)
+        self.indice_busca = IndiceBusca(self.catalogo)
+        self.modelo = ModeloGravacoes()
+        self.captura_tela = CapturaTela()
+        self._busca_popup = None
+        self._grid_offset = 0
+        self._pasta_selecionada = None
+        self._filtro_job = None
+        self._print_auto_job = None
+        self.fila_tarefas = FilaTarefas(
+            self.output_dir,
+            {FilaTarefas.TRANSCRICAO: self.transcrever_audio, FilaTarefas.RESUMO: self.processar_ia_gemini},
+            ao_alterar=lambda pasta: self.master.after(0, lambda: self._atualizar_tarefa_grid(pasta)),
+        )
 
         # --- Layout ---
         self.label = tk.Label(master, text="Grave e gerencie os áudios da saída do sistema.", font=("Arial", 12, "bold"), bg="#f7f7f7")
@@ -70,10 +184,16 @@ class RecorderGUI:
         switch_frame.pack(pady=(0, 10), fill='x')
         self.var_mic = tk.BooleanVar(value=True)
         self.var_out = tk.BooleanVar(value=True)
+        self.var_ao_vivo = tk.BooleanVar(value=TRANSCRICAO_AO_VIVO)
         self.check_mic = tk.Checkbutton(switch_frame, text="Gravar microfone (entrada)", variable=self.var_mic, bg="#f7f7f7", font=("Arial", 12, "bold"), padx=10, pady=4, command=self.update_start_button_state)
         self.check_mic.pack(side=tk.LEFT, padx=10)
         self.check_out = tk.Checkbutton(switch_frame, text="Gravar saída do sistema", variable=self.var_out, bg="#f7f7f7", font=("Arial", 12, "bold"), padx=10, pady=4, command=self.update_start_button_state)
         self.check_out.pack(side=tk.LEFT, padx=10)
+        self.check_ao_vivo = tk.Checkbutton(switch_frame, text="Transcrever ao vivo", variable=self.var_ao_vivo, bg="#f7f7f7", font=("Arial", 12, "bold"), padx=10, pady=4)
+        self.check_ao_vivo.pack(side=tk.LEFT, padx=10)
+        self.var_prints_auto = tk.BooleanVar(value=PRINT_AUTOMATICO)
+        self.check_prints_auto = tk.Checkbutton(switch_frame, text="Prints automáticos", variable=self.var_prints_auto, bg="#f7f7f7", font=("Arial", 12, "bold"), padx=10, pady=4)
+        self.check_prints_auto.pack(side=tk.LEFT, padx=10)
 
         # --- Botões principais ---
         btn_frame = tk.Frame(master, bg="#f7f7f7")
@@ -85,21 +205,62 @@ class RecorderGUI:
         self.refresh_button = tk.Button(btn_frame, text="Atualizar Lista", command=self.refresh_files, width=12, height=1, font=("Arial", 12), relief=tk.RAISED, bd=2)
         self.refresh_button.grid(row=0, column=2, padx=8, pady=2, ipady=2)
 
+        # --- Busca no conteúdo (transcrições, resumos e análises de prints) ---
+        busca_frame = tk.Frame(master, bg="#f7f7f7")
+        busca_frame.pack(pady=(0, 4), fill='x')
+        self.var_busca = tk.StringVar()
+        tk.Label(busca_frame, text="Buscar no conteúdo:", font=("Arial", 11), bg="#f7f7f7").pack(side=tk.LEFT, padx=(10, 4))
+        self.entry_busca = tk.Entry(busca_frame, textvariable=self.var_busca, font=("Arial", 11), width=50)
+        self.entry_busca.pack(side=tk.LEFT)
+        self.entry_busca.bind('<Return>', lambda e: self.buscar_conteudo())
+        tk.Button(busca_frame, text="Buscar", command=self.buscar_conteudo, font=("Arial", 10), relief=tk.RAISED, bd=1).pack(side=tk.LEFT, padx=8)
+
+        # --- Filtros da grid ---
+        filtro_frame = tk.Frame(master, bg="#f7f7f7")
+        filtro_frame.pack(pady=(0, 4), fill='x')
+        self.var_filtro_titulo = tk.StringVar()
+        self.var_filtro_de = tk.StringVar()
+        self.var_filtro_ate = tk.StringVar()
+        tk.Label(filtro_frame, text="Filtrar título:", font=("Arial", 11), bg="#f7f7f7").pack(side=tk.LEFT, padx=(10, 4))
+        tk.Entry(filtro_frame, textvariable=self.var_filtro_titulo, font=("Arial", 11), width=28).pack(side=tk.LEFT)
+        tk.Label(filtro_frame, text="De (dd/mm/aaaa):", font=("Arial", 11), bg="#f7f7f7").pack(side=tk.LEFT, padx=(12, 4))
+        tk.Entry(filtro_frame, textvariable=self.var_filtro_de, font=("Arial", 11), width=11).pack(side=tk.LEFT)
+        tk.Label(filtro_frame, text="Até:", font=("Arial", 11), bg="#f7f7f7").pack(side=tk.LEFT, padx=(12, 4))
+        tk.Entry(filtro_frame, textvariable=self.var_filtro_ate, font=("Arial", 11), width=11).pack(side=tk.LEFT)
+        tk.Button(filtro_frame, text="Limpar filtros", command=self.limpar_filtros, font=("Arial", 10), relief=tk.RAISED, bd=1).pack(side=tk.LEFT, padx=12)
+        for var in (self.var_filtro_titulo, self.var_filtro_de, self.var_filtro_ate):
+            var.trace_add('write', lambda *args: self._agendar_filtro())
+
         # --- Tabela de arquivos ---
-        self.tree = ttk.Treeview(master, columns=("datahora", "titulo", "duracao", "detalhes", "pasta"), show="headings", height=12)
-        self.tree.heading("datahora", text="Data/Hora")
-        self.tree.heading("titulo", text="Título")
-        self.tree.heading("duracao", text="Duração")
+        # A Treeview só contém as linhas da janela visível; os dados ficam em self.modelo
+        grid_frame = tk.Frame(master, bg="#f7f7f7")
+        grid_frame.pack(pady=4, fill='x')
+        self.tree = ttk.Treeview(grid_frame, columns=("datahora", "titulo", "duracao", "detalhes", "tarefa", "pasta"), show="headings", height=self.GRID_LINHAS)
+        self.tree.heading("datahora", text="Data/Hora", command=lambda: self.ordenar_grid('datahora'))
+        self.tree.heading("titulo", text="Título", command=lambda: self.ordenar_grid('titulo'))
+        self.tree.heading("duracao", text="Duração", command=lambda: self.ordenar_grid('duracao'))
         self.tree.heading("detalhes", text="Detalhes")
+        self.tree.heading("tarefa", text="Tarefas")
         self.tree.column("datahora", width=160)
         self.tree.column("titulo", width=260)
         self.tree.column("duracao", width=80, anchor="center")
         self.tree.column("detalhes", width=100, anchor="center")
+        self.tree.column("tarefa", width=170, anchor="center")
         self.tree.column("pasta", width=0, stretch=False, minwidth=0)
-        self.tree.pack(pady=4, fill='x')
+        self.grid_scroll = ttk.Scrollbar(grid_frame, orient="vertical", command=self._on_grid_scroll)
+        self.grid_scroll.pack(side=tk.RIGHT, fill='y')
+        self.tree.pack(side=tk.LEFT, fill='x', expand=True)
         self.tree.bind('<Double-1>', self.open_file)
         self.tree.bind('<Button-1>', self.on_tree_click_detalhes)
         self.tree.bind('<ButtonRelease-1>', self.on_tree_select_anywhere)
+        self.tree.bind('<<TreeviewSelect>>', self._on_tree_selecao)
+        self.tree.bind('<MouseWheel>', self._on_grid_mousewheel)
+        self.tree.bind('<Button-4>', self._on_grid_mousewheel)
+        self.tree.bind('<Button-5>', self._on_grid_mousewheel)
+        self.tree.bind('<Up>', lambda e: self._mover_selecao(-1))
+        self.tree.bind('<Down>', lambda e: self._mover_selecao(1))
+        self.tree.bind('<Prior>', lambda e: self._mover_selecao(-self.GRID_LINHAS))
+        self.tree.bind('<Next>', lambda e: self._mover_selecao(self.GRID_LINHAS))
 
         # --- Botões de ação (logo abaixo da grid) ---
         action_frame = tk.Frame(master, bg="#f7f7f7")
@@ -116,6 +277,8 @@ class RecorderGUI:
         self.transcrever_button.grid(row=0, column=4, padx=6, pady=2, ipady=2)
         self.ia_button = tk.Button(action_frame, text="Aplicar IA", command=self.aplicar_ia_selecionado, width=12, height=1, font=("Arial", 12), relief=tk.RAISED, bd=2, bg="#388E3C", fg="white")
         self.ia_button.grid(row=0, column=5, padx=6, pady=2, ipady=2)
+        self.pendentes_button = tk.Button(action_frame, text="Processar Pendentes", command=self.processar_pendentes, width=16, height=1, font=("Arial", 12), relief=tk.RAISED, bd=2)
+        self.pendentes_button.grid(row=0, column=6, padx=6, pady=2, ipady=2)
 
         self.status = tk.Label(master, text="", font=("Arial", 12), bg="#f7f7f7", fg="#555")
         self.status.pack(pady=(5, 0))
@@ -130,12 +293,57 @@ class RecorderGUI:
         # O tempo decorrido só aparece durante a gravação
         # Não faz pack aqui, só quando iniciar gravação
 
-        self.refresh_files()
+        # A grid é preenchida em background: a janela aparece antes da leitura do catálogo
+        self.status.config(text="Carregando gravações...", fg="#555")
+        threading.Thread(target=self._carregar_grid_inicial, daemon=True).start()
+        self.observador = ObservadorSaida(self.output_dir, self._on_saida_alterada, ignorar=(CatalogoGravacoes.ARQUIVO,), catalogo=self.catalogo)
         # Atalho local para print: Ctrl+Alt+M
         self.master.bind('<Control-Alt-m>', lambda event: self.capturar_print_monitor_mouse())
+        # Observador, fila, listener global e pré-carregamento só começam depois que a janela é exibida
+        self.master.bind('<Map>', self._on_janela_exibida, add='+')
+
+    def _on_janela_exibida(self, event):
+        # O <Map> do toplevel também chega pelos widgets filhos; interessa só a primeira exibição da janela
+        if event.widget is not self.master or self._janela_exibida:
+            return
+        self._janela_exibida = True
+        tempo_janela = time.perf_counter() - _INICIO_IMPORTACAO
+        self.inicio_dentro_orcamento = verificar_orcamento_inicio(TEMPO_IMPORTACAO, tempo_janela)
+        if self.verificar_inicio:
+            self.master.after(0, self.master.destroy)
+            return
+        self.master.after_idle(self._iniciar_servicos)
+
+    def _iniciar_servicos(self):
+        # Indexa em background o que mudou desde a última execução
+        threading.Thread(target=self.indice_busca.sincronizar, daemon=True).start()
+        # Mudanças em output/ (inclusive feitas por outros processos) chegam à grid sem "Atualizar Lista"
+        self.observador.iniciar()
+        # Retoma as tarefas que ficaram pendentes (ou em execução) quando o programa foi fechado
+        self.fila_tarefas.iniciar()
+        if obter_backend_transcricao().local:
+            # Carrega o modelo local em background para a primeira transcrição não esperar por ele
+            threading.Thread(target=aquecer_backend_transcricao, daemon=True).start()
+        threading.Thread(target=aquecer_modulos, daemon=True).start()
         # Listener global (pynput)
         self._start_pynput_hotkey_listener()
 
+    def _carregar_grid_inicial(self):
+        inicio = time.perf_counter()
+        registros = []
+        try:
+            if os.path.exists(self.output_dir):
+                self.catalogo.sincronizar()
+                registros = self.catalogo.listar()
+        except Exception as e:
+            print(f"[CATALOGO] Falha ao carregar as gravações: {e}")
+        print(f"[INICIO] Catálogo lido em {(time.perf_counter() - inicio) * 1000:.0f} ms ({len(registros)} gravações).")
+        def exibir():
+            self._exibir_registros(registros)
+            if self.status.cget('text') == "Carregando gravações...":
+                self.status.config(text="")
+        self.master.after(0, exibir)
+
     def get_output_dir_and_prefix(self):
         # Gera o timestamp no padrão AAAAMMDDHHMMSS
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
@@ -170,9 +378,21 @@ class RecorderGUI:
             print(f"Erro ao buscar sink padrão: {e}")
         return 'default.monitor'
 
-    def build_gst_pipeline_mix(self, mic_device, monitor_device, filename, use_mic=True, use_out=True):
+    def build_gst_pipeline_mix(self, mic_device, monitor_device, location, use_mic=True, use_out=True, ao_vivo=False):
+        # Um único pipeline para toda a gravação: o splitmuxsink rotaciona os blocos
+        # (gravacao_01.ogg, gravacao_02.ogg, ...) sem desmontar a captura, cortando
+        # sempre entre pacotes Opus para não perder amostras na troca de arquivo.
+        inicializar_gst()
+        max_size_time = RECORD_BLOCK_SECONDS * Gst.SECOND
         elements = []
-        elements.append('audiomixer name=mix ! audioconvert ! audioresample ! opusenc bitrate=32000 ! oggmux ! filesink location={}'.format(filename))
+        # O 'level' mede o RMS a cada 100 ms; as mensagens alimentam a linha do tempo de fala dos blocos
+        elements.append('audiomixer name=mix ! audioconvert ! audioresample ! audio/x-raw,rate={} ! level name=nivel interval={} post-messages=true ! tee name=t'.format(CAPTURA_TAXA, LinhaTempoVoz.INTERVALO))
+        # Com DTX o Opus emite quadros mínimos no silêncio, encolhendo os blocos de reuniões com longas pausas
+        elements.append('t. ! queue ! opusenc bitrate=32000 audio-type=voice dtx={} ! queue ! sink.audio_0'.format('true' if CAPTURA_DTX else 'false'))
+        if ao_vivo:
+            # Ramo de PCM decodificado para a transcrição ao vivo (16 kHz mono S16LE)
+            elements.append('t. ! queue ! audioconvert ! audioresample ! audio/x-raw,format=S16LE,channels=1,rate={} ! appsink name=pcm emit-signals=true sync=false'.format(TranscricaoAoVivo.TAXA))
+        elements.append('splitmuxsink name=sink muxer-factory=oggmux location={} start-index=1 max-size-time={}'.format(location, max_size_time))
         if use_mic:
             elements.append('pulsesrc device={} provide-clock=true do-timestamp=true ! audioconvert ! audioresample ! mix.'.format(mic_device))
         if use_out:
@@ -237,24 +457,30 @@ class RecorderGUI:
         self.use_mic = self.var_mic.get()
         self.use_out = self.var_out.get()
         self.current_block = 1
-        self._stop_recording_flag = threading.Event()
         self._gravacao_start_time = time.time()
         self._update_tempo_decorrido()
         # Mostra o tempo decorrido
         if not self.tempo_decorrido_label.winfo_ismapped():
             self.tempo_decorrido_label.pack(pady=(0, 8))
         # Atualiza a grid imediatamente e seleciona a gravação em andamento
-        self.refresh_files()
-        grav_dirs = [d for d in os.listdir(self.output_dir) if os.path.isdir(os.path.join(self.output_dir, d))]
-        grav_dirs.sort(reverse=True)
-        if grav_dirs:
-            for row in self.tree.get_children():
-                values = self.tree.item(row)['values']
-                if str(grav_dirs[0]) in str(values):
-                    self.tree.selection_set(row)
-                    break
-        self.thread = threading.Thread(target=self._record_in_blocks, daemon=True)
-        self.thread.start()
+        pasta = os.path.basename(self.gravacao_dir)
+        self.catalogo.atualizar(pasta)
+        self.atualizar_linha_grid(pasta)
+        self.selecionar_gravacao(pasta)
+        location = f"{self.filename_base}_%02d.ogg"
+        ao_vivo = self.var_ao_vivo.get()
+        pipeline = self.build_gst_pipeline_mix(self.mic_device, self.monitor_device, location, self.use_mic, self.use_out, ao_vivo=ao_vivo)
+        if ao_vivo:
+            self.transcricao_ao_vivo = TranscricaoAoVivo(self.gravacao_dir, ao_atualizar=self._on_transcricao_ao_vivo)
+            self.transcricao_ao_vivo.conectar(pipeline.get_by_name('pcm'))
+        else:
+            self.transcricao_ao_vivo = None
+        self.captura = CapturaContinua(pipeline, ao_abrir_bloco=self._on_bloco_aberto, ao_fechar_bloco=self._on_bloco_fechado,
+                                       linha_tempo=LinhaTempoVoz(), transcricao_ao_vivo=self.transcricao_ao_vivo)
+        self.captura.iniciar()
+        if self.var_prints_auto.get():
+            self.captura_tela.reiniciar_referencia()
+            self._print_auto_job = self.master.after(int(PRINT_AUTO_INTERVALO * 1000), self._print_automatico)
 
     def _update_tempo_decorrido(self):
         if self.is_recording and self._gravacao_start_time:
@@ -270,35 +496,18 @@ class RecorderGUI:
                 self.master.after_cancel(self._tempo_decorrido_job)
                 self._tempo_decorrido_job = None
 
-    def _record_in_blocks(self):
-        while not self._stop_recording_flag.is_set():
-            filename = f"{self.filename_base}_{self.current_block:02d}.ogg"
-            pipeline = self.build_gst_pipeline_mix(self.mic_device, self.monitor_device, filename, self.use_mic, self.use_out)
-            loop = GLib.MainLoop()
-            pipeline.set_state(Gst.State.PLAYING)
-            print(f"[DEBUG] Iniciando bloco {self.current_block}: {filename}")
-            t = threading.Thread(target=lambda: self._wait_and_stop_block(loop, pipeline), daemon=True)
-            t.start()
-            try:
-                loop.run()
-            except Exception as e:
-                print(f"Erro durante a gravação do bloco: {e}")
-            pipeline.set_state(Gst.State.NULL)
-            try:
-                ajustar_permissao_usuario(filename)
-            except Exception as e:
-                print(f"[PERMISSAO] Falha ao ajustar permissão do bloco: {e}")
-            self.current_block += 1
-        print("[DEBUG] Gravação encerrada.")
-
-    def _wait_and_stop_block(self, loop, pipeline):
-        # Espera RECORD_BLOCK_SECONDS ou até o flag de parada
-        for _ in range(RECORD_BLOCK_SECONDS):
-            if self._stop_recording_flag.is_set():
-                break
-            time.sleep(1)
-        loop.quit()
-        pipeline.set_state(Gst.State.NULL)
+    def _on_bloco_aberto(self, location):
+        print(f"[DEBUG] Iniciando bloco {self.current_block}: {location}")
+
+    def _on_bloco_fechado(self, location):
+        try:
+            ajustar_permissao_usuario(location)
+        except Exception as e:
+            print(f"[PERMISSAO] Falha ao ajustar permissão do bloco: {e}")
+        self.current_block += 1
+
+    def _on_transcricao_ao_vivo(self, numero_bloco):
+        self.master.after(0, lambda: self.status.config(text=f"Transcrição ao vivo: bloco {numero_bloco} concluído.", fg="#1976D2"))
 
     def stop_recording(self):
         if not self.is_recording:
@@ -306,7 +515,26 @@ class RecorderGUI:
         # Capture o tempo ANTES de parar a gravação
         tempo_total = self.tempo_decorrido_var.get()
         self.is_recording = False
-        self._stop_recording_flag.set()
+        if self._print_auto_job is not None:
+            self.master.after_cancel(self._print_auto_job)
+            self._print_auto_job = None
+        if self.captura:
+            transcricao_ao_vivo = self.transcricao_ao_vivo
+            pasta_gravacao = os.path.basename(self.gravacao_dir)
+            gravacao_dir = self.gravacao_dir
+            def ao_encerrar():
+                # Transcreve o trecho final (bloco incompleto) que ainda estiver no buffer
+                if transcricao_ao_vivo:
+                    transcricao_ao_vivo.finalizar()
+                    transcricao_ao_vivo.aguardar()
+                if not transcricao_ao_vivo or transcricao_com_erros(os.path.join(gravacao_dir, 'gravacao.txt')):
+                    # Sem transcrição ao vivo, ou com blocos que falharam: a transcrição refaz só o que falta (cache)
+                    self.fila_tarefas.enfileirar(pasta_gravacao, FilaTarefas.TRANSCRICAO, PRIORIDADE_RESUMO)
+                # Com o último bloco fechado, a gravação segue para transcrição e resumo em background
+                self.fila_tarefas.enfileirar(pasta_gravacao, FilaTarefas.RESUMO, PRIORIDADE_RESUMO)
+            # EOS fecha o bloco atual e encerra o loop assim que o pipeline drenar
+            self.captura.parar(ao_encerrar=ao_encerrar)
+            self.captura = None
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.status.config(text="Gravação finalizada!", fg="#388E3C")
@@ -319,84 +547,235 @@ class RecorderGUI:
             ajustar_permissao_usuario(meta_path)
         except Exception as e:
             print(f"[META] Falha ao salvar tempo total: {e}")
+        # O fechamento do último bloco chega à grid pelo observador de output/
+        pasta = os.path.basename(self.gravacao_dir)
+        self.catalogo.atualizar(pasta)
+        self.atualizar_linha_grid(pasta)
         # Esconde o tempo decorrido
         if self.tempo_decorrido_label.winfo_ismapped():
             self.tempo_decorrido_label.pack_forget()
-        # Aguarda 1 segundo antes de atualizar a grid
-        self.master.after(1000, self.refresh_files)
         messagebox.showinfo("Gravação finalizada", f"Arquivos salvos em blocos de até {RECORD_BLOCK_SECONDS} segundos.")
 
     def refresh_files(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
         if not os.path.exists(self.output_dir):
+            self._exibir_registros([])
             return
-        gravacao_dirs = [d for d in os.listdir(self.output_dir) if os.path.isdir(os.path.join(self.output_dir, d))]
-        gravacao_dirs.sort(reverse=True)
-        for grav_dir in gravacao_dirs:
-            full_dir = os.path.join(self.output_dir, grav_dir)
-            meta_path = os.path.join(full_dir, 'gravacao_meta.json')
-            blocos = [f for f in os.listdir(full_dir) if f.endswith('.ogg')]
-            blocos.sort()
-            # playlist só se houver blocos
-            playlist_path = os.path.join(full_dir, 'playlist.m3u')
-            if blocos and not os.path.exists(playlist_path):
-                with open(playlist_path, 'w', encoding='utf-8') as m3u:
-                    m3u.write('#EXTM3U\n')
-                    for bloco in blocos:
-                        m3u.write(f'{os.path.abspath(os.path.join(full_dir, bloco))}\n')
-                try:
-                    ajustar_permissao_usuario(playlist_path)
-                except Exception as e:
-                    print(f"[PERMISSAO] Falha ao ajustar permissão do playlist: {e}")
-            # Data/hora: se houver blocos, usa o primeiro bloco; senão, usa o meta.json
-            if blocos:
-                try:
-                    path_primeiro_bloco = os.path.join(full_dir, blocos[0])
-                    dt = datetime.fromtimestamp(os.path.getmtime(path_primeiro_bloco)).strftime('%d/%m/%Y %H:%M:%S')
-                except Exception:
-                    dt = ''
-            elif os.path.exists(meta_path):
-                try:
-                    dt = datetime.fromtimestamp(os.path.getmtime(meta_path)).strftime('%d/%m/%Y %H:%M:%S')
-                except Exception:
-                    dt = ''
-            else:
-                dt = ''
-            # Duração: lê do meta.json se existir, senão mostra '?'
-            if os.path.exists(meta_path):
-                try:
-                    with open(meta_path, 'r', encoding='utf-8') as f:
-                        meta = json.load(f)
-                        duracao_str = meta.get('duracao', '?')
-                except Exception:
-                    duracao_str = '?'
-            else:
-                duracao_str = '?'
-            caminho_db = os.path.join(full_dir, f"gravacao_ia.json")
-            titulo = ""
-            if os.path.exists(caminho_db):
-                try:
-                    with open(caminho_db, 'r', encoding='utf-8') as j:
-                        dados_ia = json.load(j)
-                        titulo = dados_ia.get('titulo', "")
-                except Exception:
-                    titulo = ""
-            self.tree.insert('', 'end', values=(dt, titulo, duracao_str, 'detalhes', grav_dir))
-        # Seleciona automaticamente a primeira linha, se houver
+        # O catálogo só relê as pastas cujo mtime mudou; a listagem é uma única consulta indexada
+        self.catalogo.sincronizar()
+        self._exibir_registros(self.catalogo.listar())
+
+    def _exibir_registros(self, registros):
+        self.modelo.carregar(registros)
+        # Mantém a seleção atual; senão seleciona automaticamente a primeira linha, se houver
+        if self._pasta_selecionada not in self.modelo.registros:
+            visiveis = self.modelo.visiveis()
+            self._pasta_selecionada = visiveis[0] if visiveis else None
+            self._grid_offset = 0
+        self._renderizar_grid()
+
+    def _valores_linha(self, registro):
+        dt = datetime.fromtimestamp(registro['datahora']).strftime('%d/%m/%Y %H:%M:%S') if registro['datahora'] else ''
+        return (dt, registro['titulo'], registro['duracao'], 'detalhes', self.fila_tarefas.estado(registro['pasta']), registro['pasta'])
+
+    def _renderizar_grid(self):
+        visiveis = self.modelo.visiveis()
+        total = len(visiveis)
+        self._grid_offset = max(0, min(self._grid_offset, total - self.GRID_LINHAS))
+        janela = visiveis[self._grid_offset:self._grid_offset + self.GRID_LINHAS]
         children = self.tree.get_children()
         if children:
-            self.tree.selection_set(children[0])
+            self.tree.delete(*children)
+        for pasta in janela:
+            self.tree.insert('', 'end', iid=pasta, values=self._valores_linha(self.modelo.registros[pasta]))
+        if self._pasta_selecionada in janela:
+            self.tree.selection_set(self._pasta_selecionada)
+        if total:
+            self.grid_scroll.set(self._grid_offset / total, (self._grid_offset + len(janela)) / total)
+        else:
+            self.grid_scroll.set(0, 1)
 
-    def get_selected_gravacao_dir(self):
+    def _rolar_grid(self, novo_offset):
+        total = len(self.modelo.visiveis())
+        novo_offset = max(0, min(int(novo_offset), total - self.GRID_LINHAS))
+        if novo_offset != self._grid_offset:
+            self._grid_offset = novo_offset
+            self._renderizar_grid()
+
+    def _on_grid_scroll(self, *args):
+        total = len(self.modelo.visiveis())
+        if args[0] == 'moveto':
+            self._rolar_grid(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            passo = self.GRID_LINHAS if args[2] == 'pages' else 1
+            self._rolar_grid(self._grid_offset + int(args[1]) * passo)
+
+    def _on_grid_mousewheel(self, event):
+        if event.num == 5 or event.delta < 0:
+            self._rolar_grid(self._grid_offset + 3)
+        elif event.num == 4 or event.delta > 0:
+            self._rolar_grid(self._grid_offset - 3)
+        return 'break'
+
+    def _on_tree_selecao(self, event=None):
         sel = self.tree.selection()
-        print(f'[DEBUG] get_selected_gravacao_dir - selection: {sel}')
-        if not sel:
+        # Linhas que saem da janela visível não desfazem a seleção do modelo
+        if sel:
+            self._pasta_selecionada = sel[0]
+
+    def _mover_selecao(self, passo):
+        visiveis = self.modelo.visiveis()
+        if not visiveis:
+            return 'break'
+        pos = self.modelo.posicao(self._pasta_selecionada)
+        pos = 0 if pos is None else max(0, min(pos + passo, len(visiveis) - 1))
+        self.selecionar_gravacao(visiveis[pos])
+        return 'break'
+
+    def selecionar_gravacao(self, pasta):
+        """Seleciona a gravação pela pasta, rolando a grid até ela. Retorna False se estiver oculta pelos filtros."""
+        pos = self.modelo.posicao(pasta)
+        if pos is None:
+            return False
+        self._pasta_selecionada = pasta
+        if pos < self._grid_offset:
+            self._grid_offset = pos
+        elif pos >= self._grid_offset + self.GRID_LINHAS:
+            self._grid_offset = pos - self.GRID_LINHAS + 1
+        self._renderizar_grid()
+        return True
+
+    def ordenar_grid(self, coluna):
+        self.modelo.definir_ordem(coluna)
+        titulos = {"datahora": "Data/Hora", "titulo": "Título", "duracao": "Duração"}
+        col_atual, desc = self.modelo.ordem
+        for col, texto in titulos.items():
+            seta = (' ▼' if desc else ' ▲') if col == col_atual else ''
+            self.tree.heading(col, text=texto + seta)
+        self._grid_offset = 0
+        self._renderizar_grid()
+
+    def _agendar_filtro(self):
+        # Aguarda a digitação parar antes de refiltrar
+        if self._filtro_job:
+            self.master.after_cancel(self._filtro_job)
+        self._filtro_job = self.master.after(200, self.aplicar_filtros)
+
+    def aplicar_filtros(self):
+        self._filtro_job = None
+        def ler_data(texto, fim_do_dia=False):
+            texto = texto.strip()
+            if not texto:
+                return None
+            try:
+                dt = datetime.strptime(texto, '%d/%m/%Y')
+            except ValueError:
+                return None
+            return dt.timestamp() + (86399.999 if fim_do_dia else 0)
+        self.modelo.definir_filtro(self.var_filtro_titulo.get(), ler_data(self.var_filtro_de.get()), ler_data(self.var_filtro_ate.get(), fim_do_dia=True))
+        self._grid_offset = 0
+        if self.modelo.posicao(self._pasta_selecionada) is not None:
+            self.selecionar_gravacao(self._pasta_selecionada)
+        else:
+            self._renderizar_grid()
+
+    def limpar_filtros(self):
+        for var in (self.var_filtro_titulo, self.var_filtro_de, self.var_filtro_ate):
+            var.set('')
+        self.aplicar_filtros()
+
+    def atualizar_linha_grid(self, pasta):
+        """Reaplica à grid os dados atuais do catálogo para uma única gravação."""
+        self.aplicar_alteracoes_grid({pasta})
+
+    def aplicar_alteracoes_grid(self, pastas):
+        # Custo proporcional ao número de pastas alteradas, não ao total de gravações
+        for pasta in pastas:
+            registro = self.catalogo.obter(pasta)
+            if registro:
+                self.modelo.atualizar(registro)
+            else:
+                self.modelo.remover(pasta)
+        if self._pasta_selecionada not in self.modelo.registros:
+            visiveis = self.modelo.visiveis()
+            self._pasta_selecionada = visiveis[0] if visiveis else None
+        self._renderizar_grid()
+
+    def _atualizar_tarefa_grid(self, pasta):
+        # Só a célula da coluna de tarefas muda; linhas fora da janela visível são renderizadas ao rolar
+        if self.tree.exists(pasta):
+            self.tree.set(pasta, 'tarefa', self.fila_tarefas.estado(pasta))
+        pendentes = self.fila_tarefas.pendentes()
+        self.pendentes_button.config(text=f"Processar Pendentes ({pendentes})" if pendentes else "Processar Pendentes")
+
+    def _on_saida_alterada(self, alteracoes):
+        # Chamado na thread do observador: atualiza o catálogo aqui e só a grid na thread do Tk
+        if alteracoes is None:
+            self.master.after(0, self.refresh_files)
+            self.indice_busca.sincronizar()
+            return
+        for pasta in alteracoes:
+            try:
+                self.catalogo.atualizar(pasta)
+                self.indice_busca.indexar_pasta(pasta)
+            except Exception as e:
+                print(f"[OBSERVADOR] Falha ao atualizar {pasta} no catálogo: {e}")
+        pastas = set(alteracoes)
+        self.master.after(0, lambda: self.aplicar_alteracoes_grid(pastas))
+
+    def buscar_conteudo(self):
+        consulta = self.var_busca.get().strip()
+        if self._busca_popup is not None and self._busca_popup.winfo_exists():
+            self._busca_popup.destroy()
+        if not consulta:
+            return
+        inicio = time.perf_counter()
+        resultados = self.indice_busca.buscar(consulta)
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        self.status.config(text=f"{len(resultados)} resultado(s) para \"{consulta}\" em {duracao_ms:.0f} ms.", fg="#1976D2")
+        if not resultados:
+            return
+        # Lista de resultados logo abaixo do campo de busca
+        popup = self._busca_popup = tk.Toplevel(self.master)
+        popup.wm_overrideredirect(True)
+        x = self.entry_busca.winfo_rootx()
+        y = self.entry_busca.winfo_rooty() + self.entry_busca.winfo_height() + 2
+        popup.wm_geometry(f"+{x}+{y}")
+        lista = tk.Listbox(popup, font=("Arial", 11), width=110, height=min(12, len(resultados)), activestyle='dotbox')
+        lista.pack(side=tk.LEFT, fill='both')
+        scroll = tk.Scrollbar(popup, orient="vertical", command=lista.yview)
+        scroll.pack(side=tk.RIGHT, fill='y')
+        lista.configure(yscrollcommand=scroll.set)
+        for r in resultados:
+            registro = self.modelo.registros.get(r['pasta']) or {}
+            dt = datetime.fromtimestamp(registro['datahora']).strftime('%d/%m/%Y %H:%M') if registro.get('datahora') else r['pasta']
+            titulo = registro.get('titulo') or '(sem título)'
+            trecho = ' '.join(r['trecho'].split())
+            lista.insert('end', f"{dt} — {titulo} — [{r['tipo']}] {trecho}")
+        def abrir_resultado(event=None):
+            sel = lista.curselection()
+            if not sel:
+                return
+            pasta = resultados[sel[0]]['pasta']
+            popup.destroy()
+            if not self.selecionar_gravacao(pasta):
+                # A gravação pode estar escondida pelos filtros da grid
+                self.limpar_filtros()
+                self.selecionar_gravacao(pasta)
+            gravacao_dir = os.path.join(self.output_dir, pasta)
+            if os.path.isdir(gravacao_dir):
+                self.abrir_detalhes_gravacao(gravacao_dir)
+        lista.bind('<Double-1>', abrir_resultado)
+        lista.bind('<Return>', abrir_resultado)
+        lista.bind('<Escape>', lambda e: popup.destroy())
+        lista.focus_set()
+        lista.selection_set(0)
+
+    def get_selected_gravacao_dir(self):
+        pasta = self._pasta_selecionada
+        print(f'[DEBUG] get_selected_gravacao_dir - pasta selecionada: {pasta}')
+        if not pasta or pasta not in self.modelo.registros:
             messagebox.showwarning("Seleção", "Selecione um registro na lista.")
             return None
-        # Agora pega o nome da pasta da coluna oculta
-        dt, titulo, duracao, detalhes, pasta = self.tree.item(sel[0])['values']
-        print(f'[DEBUG] get_selected_gravacao_dir - pasta selecionada: {pasta}')
         gravacao_dir = os.path.join(self.output_dir, str(pasta))
         if os.path.isdir(gravacao_dir):
             print(f'[DEBUG] get_selected_gravacao_dir - encontrou diretório: {gravacao_dir}')
@@ -439,7 +818,9 @@ class RecorderGUI:
         if messagebox.askyesno("Excluir", "Deseja realmente excluir toda a gravação selecionada? (Todos os arquivos dessa gravação serão removidos)"):
             try:
                 shutil.rmtree(gravacao_dir)
-                self.refresh_files()
+                pasta = os.path.basename(os.path.normpath(gravacao_dir))
+                self.catalogo.atualizar(pasta)
+                self.aplicar_alteracoes_grid({pasta})
                 self.status.config(text="Gravação excluída com sucesso.", fg="#F44336")
             except Exception as e:
                 self.status.config(text=f"Erro ao excluir gravação: {e}", fg="#F44336")
@@ -484,7 +865,7 @@ class RecorderGUI:
         if not os.path.exists(self.output_dir):
             messagebox.showinfo("Excluir Todos", "Nenhum arquivo para excluir.")
             return
-        gravacao_dirs = [os.path.join(self.output_dir, d) for d in os.listdir(self.output_dir)]
+        gravacao_dirs = [os.path.join(self.output_dir, d) for d in os.listdir(self.output_dir) if not d.startswith((CatalogoGravacoes.ARQUIVO, CacheIA.ARQUIVO, FilaTarefas.ARQUIVO))]
         gravacao_dirs = [d for d in gravacao_dirs if os.path.isdir(d) or os.path.isfile(d)]
         if not gravacao_dirs:
             messagebox.showinfo("Excluir Todos", "Nenhum arquivo para excluir.")
@@ -520,6 +901,7 @@ class RecorderGUI:
         if not row_id:
             return
         self.tree.selection_set(row_id)
+        self._pasta_selecionada = row_id
         colunas = self.tree['columns']
         try:
             idx_detalhes = list(colunas).index('detalhes') + 1
@@ -542,65 +924,34 @@ class RecorderGUI:
         else:
             self.tree.config(cursor='')
 
-    def iniciar_transcricao_thread(self, arquivo):
-        # Desabilita botões e mostra status
-        self.status.config(text="Transcrevendo...", fg="#1976D2")
-        self.start_button.config(state=tk.DISABLED)
-        self.stop_button.config(state=tk.DISABLED)
-        self.play_button.config(state=tk.DISABLED)
-        self.delete_button.config(state=tk.DISABLED)
-        self.open_folder_button.config(state=tk.DISABLED)
-        self.delete_all_button.config(state=tk.DISABLED)
-        self.refresh_button.config(state=tk.DISABLED)
-        # Desabilita o clique na treeview
-        self.tree.unbind('<Button-1>')
-        t = threading.Thread(target=self.transcrever_audio, args=(arquivo,), daemon=True)
-        t.start()
-
     def transcrever_audio(self, gravacao_dir):
         """
-        Transcreve todos os blocos .ogg de uma gravação (subpasta), junta as transcrições e salva em um único .txt.
-        Mostra feedback visual do progresso na barra de status.
+        Tarefa da fila: transcreve todos os blocos .ogg de uma gravação (subpasta), junta as transcrições e salva em um único .txt.
+        Mostra feedback visual do progresso na barra de status; erros são propagados para a fila registrar.
         """
+        pasta = os.path.basename(os.path.normpath(gravacao_dir))
         try:
             blocos_ogg = [f for f in os.listdir(gravacao_dir) if f.endswith('.ogg')]
             blocos_ogg.sort(key=lambda x: int(os.path.splitext(x)[0].split('_')[-1]))
             if not blocos_ogg:
-                self.master.after(0, lambda: messagebox.showwarning("Transcrição", "Nenhum bloco encontrado para transcrição."))
-                return
-            transcricoes = []
-            total_blocos = len(blocos_ogg)
-            for idx, bloco_ogg in enumerate(blocos_ogg):
-                self.master.after(0, lambda idx=idx, total_blocos=total_blocos: self.status.config(text=f"Transcrevendo bloco {idx+1} de {total_blocos}..."))
-                caminho_ogg = os.path.join(gravacao_dir, bloco_ogg)
-                nome_bloco = os.path.splitext(bloco_ogg)[0]
-                caminho_wav = os.path.join(gravacao_dir, f"{nome_bloco}.wav")
-                # Converte OGG para WAV
-                audio = AudioSegment.from_file(caminho_ogg, format="ogg")
-                audio = audio.normalize()
-                audio.export(caminho_wav, format="wav")
-                try:
-                    ajustar_permissao_usuario(caminho_wav)
-                except Exception as e:
-                    print(f"[PERMISSAO] Falha ao ajustar permissão do wav: {e}")
-                recognizer = sr.Recognizer()
-                try:
-                    with sr.AudioFile(caminho_wav) as source:
-                        audio_data = recognizer.record(source)
-                        texto = recognizer.recognize_google(audio_data, language='pt-BR')
-                        transcricoes.append(texto)
-                except sr.UnknownValueError:
-                    transcricoes.append(f'[Bloco {idx+1}: não foi possível entender o áudio]')
-                except Exception as e:
-                    transcricoes.append(f'[Bloco {idx+1}: erro ao transcrever: {e}]')
-                # Remove arquivo temporário
-                if os.path.exists(caminho_wav):
-                    try:
-                        os.remove(caminho_wav)
-                    except Exception:
-                        pass
-            # Junta as transcrições
-            texto_final = '\n'.join(transcricoes)
+                raise FileNotFoundError("Nenhum bloco encontrado para transcrição.")
+            caminhos = [os.path.join(gravacao_dir, b) for b in blocos_ogg]
+            # Só vão para o reconhecedor blocos novos, alterados ou que falharam da última vez
+            cache = CacheTranscricao(gravacao_dir)
+            pendentes = [(idx + 1, caminho) for idx, caminho in enumerate(caminhos) if cache.obter(caminho) is None]
+            total_blocos = len(pendentes)
+            em_cache = len(caminhos) - total_blocos
+            print(f"[TRANSCRIÇÃO] {total_blocos} blocos a transcrever, {em_cache} reaproveitados do cache.")
+            self.master.after(0, lambda: self.status.config(text=f"{pasta}: transcrevendo {total_blocos} blocos ({em_cache} em cache)...", fg="#1976D2"))
+            def ao_progresso(concluidos, total, numero_bloco):
+                self.master.after(0, lambda: self.status.config(text=f"{pasta}: {concluidos} de {total} blocos transcritos (bloco {numero_bloco})...", fg="#1976D2"))
+            if pendentes:
+                # Cada bloco é guardado no cache assim que todas as suas falas terminam
+                numeros = [numero for numero, _ in pendentes]
+                transcrever_blocos([caminho for _, caminho in pendentes], ao_progresso=ao_progresso, numeros=numeros, cache=cache)
+            cache.salvar(caminhos)
+            # Junta as transcrições a partir do cache, na ordem dos blocos
+            texto_final = '\n'.join(cache.texto(caminho) for caminho in caminhos)
             caminho_txt = os.path.join(gravacao_dir, 'gravacao.txt')
             with open(caminho_txt, 'w', encoding='utf-8') as f:
                 f.write(texto_final)
@@ -608,28 +959,12 @@ class RecorderGUI:
                 ajustar_permissao_usuario(caminho_txt)
             except Exception as e:
                 print(f"[PERMISSAO] Falha ao ajustar permissão do txt: {e}")
-            self.master.after(0, lambda: self.status.config(text="Transcrição finalizada com sucesso!", fg="#388E3C"))
-            self.master.after(0, lambda: messagebox.showinfo("Transcrição", "Transcrição finalizada com sucesso!"))
+            self.indice_busca.indexar_pasta(pasta)
+            self.master.after(0, lambda: self.status.config(text=f"{pasta}: transcrição finalizada com sucesso!", fg="#388E3C"))
         except Exception as e:
-            print(f"[TRANSCRIÇÃO] Erro ao transcrever: {e}")
-            self.master.after(0, lambda err=e: messagebox.showerror("Erro na Transcrição", f"Erro ao transcrever: {err}"))
-            self.master.after(0, lambda: self.status.config(text="", fg="#555"))
-        finally:
-            self.master.after(0, self.finalizar_transcricao_feedback)
-            self.master.after(0, lambda: self.tree.bind('<Button-1>', self.on_tree_click_detalhes))
-
-    def finalizar_transcricao_feedback(self):
-        self.status.config(text="", fg="#555")
-        self.start_button.config(state=tk.NORMAL)
-        self.stop_button.config(state=tk.NORMAL)
-        self.play_button.config(state=tk.NORMAL)
-        self.delete_button.config(state=tk.NORMAL)
-        self.open_folder_button.config(state=tk.NORMAL)
-        self.delete_all_button.config(state=tk.NORMAL)
-        self.refresh_button.config(state=tk.NORMAL)
-        # Reabilita o clique na treeview
-        self.tree.bind('<Button-1>', self.on_tree_click_detalhes)
-        self.refresh_files()
+            print(f"[TRANSCRIÇÃO] Erro ao transcrever {pasta}: {e}")
+            self.master.after(0, lambda err=e: self.status.config(text=f"{pasta}: erro ao transcrever: {err}", fg="#F44336"))
+            raise
 
     def abrir_detalhes_gravacao(self, gravacao_dir):
         print('[DEBUG] abrir_detalhes_gravacao chamada para:', gravacao_dir)
@@ -706,6 +1041,24 @@ class RecorderGUI:
         txt_transc.pack(fill='both', expand=False, padx=16, pady=(0, 8))
         txt_transc.insert('1.0', transcricao)
         txt_transc.config(state='disabled')
+        # Enquanto esta gravação estiver em andamento, acompanha a transcrição ao vivo
+        def acompanhar_transcricao(mtime_anterior=None):
+            if not detalhes.winfo_exists():
+                return
+            ao_vivo = self.transcricao_ao_vivo
+            ativa = ao_vivo is not None and ao_vivo.ativa() and os.path.abspath(ao_vivo.gravacao_dir) == os.path.abspath(gravacao_dir)
+            mtime = os.path.getmtime(caminho_txt) if os.path.exists(caminho_txt) else None
+            if mtime is not None and mtime != mtime_anterior:
+                with open(caminho_txt, 'r', encoding='utf-8') as f:
+                    novo_texto = f.read()
+                txt_transc.config(state='normal')
+                txt_transc.delete('1.0', 'end')
+                txt_transc.insert('1.0', novo_texto)
+                txt_transc.see('end')
+                txt_transc.config(state='disabled')
+            if ativa:
+                detalhes.after(2000, lambda: acompanhar_transcricao(mtime))
+        acompanhar_transcricao(os.path.getmtime(caminho_txt) if os.path.exists(caminho_txt) else None)
         tk.Label(card_info, text="Resumo:", font=("Arial", 11, "bold"), bg=BG_CARD).pack(anchor='w', padx=16, pady=(8, 0))
         txt_resumo = tk.Text(card_info, font=("Arial", 12), height=6, wrap='word')
         txt_resumo.pack(fill='both', expand=False, padx=16, pady=(0, 8))
@@ -719,7 +1072,12 @@ class RecorderGUI:
         # Inferior: painel de thumbs com rolagem
         thumbs_frame = tk.Frame(left_frame, bg=BG_MODAL)
         thumbs_frame.grid(row=1, column=0, sticky='nsew', padx=PAD, pady=(0, PAD))
-        tk.Label(thumbs_frame, text="Prints:", font=("Arial", 13, "bold"), bg=BG_MODAL, anchor='w').pack(anchor='w', padx=2, pady=(0, 2))
+        thumbs_topo = tk.Frame(thumbs_frame, bg=BG_MODAL)
+        thumbs_topo.pack(fill='x')
+        tk.Label(thumbs_topo, text="Prints:", font=("Arial", 13, "bold"), bg=BG_MODAL, anchor='w').pack(side='left', padx=2, pady=(0, 2))
+        agrupar_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(thumbs_topo, text="Agrupar repetidos", variable=agrupar_var, bg=BG_MODAL, font=("Arial", 10),
+                       command=lambda: montar_thumbs()).pack(side='left', padx=12)
         canvas = tk.Canvas(thumbs_frame, bg=BG_MODAL, highlightthickness=0)
         scrollbar = tk.Scrollbar(thumbs_frame, orient="vertical", command=canvas.yview)
         scroll_frame = tk.Frame(canvas, bg=BG_MODAL)
@@ -734,38 +1092,111 @@ class RecorderGUI:
                 canvas.yview_scroll(1, "units")
             elif event.num == 4 or event.delta == 120:
                 canvas.yview_scroll(-1, "units")
+            else:
+                return
+            if canvas.winfo_exists():
+                detalhes.after_idle(lambda: detalhes.winfo_exists() and self._detalhes_rolar_thumbs())
         canvas.bind_all("<MouseWheel>", _on_mousewheel)  # Windows/macOS
         canvas.bind_all("<Button-4>", _on_mousewheel)    # Linux scroll up
         canvas.bind_all("<Button-5>", _on_mousewheel)    # Linux scroll down
-        # Listar thumbs
+        # Listar thumbs: os quadros são criados vazios e só os visíveis recebem a miniatura (gerada/lida em background)
         from glob import glob
-        from PIL import Image, ImageTk
+        from PIL import ImageTk
         prints = glob(os.path.join(gravacao_dir, 'print_*.png'))
         prints = sorted(prints, key=lambda x: os.path.getctime(x), reverse=True)
         self._detalhes_imgs_refs = []
         max_per_row = 3
-        for idx, img_path in enumerate(prints):
-            img = Image.open(img_path)
-            img.thumbnail((180, 120))
-            tk_img = ImageTk.PhotoImage(img)
+        slots = []
+        solicitadas = set()
+        # Só lê o índice já gravado (nenhum hash é calculado na thread do Tk)
+        duplicatas = IndiceHashPrints(gravacao_dir).duplicatas()
+        def abrir_full(img_path):
+            print('[DEBUG] abrir_full chamado para:', img_path)
+            if not hasattr(self, '_modal_print_ref') or self._modal_print_ref is None or not self._modal_print_ref.winfo_exists():
+                self._modal_print_ref = tk.Toplevel(self.master)
+            print('[DEBUG] chamando _abrir_modal_print para:', img_path)
+            self._abrir_modal_print(img_path, reuse_modal=self._modal_print_ref)
+            self._modal_print_ref.deiconify()
+            self._modal_print_ref.lift()
+        def montar_thumbs():
+            for filho in scroll_frame.winfo_children():
+                filho.destroy()
+            slots.clear()
+            solicitadas.clear()
+            exibidos = prints
+            repetidos = defaultdict(int)
+            if agrupar_var.get():
+                # Repetidos somem da grade; o print original mostra quantas cópias foram agrupadas nele
+                exibidos = [p for p in prints if os.path.basename(p) not in duplicatas]
+                for original in duplicatas.values():
+                    repetidos[original] += 1
+            for idx, img_path in enumerate(exibidos):
+                nome = os.path.basename(img_path)
+                frame_thumb = tk.Frame(scroll_frame, bg=BG_MODAL, bd=1, relief="solid")
+                # Espaço reservado com o tamanho da miniatura, para a rolagem não "pular" quando ela chega
+                area = tk.Frame(frame_thumb, width=MINIATURA_TAMANHO[0], height=MINIATURA_TAMANHO[1], bg="#e0e0e0")
+                area.pack_propagate(False)
+                area.pack()
+                btn = tk.Button(area, text="...", command=lambda p=img_path: abrir_full(p), bg="#e0e0e0", relief="flat")
+                btn.pack(fill='both', expand=True)
+                if repetidos.get(nome):
+                    legenda = f"{nome} (+{repetidos[nome]} repetido{'s' if repetidos[nome] > 1 else ''})"
+                elif nome in duplicatas:
+                    legenda = f"{nome} (repete {duplicatas[nome]})"
+                else:
+                    legenda = nome
+                tk.Label(frame_thumb, text=legenda, font=("Arial", 9), bg=BG_MODAL).pack()
+                row = idx // max_per_row
+                col = idx % max_per_row
+                frame_thumb.grid(row=row, column=col, padx=10, pady=10)
+                slots.append((img_path, frame_thumb, btn))
+            if not prints:
+                tk.Label(scroll_frame, text="Nenhum print capturado ainda.", font=("Arial", 12, "italic"), bg=BG_MODAL, fg="#888").pack(pady=30)
+            canvas.yview_moveto(0)
+            agendar_carregamento()
+        def aplicar_miniatura(btn, imagem):
+            if not btn.winfo_exists():
+                return
+            tk_img = ImageTk.PhotoImage(imagem)
             self._detalhes_imgs_refs.append(tk_img)
-            def abrir_full(img_path=img_path):
-                print('[DEBUG] abrir_full chamado para:', img_path)
-                if not hasattr(self, '_modal_print_ref') or self._modal_print_ref is None or not self._modal_print_ref.winfo_exists():
-                    self._modal_print_ref = tk.Toplevel(self.master)
-                print('[DEBUG] chamando _abrir_modal_print para:', img_path)
-                self._abrir_modal_print(img_path, reuse_modal=self._modal_print_ref)
-                self._modal_print_ref.deiconify()
-                self._modal_print_ref.lift()
-            frame_thumb = tk.Frame(scroll_frame, bg=BG_MODAL, bd=1, relief="solid")
-            btn = tk.Button(frame_thumb, image=tk_img, command=abrir_full, bg=BG_MODAL, relief="flat")
-            btn.pack()
-            tk.Label(frame_thumb, text=os.path.basename(img_path), font=("Arial", 9), bg=BG_MODAL).pack()
-            row = idx // max_per_row
-            col = idx % max_per_row
-            frame_thumb.grid(row=row, column=col, padx=10, pady=10)
-        if not prints:
-            tk.Label(scroll_frame, text="Nenhum print capturado ainda.", font=("Arial", 12, "italic"), bg=BG_MODAL, fg="#888").pack(pady=30)
+            btn.config(image=tk_img, text='', bg=BG_MODAL)
+        def carregar_visiveis():
+            if not detalhes.winfo_exists() or not slots:
+                return
+            topo = canvas.canvasy(0)
+            base = topo + canvas.winfo_height()
+            for img_path, frame_thumb, btn in slots:
+                if img_path in solicitadas:
+                    continue
+                y = frame_thumb.winfo_y()
+                if y + frame_thumb.winfo_height() < topo or y > base:
+                    continue
+                solicitadas.add(img_path)
+                futuro = agendar_miniatura(img_path, carregar=True)
+                def ao_concluir(f, btn=btn, img_path=img_path):
+                    try:
+                        imagem = f.result()
+                    except Exception as e:
+                        print(f"[PRINT] Falha ao gerar miniatura de {img_path}: {e}")
+                        return
+                    try:
+                        detalhes.after(0, lambda: aplicar_miniatura(btn, imagem))
+                    except (RuntimeError, tk.TclError):
+                        pass
+                futuro.add_done_callback(ao_concluir)
+        carregar_job = [None]
+        def agendar_carregamento(*args):
+            if carregar_job[0] is not None:
+                detalhes.after_cancel(carregar_job[0])
+            carregar_job[0] = detalhes.after(50, carregar_visiveis)
+        def rolar(*args):
+            canvas.yview(*args)
+            agendar_carregamento()
+        scrollbar.config(command=rolar)
+        canvas.bind("<Configure>", agendar_carregamento, add='+')
+        scroll_frame.bind("<Configure>", agendar_carregamento, add='+')
+        self._detalhes_rolar_thumbs = agendar_carregamento
+        montar_thumbs()
         # --- PARTE DIREITA: pergunta IA ---
         frame_pergunta = tk.Frame(right_frame, bg=BG_MODAL)
         frame_pergunta.pack(fill='x', padx=PAD, pady=(PAD*2, 10), anchor='n')
@@ -807,7 +1238,22 @@ class RecorderGUI:
             btn_copiar_resp.pack(side='left', padx=(0, 8), ipadx=8, ipady=2)
         set_resposta_markdown("")
         # Função para perguntar à IA e exibir resposta em markdown
-        def perguntar_ia(transcricao_c=transcricao):
+        indice_trechos = {"mtime": None, "indice": None}
+        def obter_indice_trechos():
+            # Reconstrói o índice apenas quando o gravacao.txt muda (ex.: transcrição ao vivo)
+            mtime = os.path.getmtime(caminho_txt) if os.path.exists(caminho_txt) else None
+            if indice_trechos["indice"] is None or indice_trechos["mtime"] != mtime:
+                texto = transcricao
+                if mtime is not None:
+                    with open(caminho_txt, 'r', encoding='utf-8') as f:
+                        texto = f.read()
+                # Início real das falas (gravacao_transcricao.json) para a referência de tempo dos trechos
+                blocos = sorted(os.path.join(gravacao_dir, f) for f in os.listdir(gravacao_dir) if f.endswith('.ogg'))
+                falas = CacheTranscricao(gravacao_dir).falas_por_bloco(blocos)
+                indice_trechos["indice"] = IndiceTrechos(texto, falas_por_bloco=falas)
+                indice_trechos["mtime"] = mtime
+            return indice_trechos["indice"]
+        def perguntar_ia():
             pergunta = pergunta_var.get().strip()
             if not pergunta:
                 set_resposta_markdown("Digite uma pergunta.")
@@ -815,25 +1261,22 @@ class RecorderGUI:
             btn_perguntar.config(state=tk.DISABLED)
             set_resposta_markdown("Pesquisando... Aguarde a resposta da IA.")
             self.master.update_idletasks()
-            texto_base = transcricao_c
             def run_ia_pergunta():
                 try:
-                    import os
-                    api_key = os.environ.get("GEMINI_API_KEY") or GEMINI_API_KEY
-                    model = GEMINI_MODEL
-                    genai.configure(api_key=api_key)
+                    indice = obter_indice_trechos()
+                    trechos = indice.consultar(pergunta, IA_PERGUNTA_TOP_K)
+                    contexto = '\n\n'.join(f"[{t['referencia']}]\n{t['texto']}" for t in trechos)
+                    print(f"[IA] Pergunta com {len(trechos)} de {len(indice.trechos)} trechos ({len(contexto)} de {indice.tamanho_total} caracteres).")
                     prompt = f"""
-Responda apenas com base no conteúdo do print abaixo. Se a resposta não estiver presente, informe claramente que não é possível responder com base apenas no print.
+Responda apenas com base nos trechos da transcrição da gravação abaixo, selecionados por relevância para a pergunta. Cada trecho indica o bloco e o tempo em que foi dito (com ~ quando aproximado); cite essas referências quando usar um trecho. Se a resposta não estiver presente nos trechos, informe claramente que não é possível responder com base na transcrição.
 
-Conteúdo do print:
-{texto_base}
+Trechos da transcrição:
+{contexto}
 
 Pergunta do usuário:
 {pergunta}
 """
-                    model = genai.GenerativeModel(GEMINI_MODEL)
-                    response = model.generate_content(prompt)
-                    resposta = response.text.strip()
+                    resposta = gerar_conteudo_ia(prompt, prioridade=PRIORIDADE_INTERATIVA)
                     self.master.after(0, lambda: set_resposta_markdown(resposta))
                 except Exception as e:
                     msg_erro = str(e)
@@ -858,7 +1301,13 @@ Pergunta do usuário:
         if not files:
             messagebox.showwarning("Transcrição", "Nenhum bloco encontrado para transcrição.")
             return
-        self.iniciar_transcricao_thread(gravacao_dir)
+        if self._gravando_em(gravacao_dir):
+            # stop_recording já enfileira a transcrição; agora ela leria o .ogg incompleto e concorreria com a ao vivo
+            messagebox.showinfo("Transcrição", "Esta gravação ainda está em andamento; ela será transcrita ao parar a gravação.")
+            return
+        # Pedido explícito do usuário passa à frente do lote em background
+        self.fila_tarefas.enfileirar(os.path.basename(os.path.normpath(gravacao_dir)), FilaTarefas.TRANSCRICAO, PRIORIDADE_INTERATIVA)
+        self.status.config(text="Transcrição adicionada à fila.", fg="#1976D2")
 
     def aplicar_ia_selecionado(self):
         print('[DEBUG] aplicar_ia_selecionado chamado')
@@ -871,47 +1320,56 @@ Pergunta do usuário:
         if not files:
             messagebox.showwarning("IA", "Nenhum bloco encontrado para aplicar IA.")
             return
-        self.status.config(text="Processando IA...", fg="#1976D2")
-        self.ia_button.config(state=tk.DISABLED)
-        t = threading.Thread(target=self.processar_ia_gemini, args=(gravacao_dir,), daemon=True)
-        t.start()
+        if self._gravando_em(gravacao_dir):
+            messagebox.showinfo("IA", "Esta gravação ainda está em andamento; o resumo será gerado ao parar a gravação.")
+            return
+        pasta = os.path.basename(os.path.normpath(gravacao_dir))
+        # Sem transcrição, ela é feita antes: o resumo só sai da fila depois da transcrição da mesma gravação
+        if not os.path.exists(os.path.join(gravacao_dir, 'gravacao.txt')):
+            self.fila_tarefas.enfileirar(pasta, FilaTarefas.TRANSCRICAO, PRIORIDADE_INTERATIVA)
+        self.fila_tarefas.enfileirar(pasta, FilaTarefas.RESUMO, PRIORIDADE_INTERATIVA)
+        self.status.config(text="Resumo com IA adicionado à fila.", fg="#1976D2")
+
+    def _gravando_em(self, gravacao_dir):
+        # Mesma comparação de processar_pendentes: a pasta da gravação em andamento fica de fora da fila
+        return self.is_recording and os.path.basename(os.path.normpath(gravacao_dir)) == os.path.basename(self.gravacao_dir)
+
+    def processar_pendentes(self):
+        """Enfileira transcrição e resumo de todas as gravações que ainda não os têm."""
+        gravando = os.path.basename(self.gravacao_dir) if self.is_recording else None
+        transcricoes = resumos = 0
+        for registro in self.catalogo.listar():
+            pasta = registro['pasta']
+            if pasta == gravando or not registro['blocos']:
+                continue
+            gravacao_dir = os.path.join(self.output_dir, pasta)
+            if not os.path.exists(os.path.join(gravacao_dir, 'gravacao.txt')):
+                transcricoes += self.fila_tarefas.enfileirar(pasta, FilaTarefas.TRANSCRICAO, PRIORIDADE_FUNDO)
+            if not os.path.exists(os.path.join(gravacao_dir, 'gravacao_ia.json')):
+                resumos += self.fila_tarefas.enfileirar(pasta, FilaTarefas.RESUMO, PRIORIDADE_FUNDO)
+        if transcricoes or resumos:
+            self.status.config(text=f"Na fila: {transcricoes} transcrição(ões) e {resumos} resumo(s).", fg="#1976D2")
+        else:
+            self.status.config(text="Nenhuma gravação pendente.", fg="#388E3C")
 
     def processar_ia_gemini(self, gravacao_dir):
+        """Tarefa da fila: gera título, resumo e pontos principais da transcrição. Erros são propagados para a fila registrar."""
+        pasta = os.path.basename(os.path.normpath(gravacao_dir))
         try:
             caminho_txt = os.path.join(gravacao_dir, 'gravacao.txt')
             caminho_db = os.path.join(gravacao_dir, 'gravacao_ia.json')
             # Lê a transcrição
             if not os.path.exists(caminho_txt):
-                self.master.after(0, lambda: messagebox.showwarning("IA", "Transcrição não encontrada para esta gravação."))
-                return
+                raise FileNotFoundError("Transcrição não encontrada para esta gravação.")
             with open(caminho_txt, 'r', encoding='utf-8') as f:
                 transcricao = f.read()
-            # Monta o prompt pedindo JSON puro, sem markdown
-            prompt = (
-                "Você receberá a transcrição de uma reunião em português do Brasil. "
-                "Gere um título objetivo para a reunião, um resumo de até 5 linhas e elenque os principais pontos discutidos (em tópicos).\n"
-                "Retorne a resposta exclusivamente no seguinte formato JSON, sem comentários, sem blocos de código markdown (como ```json), sem texto extra antes ou depois, apenas o JSON puro:\n"
-                '{\n  "titulo": "...",\n  "resumo": "...",\n  "pontos": [\n    "...",\n    "..."\n  ]\n}\n'
-                "Transcrição:\n" + transcricao
-            )
-            model = genai.GenerativeModel(GEMINI_MODEL)
-            response = model.generate_content(prompt)
-            resposta = response.text.strip()
-            # Limpa blocos de markdown se vierem
-            resposta_limpa = re.sub(r"^```[a-zA-Z]*\n?|```$", "", resposta, flags=re.MULTILINE).strip()
-            # Tenta fazer o parser do JSON retornado
-            try:
-                dados_ia = json.loads(resposta_limpa)
-                titulo = dados_ia.get('titulo', '')
-                resumo = dados_ia.get('resumo', '')
-                pontos = dados_ia.get('pontos', [])
-                if isinstance(pontos, list):
-                    pontos_str = '\n'.join(pontos)
-                else:
-                    pontos_str = str(pontos)
-            except Exception as e:
-                self.master.after(0, lambda: messagebox.showerror("Erro IA", f"A resposta da IA não está em formato JSON válido.\n\nResposta:\n{resposta}"))
-                return
+            self.master.after(0, lambda: self.status.config(text=f"{pasta}: processando IA...", fg="#1976D2"))
+            def ao_progresso(feitas, total):
+                self.master.after(0, lambda: self.status.config(text=f"{pasta}: IA resumindo partes da transcrição ({feitas}/{total})...", fg="#2196F3"))
+            dados_ia = resumir_transcricao(transcricao, gravacao_dir, ao_progresso=ao_progresso)
+            titulo = dados_ia.get('titulo', '')
+            resumo = dados_ia.get('resumo', '')
+            pontos = dados_ia.get('pontos', [])
             # Salva no banco de dados json
             with open(caminho_db, 'w', encoding='utf-8') as f:
                 json.dump({"titulo": titulo, "resumo": resumo, "pontos": pontos}, f, ensure_ascii=False, indent=2)
@@ -919,114 +1377,142 @@ Pergunta do usuário:
                 ajustar_permissao_usuario(caminho_db)
             except Exception as e:
                 print(f"[PERMISSAO] Falha ao ajustar permissão do json: {e}")
-            # Atualiza a grid e modal
+            # Atualiza o catálogo e a grid
+            self.catalogo.atualizar(pasta)
+            self.indice_busca.indexar_pasta(pasta)
             self.atualizar_titulo_grid(gravacao_dir, titulo)
-            self.master.after(0, lambda: messagebox.showinfo("IA", "Resumo, título e pontos principais gerados com sucesso!"))
+            self.master.after(0, lambda: self.status.config(text=f"{pasta}: resumo, título e pontos principais gerados com sucesso!", fg="#388E3C"))
         except Exception as e:
-            self.master.after(0, lambda: messagebox.showerror("Erro IA", f"Erro ao processar IA: {e}"))
-        finally:
-            self.master.after(0, lambda: self.ia_button.config(state=tk.NORMAL))
-            self.master.after(0, lambda: self.status.config(text="", fg="#555"))
-            self.master.after(0, lambda: self.tree.bind('<Button-1>', self.on_tree_click_detalhes))
+            print(f"[IA] Erro ao processar IA de {pasta}: {e}")
+            self.master.after(0, lambda err=e: self.status.config(text=f"{pasta}: erro ao processar IA: {err}", fg="#F44336"))
+            raise
 
     def atualizar_titulo_grid(self, gravacao_dir, titulo):
-        # Atualiza o título na grid para a linha correspondente ao diretório da gravação
-        # Busca a data/hora do primeiro bloco da gravação
-        files = [f for f in os.listdir(gravacao_dir) if f.endswith('.ogg')]
-        files.sort()
-        if not files:
-            return
-        path = os.path.join(gravacao_dir, files[0])
-        dt = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%d/%m/%Y %H:%M:%S')
-        for row in self.tree.get_children():
-            values = self.tree.item(row)['values']
-            if values[0] == dt:
-                self.tree.set(row, 'titulo', titulo)
-                break
+        # Atualiza o título na grid para a linha correspondente ao diretório da gravação (acesso direto pela pasta)
+        pasta = os.path.basename(os.path.normpath(gravacao_dir))
+        def aplicar():
+            registro = self.modelo.registros.get(pasta)
+            if registro is None:
+                self.atualizar_linha_grid(pasta)
+                return
+            self.modelo.atualizar(dict(registro, titulo=titulo))
+            self._renderizar_grid()
+        self.master.after(0, aplicar)
 
     def on_tree_select_anywhere(self, event):
         # Seleciona a linha clicada independentemente da coluna
         row_id = self.tree.identify_row(event.y)
         if row_id:
             self.tree.selection_set(row_id)
+            self._pasta_selecionada = row_id
 
     def capturar_print_monitor_mouse(self):
-        import pyautogui
-        from screeninfo import get_monitors
-        from datetime import datetime
-        import os
-        try:
-            x, y = pyautogui.position()
-            for m in get_monitors():
-                if m.x <= x < m.x + m.width and m.y <= y < m.y + m.height:
-                    region = (m.x, m.y, m.width, m.height)
-                    break
-            else:
-                print('[PRINT] Não foi possível identificar o monitor do mouse.')
-                self.status.config(text="Não foi possível identificar o monitor do mouse.", fg="#F44336")
+        # Roda na thread do Tk, mas só despacha: captura e gravação do PNG acontecem no CapturaTela
+        inicio = time.perf_counter()
+        grav_dir = self.get_selected_gravacao_dir()
+        if not grav_dir or not os.path.isdir(grav_dir):
+            print('[PRINT] Nenhuma gravação selecionada na grid para salvar o print.')
+            self.status.config(text="Nenhuma gravação selecionada para salvar o print.", fg="#F44336")
+            return
+        x, y = self.master.winfo_pointerxy()
+        futuro = self.captura_tela.capturar(x, y, grav_dir)
+        def ao_concluir(f):
+            try:
+                path = f.result()
+            except Exception as e:
+                print(f'[PRINT] Erro ao capturar print: {e}')
+                self.master.after(0, lambda err=e: self.status.config(text=f"Erro ao capturar print: {err}", fg="#F44336"))
+                return
+            print(f'[PRINT] Print salvo: {path} ({(time.perf_counter() - inicio) * 1000:.0f} ms desde o atalho)')
+            self.master.after(0, lambda: self._on_print_salvo(path, grav_dir))
+        futuro.add_done_callback(ao_concluir)
+
+    def _print_automatico(self):
+        # Mesmo caminho do Ctrl+Alt+M, mas só grava (e analisa) se a tela mudou desde o último print salvo
+        if not self.is_recording:
+            self._print_auto_job = None
+            return
+        grav_dir = self.gravacao_dir
+        x, y = self.master.winfo_pointerxy()
+        futuro = self.captura_tela.capturar(x, y, grav_dir, limiar_mudanca=PRINT_AUTO_LIMIAR)
+        def ao_concluir(f):
+            try:
+                path = f.result()
+            except Exception as e:
+                print(f'[PRINT] Erro no print automático: {e}')
                 return
-            img = pyautogui.screenshot(region=region)
-            grav_dir = self.get_selected_gravacao_dir()
-            if grav_dir and os.path.isdir(grav_dir):
-                ts = datetime.now().strftime('%H-%M-%S')
-                path = os.path.join(grav_dir, f'print_{ts}.png')
-                img.save(path)
-                print(f'[PRINT] Print salvo: {path}')
-                self._ultimo_print_path = path
+            if path is not None:
+                print(f'[PRINT] Print automático salvo: {path}')
+                self.master.after(0, lambda: self._on_print_salvo(path, grav_dir))
+        futuro.add_done_callback(ao_concluir)
+        self._print_auto_job = self.master.after(int(PRINT_AUTO_INTERVALO * 1000), self._print_automatico)
+
+    def _on_print_salvo(self, path, grav_dir):
+        # A miniatura fica pronta antes de a janela de detalhes precisar dela
+        agendar_miniatura(path)
+        self._ultimo_print_path = path
+        self.status.config(text="Print de tela capturado com sucesso!", fg="#388E3C")
+        # Iniciar análise IA em background, sem depender de interface de modal
+        def analisar_ia_em_bg():
+            import threading
+            def run_ia():
                 try:
-                    ajustar_permissao_usuario(path)
+                    self.status.config(text="Análise IA em andamento...", fg="#1976D2")
+                    md_path = path.replace('.png', '.md')
+                    if PRINT_DEDUP_DISTANCIA >= 0:
+                        original, distancia = registrar_print_repetido(path, self.output_dir)
+                        if original is not None:
+                            original_md = os.path.splitext(original)[0] + '.md'
+                            nome_original = os.path.basename(original)
+                            if PRINT_DEDUP_MODO == 'ignorar':
+                                print(f'[PRINT] {os.path.basename(path)} repete {nome_original} (distância {distancia}); análise ignorada.')
+                                self.master.after(0, lambda: self.status.config(text=f"Print repetido de {nome_original}: análise ignorada.", fg="#FF9800"))
+                                return
+                            if os.path.exists(original_md):
+                                with open(original_md, 'r', encoding='utf-8') as f:
+                                    analise = f.read()
+                                with open(md_path, 'w', encoding='utf-8') as f:
+                                    f.write(f"> Print repetido de `{nome_original}`: análise reaproveitada.\n\n{analise}")
+                                try:
+                                    ajustar_permissao_usuario(md_path)
+                                except Exception:
+                                    pass
+                                print(f'[PRINT] {os.path.basename(path)} repete {nome_original} (distância {distancia}); análise reaproveitada.')
+                                self.indice_busca.indexar_pasta(os.path.basename(os.path.normpath(grav_dir)))
+                                self.master.after(0, lambda: self.status.config(text=f"Print repetido de {nome_original}: análise reaproveitada.", fg="#388E3C"))
+                                return
+                    img_bytes, mime_type = preparar_upload_print(path)
+                    prompt = """Analise esta imagem e forneça uma análise detalhada em português do Brasil, incluindo:\n\n1. Um resumo conciso do conteúdo visual\n2. Se houver código de programação, desafio de código, questão de prova ou questionário:\n   - Extraia o código ou a questão exatamente como aparece\n   - Explique o que está sendo proposto/resolvido\n   - Identifique a linguagem de programação (se aplicável)\n   - Gere uma resposta objetiva para a questão/código/desafio, se possível, e inclua como um tópico final chamado 'Resposta Objetiva'\n3. Se houver texto ou mensagens de erro:\n   - Transcreva o texto exatamente como aparece\n   - Explique o significado ou contexto\n\nRetorne a resposta EXCLUSIVAMENTE em markdown bem formatado, com títulos, listas, blocos de código e destaques conforme apropriado. Não inclua explicações fora do markdown.\n\nExemplo de estrutura sugerida:\n\n# Resumo\n...\n\n# Código ou Questão Detectada\n```python\n...\n```\n\n## Explicação\n...\n\n## Resposta Objetiva\n...\n\n# Texto Detectado\n...\n\n# Mensagens de Erro\n...\n\nSe algum item não existir, omita a seção correspondente."""
+                    resposta = gerar_conteudo_ia(
+                        [
+                            {"text": prompt},
+                            {"inline_data": {"mime_type": mime_type, "data": img_bytes}},
+                        ],
+                        generation_config={
+                            "temperature": 0.1,
+                            "top_p": 0.8,
+                            "top_k": 40,
+                            "max_output_tokens": 2048,
+                        },
+                        prioridade=PRIORIDADE_FUNDO,
+                    )
+                    resposta_limpa = re.sub(r"^```[a-zA-Z]*\n?|```$", "", resposta, flags=re.MULTILINE).strip()
+                    with open(md_path, 'w', encoding='utf-8') as f:
+                        f.write(resposta_limpa)
+                    try:
+                        ajustar_permissao_usuario(md_path)
+                    except Exception:
+                        pass
+                    self.indice_busca.indexar_pasta(os.path.basename(os.path.normpath(grav_dir)))
+                    self.status.config(text="Análise IA concluída!", fg="#388E3C")
                 except Exception as e:
-                    print(f"[PERMISSAO] Não foi possível ajustar permissões do arquivo: {e}")
-                self.status.config(text="Print de tela capturado com sucesso!", fg="#388E3C")
-                # Iniciar análise IA em background, sem depender de interface de modal
-                def analisar_ia_em_bg():
-                    import threading
-                    def run_ia():
-                        try:
-                            self.status.config(text="Análise IA em andamento...", fg="#1976D2")
-                            api_key = os.environ.get("GEMINI_API_KEY") or GEMINI_API_KEY
-                            model = GEMINI_MODEL
-                            genai.configure(api_key=api_key)
-                            with open(path, 'rb') as f:
-                                img_bytes = f.read()
-                            prompt = """Analise esta imagem e forneça uma análise detalhada em português do Brasil, incluindo:\n\n1. Um resumo conciso do conteúdo visual\n2. Se houver código de programação, desafio de código, questão de prova ou questionário:\n   - Extraia o código ou a questão exatamente como aparece\n   - Explique o que está sendo proposto/resolvido\n   - Identifique a linguagem de programação (se aplicável)\n   - Gere uma resposta objetiva para a questão/código/desafio, se possível, e inclua como um tópico final chamado 'Resposta Objetiva'\n3. Se houver texto ou mensagens de erro:\n   - Transcreva o texto exatamente como aparece\n   - Explique o significado ou contexto\n\nRetorne a resposta EXCLUSIVAMENTE em markdown bem formatado, com títulos, listas, blocos de código e destaques conforme apropriado. Não inclua explicações fora do markdown.\n\nExemplo de estrutura sugerida:\n\n# Resumo\n...\n\n# Código ou Questão Detectada\n```python\n...\n```\n\n## Explicação\n...\n\n## Resposta Objetiva\n...\n\n# Texto Detectado\n...\n\n# Mensagens de Erro\n...\n\nSe algum item não existir, omita a seção correspondente."""
-                            model = genai.GenerativeModel(GEMINI_MODEL)
-                            response = model.generate_content(
-                                [
-                                    {"text": prompt},
-                                    {"inline_data": {"mime_type": "image/png", "data": img_bytes}},
-                                ],
-                                generation_config={
-                                    "temperature": 0.1,
-                                    "top_p": 0.8,
-                                    "top_k": 40,
-                                    "max_output_tokens": 2048,
-                                },
-                            )
-                            resposta = response.text.strip()
-                            resposta_limpa = re.sub(r"^```[a-zA-Z]*\n?|```$", "", resposta, flags=re.MULTILINE).strip()
-                            md_path = path.replace('.png', '.md')
-                            with open(md_path, 'w', encoding='utf-8') as f:
-                                f.write(resposta_limpa)
-                            try:
-                                ajustar_permissao_usuario(md_path)
-                            except Exception:
-                                pass
-                            self.status.config(text="Análise IA concluída!", fg="#388E3C")
-                        except Exception as e:
-                            print(f'[IA][BG] Erro ao analisar print automaticamente: {e}')
-                            msg = str(e)
-                            if len(msg) > 120:
-                                msg = msg[:120] + '...'
-                            self.status.config(text=f"Erro na análise IA: {msg}", fg="#F44336")
-                    threading.Thread(target=run_ia, daemon=True).start()
-                self.master.after(300, analisar_ia_em_bg)
-            else:
-                print('[PRINT] Nenhuma gravação selecionada na grid para salvar o print.')
-                self.status.config(text="Nenhuma gravação selecionada para salvar o print.", fg="#F44336")
-        except Exception as e:
-            print(f'[PRINT] Erro ao capturar print: {e}')
-            self.status.config(text=f"Erro ao capturar print: {e}", fg="#F44336")
+                    print(f'[IA][BG] Erro ao analisar print automaticamente: {e}')
+                    msg = str(e)
+                    if len(msg) > 120:
+                        msg = msg[:120] + '...'
+                    self.status.config(text=f"Erro na análise IA: {msg}", fg="#F44336")
+            threading.Thread(target=run_ia, daemon=True).start()
+        self.master.after(300, analisar_ia_em_bg)
 
     def _start_pynput_hotkey_listener(self):
         try:
@@ -1250,8 +1736,6 @@ Pergunta do usuário:
             set_resposta_markdown("Pesquisando... Aguarde a resposta da IA.")
             modal.update_idletasks()
             try:
-                with open(img_path, 'rb') as f:
-                    img_bytes = f.read()
                 prompt = f"""
 Use o conteúdo visual e textual do print abaixo como contexto principal para responder à pergunta do usuário. Se a resposta não estiver presente no print, utilize também seu conhecimento externo e realize uma pesquisa para fornecer uma resposta completa, clara e útil ao usuário. Sempre responda em português do Brasil e use markdown bem formatado.
 
@@ -1260,22 +1744,19 @@ Print de tela (imagem em anexo):
 Pergunta do usuário:
 {pergunta}
 """
-                import google.generativeai as genai
-                api_key = os.environ.get("GEMINI_API_KEY") or GEMINI_API_KEY
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel(GEMINI_MODEL)
                 def run_ia():
                     try:
-                        response = model.generate_content([
+                        # A versão reduzida do print é preparada fora da thread do Tk (e reaproveitada do cache)
+                        img_bytes, mime_type = preparar_upload_print(img_path)
+                        resposta = gerar_conteudo_ia([
                             {"text": prompt},
-                            {"inline_data": {"mime_type": "image/png", "data": img_bytes}},
+                            {"inline_data": {"mime_type": mime_type, "data": img_bytes}},
                         ], generation_config={
                             "temperature": 0.1,
                             "top_p": 0.8,
                             "top_k": 40,
                             "max_output_tokens": 2048,
-                        })
-                        resposta = response.text.strip()
+                        }, prioridade=PRIORIDADE_INTERATIVA)
                         modal.after(0, lambda: set_resposta_markdown(resposta))
                     except Exception as e:
                         modal.after(0, lambda: set_resposta_markdown(f"Erro ao consultar IA: {e}"))
@@ -1288,73 +1769,2710 @@ Pergunta do usuário:
                 btn_perguntar.config(state=tk.NORMAL)
         btn_perguntar.config(command=perguntar_ia_print)
 
-def ajustar_permissao_usuario(path):
-    try:
-        user = os.getenv("SUDO_USER") or getpass.getuser()
-        if user and user != "root":
-            import pwd
-            uid = pwd.getpwnam(user).pw_uid
-            gid = pwd.getpwnam(user).pw_gid
-            os.chown(path, uid, gid)
-    except Exception as e:
-        print(f"[PERMISSAO] Não foi possível ajustar permissões do arquivo: {e}")
+class ModeloGravacoes:
+    """
+    Modelo em memória da grid de gravações. Guarda as chaves de ordenação pré-calculadas (data, título, duração),
+    mantém uma ordem indexada por coluna, aplica filtros por título e período e localiza linhas pela pasta
+    via dicionário. A grid renderiza apenas a janela visível de visiveis().
+    """
+    COLUNAS = ('pasta', 'datahora', 'titulo', 'duracao')
+
+    def __init__(self):
+        self.registros = {}
+        self.ordem = ('pasta', True)
+        self.filtro_titulo = ''
+        self.filtro_inicio = None
+        self.filtro_fim = None
+        self._ordenados = {}
+        self._visiveis = None
+        self._posicoes = None
+
+    @staticmethod
+    def _segundos(duracao):
+        try:
+            h, m, s = (int(p) for p in str(duracao).split(':'))
+            return h * 3600 + m * 60 + s
+        except ValueError:
+            return -1
+
+    def _preparar(self, registro):
+        registro = dict(registro)
+        registro['_chaves'] = {
+            'pasta': registro['pasta'],
+            'datahora': (registro.get('datahora') or 0.0, registro['pasta']),
+            'titulo': ((registro.get('titulo') or '').lower(), registro['pasta']),
+            'duracao': (self._segundos(registro.get('duracao')), registro['pasta']),
+        }
+        return registro
+
+    def _chave(self, coluna):
+        registros = self.registros
+        return lambda pasta: registros[pasta]['_chaves'][coluna]
+
+    def _ordenados_por(self, coluna):
+        if coluna not in self._ordenados:
+            self._ordenados[coluna] = sorted(self.registros, key=self._chave(coluna))
+        return self._ordenados[coluna]
+
+    def _invalidar_visiveis(self):
+        self._visiveis = None
+        self._posicoes = None
+
+    def carregar(self, registros):
+        self.registros = {r['pasta']: self._preparar(r) for r in registros}
+        self._ordenados = {}
+        self._invalidar_visiveis()
+
+    def atualizar(self, registro):
+        pasta = registro['pasta']
+        antigo = self.registros.get(pasta)
+        novo = self._preparar(registro)
+        if antigo is not None and all(antigo.get(k) == novo.get(k) for k in ('datahora', 'titulo', 'duracao')):
+            # Nada que afete ordem ou filtros mudou: só troca os dados da linha
+            self.registros[pasta] = novo
+            return
+        # Reposiciona a pasta nas ordens já calculadas em vez de reordenar tudo
+        for coluna, lista in self._ordenados.items():
+            if antigo is not None:
+                pos = bisect.bisect_left(lista, antigo['_chaves'][coluna], key=self._chave(coluna))
+                if pos < len(lista) and lista[pos] == pasta:
+                    del lista[pos]
+                else:
+                    lista.remove(pasta)
+        self.registros[pasta] = novo
+        for coluna, lista in self._ordenados.items():
+            bisect.insort(lista, pasta, key=self._chave(coluna))
+        self._invalidar_visiveis()
+
+    def remover(self, pasta):
+        antigo = self.registros.get(pasta)
+        if antigo is None:
+            return
+        for coluna, lista in self._ordenados.items():
+            pos = bisect.bisect_left(lista, antigo['_chaves'][coluna], key=self._chave(coluna))
+            if pos < len(lista) and lista[pos] == pasta:
+                del lista[pos]
+            else:
+                lista.remove(pasta)
+        del self.registros[pasta]
+        self._invalidar_visiveis()
 
-def dividir_audio_em_blocos(caminho_wav, duracao_bloco_seg=240, min_silencio_ms=700, silencio_thresh_db=-40):
+    def definir_ordem(self, coluna):
+        col_atual, desc = self.ordem
+        self.ordem = (coluna, not desc) if coluna == col_atual else (coluna, coluna != 'titulo')
+        self._invalidar_visiveis()
+
+    def definir_filtro(self, titulo='', inicio=None, fim=None):
+        self.filtro_titulo = (titulo or '').strip().lower()
+        self.filtro_inicio = inicio
+        self.filtro_fim = fim
+        self._invalidar_visiveis()
+
+    def _passa_filtro(self, registro):
+        if self.filtro_titulo and self.filtro_titulo not in registro['_chaves']['titulo'][0]:
+            return False
+        datahora = registro.get('datahora') or 0.0
+        if self.filtro_inicio is not None and datahora < self.filtro_inicio:
+            return False
+        if self.filtro_fim is not None and datahora > self.filtro_fim:
+            return False
+        return True
+
+    def visiveis(self):
+        if self._visiveis is None:
+            coluna, desc = self.ordem
+            ordenados = self._ordenados_por(coluna)
+            if self.filtro_titulo or self.filtro_inicio is not None or self.filtro_fim is not None:
+                visiveis = [p for p in ordenados if self._passa_filtro(self.registros[p])]
+            else:
+                visiveis = list(ordenados)
+            if desc:
+                visiveis.reverse()
+            self._visiveis = visiveis
+        return self._visiveis
+
+    def posicao(self, pasta):
+        if self._posicoes is None:
+            self._posicoes = {p: i for i, p in enumerate(self.visiveis())}
+        return self._posicoes.get(pasta)
+
+    def __len__(self):
+        return len(self.visiveis())
+
+class CatalogoGravacoes:
     """
-    Divide um arquivo .wav em blocos de até 'duracao_bloco_seg' segundos, cortando preferencialmente nos silêncios.
-    Se o áudio for menor ou igual ao limite, retorna um único bloco.
-    Adiciona logs para depuração.
+    Índice persistente (SQLite em output/) com data, título, duração, status e número de blocos de cada gravação.
+    É atualizado incrementalmente a partir dos mtimes da pasta e dos JSONs; os arquivos de cada pasta
+    (gravacao_meta.json, gravacao_ia.json, blocos .ogg) continuam sendo a fonte da verdade para reconstruí-lo.
     """
-    audio = AudioSegment.from_wav(caminho_wav)
-    duracao_total = len(audio) / 1000  # em segundos
-    blocos = []
-    print(f"[DEBUG] Duração total do áudio: {duracao_total:.2f} segundos")
-    if duracao_total <= duracao_bloco_seg:
-        bloco_path = os.path.join(tempfile.gettempdir(), f"bloco_{os.path.basename(caminho_wav)}_0.wav")
-        audio.export(bloco_path, format="wav")
-        print(f"[DEBUG] Bloco único: início=0.00s, fim={duracao_total:.2f}s, duração={duracao_total:.2f}s, sem cortes")
-        blocos.append(bloco_path)
-        print(f"[DEBUG] Total de blocos gerados: 1")
-        return blocos
-    inicio = 0
-    bloco_idx = 0
-    while inicio < len(audio):
-        fim = min(inicio + duracao_bloco_seg * 1000, len(audio))
-        segmento = audio[inicio:fim]
-        # Tenta encontrar silêncio próximo ao final do bloco
-        sil = silence.detect_silence(segmento, min_silence_len=min_silencio_ms, silence_thresh=silencio_thresh_db)
-        corte = None
-        for s in reversed(sil):
-            # Procura silêncio nos últimos 30 segundos do bloco
-            if s[1] > len(segmento) - 30000:
-                corte = s[1]
+    ARQUIVO = 'catalogo.sqlite3'
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.caminho = os.path.join(output_dir, self.ARQUIVO)
+        existia = os.path.exists(self.caminho)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS gravacoes ('
+                ' pasta TEXT PRIMARY KEY,'
+                ' datahora REAL,'
+                ' titulo TEXT NOT NULL DEFAULT \'\','
+                ' duracao TEXT NOT NULL DEFAULT \'?\','
+                ' status TEXT NOT NULL DEFAULT \'\','
+                ' blocos INTEGER NOT NULL DEFAULT 0,'
+                ' assinatura TEXT NOT NULL DEFAULT \'\')'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_gravacoes_datahora ON gravacoes (datahora)')
+        if not existia:
+            try:
+                ajustar_permissao_usuario(self.caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão do catálogo: {e}")
+
+    def _assinatura(self, full_dir):
+        # mtime da pasta muda quando blocos/arquivos são criados ou removidos; os JSONs são reescritos no lugar
+        partes = []
+        for caminho in (full_dir, os.path.join(full_dir, 'gravacao_meta.json'), os.path.join(full_dir, 'gravacao_ia.json')):
+            try:
+                partes.append(str(os.stat(caminho).st_mtime_ns))
+            except OSError:
+                partes.append('-')
+        return ':'.join(partes)
+
+    def _ler_pasta(self, full_dir):
+        meta_path = os.path.join(full_dir, 'gravacao_meta.json')
+        blocos = [f for f in os.listdir(full_dir) if f.endswith('.ogg')]
+        blocos.sort()
+        # playlist só se houver blocos
+        playlist_path = os.path.join(full_dir, 'playlist.m3u')
+        if blocos and not os.path.exists(playlist_path):
+            with open(playlist_path, 'w', encoding='utf-8') as m3u:
+                m3u.write('#EXTM3U\n')
+                for bloco in blocos:
+                    m3u.write(f'{os.path.abspath(os.path.join(full_dir, bloco))}\n')
+            try:
+                ajustar_permissao_usuario(playlist_path)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão do playlist: {e}")
+        # Data/hora: se houver blocos, usa o primeiro bloco; senão, usa o meta.json
+        datahora = None
+        for candidato in ([os.path.join(full_dir, blocos[0])] if blocos else []) + [meta_path]:
+            try:
+                datahora = os.path.getmtime(candidato)
                 break
-        if corte:
-            bloco = segmento[:corte]
-            proximo_inicio = inicio + corte
-            motivo = f"corte por silêncio em {corte/1000:.2f}s do bloco"
+            except OSError:
+                continue
+        # Duração e status: lê do meta.json se existir, senão mostra '?'
+        duracao, status = '?', ''
+        if os.path.exists(meta_path):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                duracao = meta.get('duracao', '?')
+                status = meta.get('status', '')
+            except Exception:
+                pass
+        titulo = ''
+        caminho_db = os.path.join(full_dir, 'gravacao_ia.json')
+        if os.path.exists(caminho_db):
+            try:
+                with open(caminho_db, 'r', encoding='utf-8') as j:
+                    titulo = json.load(j).get('titulo', '') or ''
+            except Exception:
+                titulo = ''
+        return {"datahora": datahora, "titulo": titulo, "duracao": duracao, "status": status, "blocos": len(blocos)}
+
+    def _gravar(self, pasta, dados, assinatura):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO gravacoes (pasta, datahora, titulo, duracao, status, blocos, assinatura) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (pasta, dados['datahora'], dados['titulo'], dados['duracao'], dados['status'], dados['blocos'], assinatura),
+        )
+
+    def atualizar(self, pasta):
+        """Relê uma única pasta de gravação (ou remove do catálogo se ela não existir mais)."""
+        full_dir = os.path.join(self.output_dir, pasta)
+        with self._lock, self.conn:
+            if not os.path.isdir(full_dir):
+                self.conn.execute('DELETE FROM gravacoes WHERE pasta = ?', (pasta,))
+                return
+            dados = self._ler_pasta(full_dir)
+            # Assinatura calculada depois da leitura, que pode criar o playlist.m3u na pasta
+            self._gravar(pasta, dados, self._assinatura(full_dir))
+
+    def sincronizar(self):
+        """Aplica ao catálogo apenas as pastas novas, alteradas ou removidas. Retorna o conjunto de pastas afetadas."""
+        if not os.path.isdir(self.output_dir):
+            return set()
+        alteradas = set()
+        with self._lock, self.conn:
+            conhecidas = {row['pasta']: row['assinatura'] for row in self.conn.execute('SELECT pasta, assinatura FROM gravacoes')}
+            presentes = set()
+            with os.scandir(self.output_dir) as it:
+                for entry in it:
+                    if not entry.is_dir():
+                        continue
+                    presentes.add(entry.name)
+                    assinatura = self._assinatura(entry.path)
+                    if conhecidas.get(entry.name) == assinatura:
+                        continue
+                    try:
+                        dados = self._ler_pasta(entry.path)
+                        self._gravar(entry.name, dados, self._assinatura(entry.path))
+                    except Exception as e:
+                        print(f"[CATALOGO] Falha ao indexar {entry.name}: {e}")
+                        continue
+                    alteradas.add(entry.name)
+            removidas = set(conhecidas) - presentes
+            if removidas:
+                self.conn.executemany('DELETE FROM gravacoes WHERE pasta = ?', [(p,) for p in removidas])
+                alteradas |= removidas
+        if alteradas:
+            print(f"[CATALOGO] {len(alteradas)} gravações atualizadas no catálogo.")
+        return alteradas
+
+    def reconstruir(self):
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM gravacoes')
+        return self.sincronizar()
+
+    def obter(self, pasta):
+        with self._lock:
+            row = self.conn.execute('SELECT * FROM gravacoes WHERE pasta = ?', (pasta,)).fetchone()
+        return dict(row) if row else None
+
+    def listar(self):
+        with self._lock:
+            return [dict(row) for row in self.conn.execute('SELECT pasta, datahora, titulo, duracao, status, blocos FROM gravacoes ORDER BY pasta DESC')]
+
+class FilaTarefas:
+    """
+    Fila persistente (SQLite em output/) de transcrições e resumos, consumida por um pool de threads.
+    Tarefas saem por prioridade e ordem de chegada; o resumo de uma gravação só sai depois da transcrição
+    pendente da mesma gravação. Tarefas que estavam em execução quando o programa fechou voltam para a fila
+    ao iniciar. Tarefas concluídas são removidas; as que falharam ficam registradas até serem reenfileiradas.
+    """
+    ARQUIVO = 'tarefas.sqlite3'
+    TRANSCRICAO = 'transcricao'
+    RESUMO = 'resumo'
+    ROTULOS = {TRANSCRICAO: 'transcrição', RESUMO: 'resumo IA'}
+    EM_EXECUCAO = {TRANSCRICAO: 'Transcrevendo...', RESUMO: 'Resumindo com IA...'}
+
+    def __init__(self, output_dir, executores, workers=None, ao_alterar=None):
+        self.output_dir = output_dir
+        self.executores = executores
+        self.workers = workers or TAREFAS_WORKERS
+        self.ao_alterar = ao_alterar
+        os.makedirs(output_dir, exist_ok=True)
+        self.caminho = os.path.join(output_dir, self.ARQUIVO)
+        existia = os.path.exists(self.caminho)
+        self._lock = threading.RLock()
+        self._disponivel = threading.Condition(self._lock)
+        self._estados = defaultdict(dict)
+        self.conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS tarefas ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' pasta TEXT NOT NULL,'
+                ' tipo TEXT NOT NULL,'
+                ' prioridade INTEGER NOT NULL,'
+                ' estado TEXT NOT NULL DEFAULT \'pendente\','
+                ' erro TEXT,'
+                ' criada REAL,'
+                ' atualizada REAL)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tarefas_fila ON tarefas (estado, prioridade, id)')
+        if not existia:
+            try:
+                ajustar_permissao_usuario(self.caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão da fila de tarefas: {e}")
+
+    def iniciar(self):
+        with self._lock, self.conn:
+            retomadas = self.conn.execute("UPDATE tarefas SET estado = 'pendente' WHERE estado = 'executando'").rowcount
+            for pasta, tipo, estado, erro in self.conn.execute('SELECT pasta, tipo, estado, erro FROM tarefas'):
+                self._estados[pasta][tipo] = (estado, erro)
+            pendentes = self.pendentes()
+        if pendentes:
+            print(f"[TAREFAS] {pendentes} tarefas pendentes ({retomadas} retomadas após interrupção).")
+        for _ in range(self.workers):
+            threading.Thread(target=self._run, daemon=True).start()
+        for pasta in list(self._estados):
+            self._notificar(pasta)
+
+    def enfileirar(self, pasta, tipo, prioridade=PRIORIDADE_FUNDO):
+        """Adiciona a tarefa, a menos que a mesma já esteja na fila. Se já estiver, só eleva a prioridade."""
+        agora = time.time()
+        with self._lock, self.conn:
+            ativa = self.conn.execute(
+                "SELECT id, prioridade, estado FROM tarefas WHERE pasta = ? AND tipo = ? AND estado IN ('pendente', 'executando')",
+                (pasta, tipo),
+            ).fetchone()
+            if ativa:
+                if ativa[2] == 'pendente' and prioridade < ativa[1]:
+                    self.conn.execute('UPDATE tarefas SET prioridade = ?, atualizada = ? WHERE id = ?', (prioridade, agora, ativa[0]))
+                return False
+            self.conn.execute("DELETE FROM tarefas WHERE pasta = ? AND tipo = ? AND estado = 'erro'", (pasta, tipo))
+            self.conn.execute(
+                "INSERT INTO tarefas (pasta, tipo, prioridade, estado, criada, atualizada) VALUES (?, ?, ?, 'pendente', ?, ?)",
+                (pasta, tipo, prioridade, agora, agora),
+            )
+            self._estados[pasta][tipo] = ('pendente', None)
+            self._disponivel.notify()
+        self._notificar(pasta)
+        return True
+
+    def pendentes(self):
+        with self._lock:
+            return sum(1 for tipos in self._estados.values() for estado, _ in tipos.values() if estado in ('pendente', 'executando'))
+
+    def estado(self, pasta):
+        """Texto da coluna de tarefas da grid para a gravação."""
+        with self._lock:
+            tipos = dict(self._estados.get(pasta, {}))
+        for tipo, (estado, _) in tipos.items():
+            if estado == 'executando':
+                return self.EM_EXECUCAO[tipo]
+        na_fila = [self.ROTULOS[t] for t in (self.TRANSCRICAO, self.RESUMO) if tipos.get(t, ('',))[0] == 'pendente']
+        if na_fila:
+            return f"Na fila: {' + '.join(na_fila)}"
+        com_erro = [self.ROTULOS[t] for t in (self.TRANSCRICAO, self.RESUMO) if tipos.get(t, ('',))[0] == 'erro']
+        if com_erro:
+            return f"Erro: {' + '.join(com_erro)}"
+        return ''
+
+    def _notificar(self, pasta):
+        if self.ao_alterar:
+            try:
+                self.ao_alterar(pasta)
+            except Exception as e:
+                print(f"[TAREFAS] Falha ao notificar alteração de {pasta}: {e}")
+
+    def _proxima(self):
+        # Chamado com o lock: reserva a próxima tarefa liberada, respeitando a dependência resumo -> transcrição
+        row = self.conn.execute(
+            "SELECT id, pasta, tipo FROM tarefas AS t WHERE estado = 'pendente'"
+            " AND NOT (tipo = ? AND EXISTS (SELECT 1 FROM tarefas WHERE pasta = t.pasta AND tipo = ? AND estado IN ('pendente', 'executando')))"
+            " ORDER BY prioridade, id LIMIT 1",
+            (self.RESUMO, self.TRANSCRICAO),
+        ).fetchone()
+        if row is None:
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE tarefas SET estado = 'executando', atualizada = ? WHERE id = ?", (time.time(), row[0]))
+        self._estados[row[1]][row[2]] = ('executando', None)
+        return row
+
+    def _run(self):
+        while True:
+            with self._disponivel:
+                tarefa = self._proxima()
+                while tarefa is None:
+                    self._disponivel.wait()
+                    tarefa = self._proxima()
+            id_tarefa, pasta, tipo = tarefa
+            self._notificar(pasta)
+            gravacao_dir = os.path.join(self.output_dir, pasta)
+            inicio = time.perf_counter()
+            erro = None
+            try:
+                if not os.path.isdir(gravacao_dir):
+                    raise FileNotFoundError(f"Gravação {pasta} não existe mais.")
+                self.executores[tipo](gravacao_dir)
+            except Exception as e:
+                erro = str(e)[:400] or e.__class__.__name__
+            with self._disponivel, self.conn:
+                if erro is None or not os.path.isdir(gravacao_dir):
+                    self.conn.execute('DELETE FROM tarefas WHERE id = ?', (id_tarefa,))
+                    self._estados[pasta].pop(tipo, None)
+                    if not self._estados[pasta]:
+                        del self._estados[pasta]
+                else:
+                    self.conn.execute("UPDATE tarefas SET estado = 'erro', erro = ?, atualizada = ? WHERE id = ?", (erro, time.time(), id_tarefa))
+                    self._estados[pasta][tipo] = ('erro', erro)
+                    # Resumo depende da transcrição: se ela falhou, o resumo pendente também é marcado com erro
+                    if tipo == self.TRANSCRICAO and self._estados[pasta].get(self.RESUMO, ('',))[0] == 'pendente':
+                        self.conn.execute(
+                            "UPDATE tarefas SET estado = 'erro', erro = ?, atualizada = ? WHERE pasta = ? AND tipo = ? AND estado = 'pendente'",
+                            ("Transcrição falhou.", time.time(), pasta, self.RESUMO),
+                        )
+                        self._estados[pasta][self.RESUMO] = ('erro', "Transcrição falhou.")
+                # Um resumo que aguardava esta transcrição pode ter sido liberado
+                self._disponivel.notify_all()
+            print(f"[TAREFAS] Tarefa de {self.ROTULOS[tipo]} de {pasta} {'concluída' if erro is None else 'falhou: ' + erro} em {time.perf_counter() - inicio:.1f}s.")
+            self._notificar(pasta)
+
+class CapturaTela:
+    """
+    Serviço de captura de prints fora da thread do Tk. Uma thread dedicada faz a captura (mss, se instalado,
+    com o layout de monitores em cache; senão pyautogui + screeninfo) e um pool separado converte e grava o PNG
+    com compress_level configurável. Os nomes print_%Y%m%d-%H-%M-%S-%f.png são gerados na thread de captura,
+    estritamente crescentes (inclusive ao passar da meia-noite), e o PNG é publicado com os.link sobre o .tmp
+    criado com O_EXCL: a criação do nome final é atômica e um print existente nunca é sobrescrito.
+    """
+
+    def __init__(self, compressao=None, ttl_monitores=None, recortar_janela=None):
+        self.compressao = PRINT_COMPRESSAO if compressao is None else compressao
+        self.recortar_janela = PRINT_RECORTAR_JANELA if recortar_janela is None else recortar_janela
+        self.ttl_monitores = PRINT_MONITORES_TTL if ttl_monitores is None else ttl_monitores
+        # mss guarda recursos do X por thread: toda captura acontece sempre na mesma thread
+        self._captura = ThreadPoolExecutor(max_workers=1, thread_name_prefix='captura-tela')
+        self._codificacao = ThreadPoolExecutor(max_workers=2, thread_name_prefix='codificacao-png')
+        self._mss = None
+        self._monitores = []
+        self._monitores_lidos = 0.0
+        self._ultimo_nome = None
+        self._referencia = None
+        self._captura.submit(self._preparar)
+
+    def _preparar(self):
+        try:
+            import mss
+            self._mss = mss.mss()
+        except ImportError:
+            print('[PRINT] mss não instalado; usando pyautogui para capturar a tela.')
+        except Exception as e:
+            print(f'[PRINT] Falha ao iniciar o mss, usando pyautogui: {e}')
+        self._atualizar_monitores()
+
+    def _atualizar_monitores(self):
+        if self._mss is not None:
+            # monitors[0] é a área virtual inteira; os demais são os monitores físicos
+            self._monitores = [(m['left'], m['top'], m['width'], m['height']) for m in self._mss.monitors[1:]]
         else:
-            bloco = segmento
-            proximo_inicio = fim
-            motivo = "corte por tempo máximo"
-        bloco_path = os.path.join(tempfile.gettempdir(), f"bloco_{os.path.basename(caminho_wav)}_{bloco_idx}.wav")
-        bloco.export(bloco_path, format="wav")
-        print(f"[DEBUG] Bloco {bloco_idx+1}: início={inicio/1000:.2f}s, fim={proximo_inicio/1000:.2f}s, duração={(proximo_inicio-inicio)/1000:.2f}s, {motivo}")
-        blocos.append(bloco_path)
-        inicio = proximo_inicio
-        bloco_idx += 1
-    print(f"[DEBUG] Total de blocos gerados: {len(blocos)}")
-    return blocos
+            from screeninfo import get_monitors
+            self._monitores = [(m.x, m.y, m.width, m.height) for m in get_monitors()]
+        self._monitores_lidos = time.monotonic()
 
-def main():
-    output_dir = "output"
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename_mic = os.path.join(output_dir, f"mic_{timestamp}.wav")
-    os.makedirs(output_dir, exist_ok=True)
-    mic_device = get_default_source()
-    run_pipeline(mic_device, filename_mic)
+    def _monitor_em(self, x, y):
+        for mx, my, largura, altura in self._monitores:
+            if mx <= x < mx + largura and my <= y < my + altura:
+                return (mx, my, largura, altura)
+        return None
+
+    def _proximo_nome(self, agora):
+        # Relógio voltou ou dois prints no mesmo microssegundo: avança 1 µs para manter a ordem
+        if self._ultimo_nome is not None and agora <= self._ultimo_nome:
+            agora = self._ultimo_nome + timedelta(microseconds=1)
+        self._ultimo_nome = agora
+        return f"print_{agora.strftime('%Y%m%d-%H-%M-%S-%f')}.png"
+
+    @staticmethod
+    def assinatura(quadro, largura=160, altura=90):
+        """Versão reduzida em tons de cinza (amostragem por passos, sem reamostrar a imagem inteira) para comparar quadros."""
+        if isinstance(quadro, tuple):
+            (w, h), bgra = quadro
+            pixels = np.frombuffer(bgra, dtype=np.uint8).reshape(h, w, 4)
+        else:
+            pixels = np.asarray(quadro.convert('RGB'))
+            h, w = pixels.shape[:2]
+        passo_y, passo_x = max(1, h // altura), max(1, w // largura)
+        amostra = pixels[::passo_y, ::passo_x, :3][:altura, :largura].astype(np.uint16)
+        return (amostra.sum(axis=2) // 3).astype(np.int16)
+
+    @staticmethod
+    def mudanca(anterior, atual, tolerancia=24):
+        """Fração dos pontos amostrados que mudaram mais que a tolerância (ignora ruído de compressão e cursor)."""
+        if anterior is None or anterior.shape != atual.shape:
+            return 1.0
+        return float(np.count_nonzero(np.abs(atual - anterior) > tolerancia)) / atual.size
+
+    def reiniciar_referencia(self):
+        self._captura.submit(lambda: setattr(self, '_referencia', None))
+
+    def capturar(self, x, y, gravacao_dir, limiar_mudanca=None):
+        """
+        Captura o monitor que contém (x, y) e grava em gravacao_dir. Devolve um Future com o caminho do PNG.
+        Com limiar_mudanca, o quadro só é gravado se mudou além do limiar em relação ao último print salvo
+        (o Future resolve para None quando nada mudou).
+        """
+        resultado = concurrent.futures.Future()
+        def capturar():
+            try:
+                inicio = time.perf_counter()
+                regiao = self._monitor_em(x, y)
+                if regiao is None or time.monotonic() - self._monitores_lidos > self.ttl_monitores:
+                    # Layout desatualizado ou monitor desconhecido (monitor conectado/removido): relê
+                    self._atualizar_monitores()
+                    regiao = self._monitor_em(x, y)
+                if regiao is None:
+                    raise RuntimeError("Não foi possível identificar o monitor do mouse.")
+                mx, my, largura, altura = regiao
+                if self._mss is not None:
+                    bruto = self._mss.grab({"left": mx, "top": my, "width": largura, "height": altura})
+                    quadro = (bruto.size, bruto.bgra)
+                else:
+                    import pyautogui
+                    quadro = pyautogui.screenshot(region=regiao)
+                assinatura = self.assinatura(quadro)
+                if limiar_mudanca is not None:
+                    mudou = self.mudanca(self._referencia, assinatura)
+                    if mudou < limiar_mudanca:
+                        resultado.set_result(None)
+                        return
+                    print(f"[PRINT] Tela mudou {mudou * 100:.1f}% desde o último print.")
+                self._referencia = assinatura
+                nome = self._proximo_nome(datetime.now())
+                capturado_ms = (time.perf_counter() - inicio) * 1000
+                # A janela ativa é registrada no momento do print; o recorte só é aplicado na versão enviada à IA
+                janela = janela_ativa() if self.recortar_janela else None
+                if janela is not None:
+                    jx, jy, jl, ja = janela
+                    x0, y0 = max(jx, mx), max(jy, my)
+                    x1, y1 = min(jx + jl, mx + largura), min(jy + ja, my + altura)
+                    janela = (x0 - mx, y0 - my, x1 - mx, y1 - my) if x1 > x0 and y1 > y0 else None
+                self._codificacao.submit(self._gravar, quadro, os.path.join(gravacao_dir, nome), capturado_ms, resultado, janela)
+            except Exception as e:
+                resultado.set_exception(e)
+        self._captura.submit(capturar)
+        return resultado
+
+    def _gravar(self, quadro, caminho, capturado_ms, resultado, janela=None):
+        try:
+            from PIL import Image
+            inicio = time.perf_counter()
+            if isinstance(quadro, tuple):
+                tamanho, bgra = quadro
+                img = Image.frombuffer('RGB', tamanho, bgra, 'raw', 'BGRX', 0, 1)
+            else:
+                img = quadro
+            # O nome final só aparece com o arquivo completo; os.link falha atomicamente (FileExistsError) se ele
+            # já existir, ao contrário do os.replace, que sobrescreveria um print criado nesse meio tempo
+            tmp_path = caminho + '.tmp'
+            with open(tmp_path, 'xb') as f:
+                img.save(f, format='PNG', compress_level=self.compressao)
+            try:
+                os.link(tmp_path, caminho)
+            finally:
+                os.unlink(tmp_path)
+            try:
+                ajustar_permissao_usuario(caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Não foi possível ajustar permissões do arquivo: {e}")
+            if janela is not None:
+                pasta_upload = criar_pasta_cache(os.path.dirname(caminho), 'upload')
+                with open(os.path.join(pasta_upload, os.path.splitext(os.path.basename(caminho))[0] + '.janela.json'), 'w', encoding='utf-8') as f:
+                    json.dump({"caixa": list(janela)}, f)
+            print(f"[PRINT] Captura {capturado_ms:.0f} ms, PNG (compressão {self.compressao}) {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+            resultado.set_result(caminho)
+        except Exception as e:
+            resultado.set_exception(e)
+
+def janela_ativa():
+    """Retângulo (x, y, largura, altura) da janela em foco no X11, via xdotool; None se indisponível."""
+    try:
+        saida = subprocess.run(['xdotool', 'getactivewindow', 'getwindowgeometry', '--shell'],
+                               capture_output=True, text=True, timeout=1).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    valores = dict(linha.split('=', 1) for linha in saida.splitlines() if '=' in linha)
+    try:
+        return int(valores['X']), int(valores['Y']), int(valores['WIDTH']), int(valores['HEIGHT'])
+    except (KeyError, ValueError):
+        return None
+
+FORMATOS_UPLOAD = {'jpeg': ('JPEG', 'image/jpeg', '.jpg'), 'webp': ('WEBP', 'image/webp', '.webp'), 'png': ('PNG', 'image/png', '.png')}
+
+def preparar_upload_print(img_path, lado_max=None, formato=None, qualidade=None):
+    """
+    Versão do print enviada à IA: recortada na janela ativa registrada na captura (se houver), reduzida para
+    lado_max e recodificada em JPEG/WebP. Fica em .cache/upload, com as configurações no nome e invalidada pelo
+    mtime do original, que continua intacto. Retorna (bytes, mime_type).
+    """
+    from PIL import Image
+    lado_max = lado_max or PRINT_UPLOAD_LADO_MAX
+    formato = formato or PRINT_UPLOAD_FORMATO
+    qualidade = qualidade or PRINT_UPLOAD_QUALIDADE
+    formato_pil, mime_type, extensao = FORMATOS_UPLOAD.get(formato, FORMATOS_UPLOAD['jpeg'])
+    inicio = time.perf_counter()
+    gravacao_dir, nome = os.path.split(img_path)
+    base = os.path.splitext(nome)[0]
+    caminho_janela = os.path.join(gravacao_dir, '.cache', 'upload', base + '.janela.json')
+    caixa = None
+    if PRINT_RECORTAR_JANELA and os.path.exists(caminho_janela):
+        with open(caminho_janela, 'r', encoding='utf-8') as f:
+            caixa = tuple(json.load(f)['caixa'])
+    sufixo = f"{lado_max}-q{qualidade}" + ('-janela' if caixa else '')
+    destino = os.path.join(gravacao_dir, '.cache', 'upload', f"{base}.{sufixo}{extensao}")
+    tamanho_original = os.path.getsize(img_path)
+    try:
+        em_cache = os.path.getmtime(destino) >= os.path.getmtime(img_path)
+    except OSError:
+        em_cache = False
+    if not em_cache:
+        with Image.open(img_path) as img:
+            if caixa:
+                img = img.crop(caixa)
+            img.thumbnail((lado_max, lado_max), Image.LANCZOS)
+            if formato_pil != 'PNG' and img.mode != 'RGB':
+                img = img.convert('RGB')
+            criar_pasta_cache(gravacao_dir, 'upload')
+            tmp_path = destino + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                if formato_pil == 'PNG':
+                    img.save(f, format='PNG', optimize=True)
+                else:
+                    img.save(f, format=formato_pil, quality=qualidade)
+            os.replace(tmp_path, destino)
+        try:
+            ajustar_permissao_usuario(destino)
+        except Exception as e:
+            print(f"[PERMISSAO] Falha ao ajustar permissão da versão de upload: {e}")
+    with open(destino, 'rb') as f:
+        dados = f.read()
+    print(f"[PRINT] Upload de {nome}: {len(dados) / 1024:.0f} KB em vez de {tamanho_original / 1024:.0f} KB "
+          f"({100 * (1 - len(dados) / max(1, tamanho_original)):.0f}% menor, {'cache' if em_cache else 'gerado'} em {(time.perf_counter() - inicio) * 1000:.0f} ms).")
+    return dados, mime_type
+
+def dhash_imagem(img_path, lado=8):
+    """Hash perceptual (dHash) de 64 bits: gradiente horizontal da imagem reduzida a (lado+1)x lado em tons de cinza."""
+    from PIL import Image
+    with Image.open(img_path) as img:
+        img.draft('L', (lado * 8, lado * 8))
+        pequena = np.asarray(img.convert('L').resize((lado + 1, lado), Image.BILINEAR), dtype=np.int16)
+    bits = (pequena[:, 1:] > pequena[:, :-1]).ravel()
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+class IndiceHashPrints:
+    """
+    dHash dos prints de uma gravação em .cache/hashes.json (recalculado só quando o mtime muda), com o print
+    original de cada repetido. Permite achar o print mais próximo dentro de uma distância de Hamming.
+    """
+    ARQUIVO = 'hashes.json'
+
+    def __init__(self, gravacao_dir):
+        self.gravacao_dir = gravacao_dir
+        self.caminho = os.path.join(gravacao_dir, '.cache', self.ARQUIVO)
+        self.prints = {}
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    self.prints = json.load(f).get('prints', {})
+            except Exception as e:
+                print(f"[PRINT] Índice de hashes ilegível, será recriado: {e}")
+
+    def hash_de(self, img_path):
+        nome = os.path.basename(img_path)
+        mtime = os.path.getmtime(img_path)
+        entrada = self.prints.get(nome)
+        if entrada and entrada.get('mtime') == mtime:
+            return int(entrada['hash'], 16)
+        valor = dhash_imagem(img_path)
+        self.prints[nome] = {"hash": f"{valor:016x}", "mtime": mtime, "original": (entrada or {}).get('original')}
+        return valor
+
+    def mais_proximo(self, valor, distancia_max, ignorar=None):
+        """(nome, distância) do print indexado mais parecido dentro de distancia_max, priorizando originais."""
+        melhor = None
+        for nome, entrada in self.prints.items():
+            if nome == ignorar or not os.path.exists(os.path.join(self.gravacao_dir, nome)):
+                continue
+            distancia = bin(valor ^ int(entrada['hash'], 16)).count('1')
+            if distancia <= distancia_max and (melhor is None or distancia < melhor[1]):
+                melhor = (entrada.get('original') or nome, distancia)
+        return melhor
+
+    def marcar_repetido(self, img_path, original):
+        self.prints[os.path.basename(img_path)]['original'] = original
+
+    def duplicatas(self):
+        """{print repetido: print original} dos prints desta gravação."""
+        return {nome: e['original'] for nome, e in self.prints.items() if e.get('original') and '/' not in e['original']}
+
+    def salvar(self):
+        existia = os.path.exists(self.caminho)
+        criar_pasta_cache(self.gravacao_dir)
+        tmp_path = self.caminho + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"prints": self.prints}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.caminho)
+        if not existia:
+            try:
+                ajustar_permissao_usuario(self.caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão do índice de hashes: {e}")
+
+_indice_hash_lock = threading.Lock()
+
+def registrar_print_repetido(img_path, output_dir=None, distancia_max=None, global_=None):
+    """
+    Indexa o dHash do print recém-capturado e procura um print anterior parecido, na mesma gravação ou,
+    com PRINT_DEDUP_GLOBAL, em todas as gravações de output_dir. Retorna (caminho do original, distância) ou (None, None).
+    """
+    distancia_max = PRINT_DEDUP_DISTANCIA if distancia_max is None else distancia_max
+    global_ = PRINT_DEDUP_GLOBAL if global_ is None else global_
+    gravacao_dir = os.path.dirname(img_path)
+    nome = os.path.basename(img_path)
+    with _indice_hash_lock:
+        indice = IndiceHashPrints(gravacao_dir)
+        # Prints anteriores ao índice (ou alterados) entram nele antes da comparação
+        for existente in sorted(os.listdir(gravacao_dir)):
+            if existente.startswith('print_') and existente.endswith('.png') and existente != nome:
+                try:
+                    indice.hash_de(os.path.join(gravacao_dir, existente))
+                except Exception as e:
+                    print(f"[PRINT] Falha ao calcular hash de {existente}: {e}")
+        valor = indice.hash_de(img_path)
+        achado = indice.mais_proximo(valor, distancia_max, ignorar=nome)
+        original = os.path.join(gravacao_dir, achado[0]) if achado else None
+        if achado is None and global_ and output_dir and os.path.isdir(output_dir):
+            with os.scandir(output_dir) as it:
+                outras = [e.path for e in it if e.is_dir() and os.path.abspath(e.path) != os.path.abspath(gravacao_dir)]
+            for outra in outras:
+                if not os.path.exists(os.path.join(outra, '.cache', IndiceHashPrints.ARQUIVO)):
+                    continue
+                candidato = IndiceHashPrints(outra).mais_proximo(valor, distancia_max)
+                if candidato and (achado is None or candidato[1] < achado[1]):
+                    achado, original = candidato, os.path.join(outra, candidato[0])
+        if achado is not None:
+            # Na mesma gravação guarda só o nome; de outra gravação, o caminho relativo (agrupado só na origem)
+            relativo = achado[0] if os.path.dirname(original) == gravacao_dir else os.path.relpath(original, gravacao_dir)
+            indice.marcar_repetido(img_path, relativo)
+        indice.salvar()
+    return (original, achado[1]) if achado else (None, None)
+
+def criar_pasta_cache(gravacao_dir, *partes):
+    """Cria <gravacao>/.cache/<partes...> ajustando o dono de cada nível criado (o programa pode rodar com sudo)."""
+    caminho = os.path.join(gravacao_dir, '.cache')
+    for parte in (None,) + partes:
+        if parte is not None:
+            caminho = os.path.join(caminho, parte)
+        if not os.path.isdir(caminho):
+            os.makedirs(caminho, exist_ok=True)
+            try:
+                ajustar_permissao_usuario(caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão do diretório de cache: {e}")
+    return caminho
+
+def caminho_miniatura(img_path):
+    pasta, nome = os.path.split(img_path)
+    return os.path.join(pasta, '.cache', 'thumbs', os.path.splitext(nome)[0] + '.png')
+
+def gerar_miniatura(img_path, carregar=False, tamanho=MINIATURA_TAMANHO):
+    """
+    Garante a miniatura do print em .cache/thumbs, regerando-a se o print for mais novo que ela.
+    Com carregar=True devolve a imagem PIL já decodificada (pronta para virar PhotoImage na thread do Tk).
+    """
+    from PIL import Image
+    destino = caminho_miniatura(img_path)
+    try:
+        valida = os.path.getmtime(destino) >= os.path.getmtime(img_path)
+    except OSError:
+        valida = False
+    if valida and carregar:
+        with Image.open(destino) as miniatura:
+            miniatura.load()
+            return miniatura.copy()
+    if valida:
+        return destino
+    inicio = time.perf_counter()
+    with Image.open(img_path) as img:
+        img.thumbnail(tamanho, reducing_gap=2.0)
+        miniatura = img.convert('RGB') if img.mode not in ('RGB', 'RGBA') else img.copy()
+    criar_pasta_cache(os.path.dirname(img_path), 'thumbs')
+    tmp_path = destino + '.tmp'
+    miniatura.save(tmp_path, format='PNG')
+    os.replace(tmp_path, destino)
+    try:
+        ajustar_permissao_usuario(destino)
+    except Exception as e:
+        print(f"[PERMISSAO] Falha ao ajustar permissão da miniatura: {e}")
+    print(f"[PRINT] Miniatura gerada para {os.path.basename(img_path)} em {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+    return miniatura if carregar else destino
+
+_pool_miniaturas = None
+_pool_miniaturas_lock = threading.Lock()
+
+def agendar_miniatura(img_path, carregar=False):
+    """Gera (ou lê do cache) a miniatura em um pool de threads; devolve um Future."""
+    global _pool_miniaturas
+    with _pool_miniaturas_lock:
+        if _pool_miniaturas is None:
+            _pool_miniaturas = ThreadPoolExecutor(max_workers=MINIATURA_WORKERS, thread_name_prefix='miniaturas')
+    return _pool_miniaturas.submit(gerar_miniatura, img_path, carregar)
+
+class IndiceTrechos:
+    """
+    Índice BM25 local (sem serviços externos) dos trechos de uma transcrição.
+    Cada linha do gravacao.txt é um bloco de RECORD_BLOCK_SECONDS; os blocos são quebrados em trechos
+    de ~IA_PERGUNTA_PALAVRAS_TRECHO palavras com referência de bloco e tempo. O tempo vem do início real
+    da fala em que o trecho começa quando 'falas_por_bloco' ({número do bloco: [(início em s, texto)]},
+    ver CacheTranscricao.falas_por_bloco) corresponde ao texto da linha; senão é estimado pela posição da palavra.
+    """
+    K1 = 1.5
+    B = 0.75
+    STOPWORDS = frozenset(
+        'a o e de da do das dos em no na nos nas um uma uns umas que se por para com como ao aos as os ou '
+        'mais mas foi ser ter tem esta este isso isto ele ela eles elas eu voce nao sim ja entao la aqui'.split()
+    )
+
+    def __init__(self, transcricao, palavras_por_trecho=None, segundos_bloco=RECORD_BLOCK_SECONDS, falas_por_bloco=None):
+        palavras_por_trecho = palavras_por_trecho or IA_PERGUNTA_PALAVRAS_TRECHO
+        sobreposicao = palavras_por_trecho // 6
+        falas_por_bloco = falas_por_bloco or {}
+        self.trechos = []
+        self.tamanho_total = len(transcricao)
+        for numero_bloco, linha in enumerate(transcricao.splitlines(), start=1):
+            palavras = linha.split()
+            if not palavras:
+                continue
+            instantes = self.instantes_palavras(palavras, falas_por_bloco.get(numero_bloco))
+            passo = max(1, palavras_por_trecho - sobreposicao)
+            for inicio in range(0, len(palavras), passo):
+                fatia = palavras[inicio:inicio + palavras_por_trecho]
+                if instantes:
+                    segundos = int((numero_bloco - 1) * segundos_bloco + instantes[inicio])
+                    aproximado = ''
+                else:
+                    # Tempo aproximado: proporcional à posição da palavra dentro do bloco
+                    segundos = int((numero_bloco - 1) * segundos_bloco + segundos_bloco * inicio / len(palavras))
+                    aproximado = '~'
+                self.trechos.append({
+                    "texto": ' '.join(fatia),
+                    "referencia": f"Bloco {numero_bloco}, {aproximado}{formatar_instante(segundos)}",
+                })
+                if inicio + palavras_por_trecho >= len(palavras):
+                    break
+        self._freqs = []
+        self._df = defaultdict(int)
+        for trecho in self.trechos:
+            freqs = defaultdict(int)
+            for termo in self.tokenizar(trecho["texto"]):
+                freqs[termo] += 1
+            self._freqs.append((freqs, sum(freqs.values())))
+            for termo in freqs:
+                self._df[termo] += 1
+        self._media = (sum(t for _, t in self._freqs) / len(self._freqs)) if self._freqs else 0.0
+
+    @staticmethod
+    def instantes_palavras(palavras, falas):
+        """
+        Instante (s, dentro do bloco) do início da fala de cada palavra da linha, ou None se as falas não
+        reproduzem o texto da linha (cache de outra transcrição, falas com erro descartadas etc.).
+        """
+        if not falas:
+            return None
+        instantes, palavras_falas = [], []
+        for inicio, texto in falas:
+            for palavra in (texto or '').split():
+                palavras_falas.append(palavra)
+                instantes.append(inicio)
+        return instantes if palavras_falas == palavras else None
+
+    @classmethod
+    def tokenizar(cls, texto):
+        texto = unicodedata.normalize('NFKD', texto.lower())
+        texto = ''.join(c for c in texto if not unicodedata.combining(c))
+        return [t for t in re.findall(r'\w+', texto) if t not in cls.STOPWORDS and len(t) > 1]
+
+    def consultar(self, pergunta, k=6):
+        """Os k trechos mais relevantes para a pergunta, devolvidos em ordem cronológica."""
+        if len(self.trechos) <= k:
+            return list(self.trechos)
+        n = len(self.trechos)
+        termos = set(self.tokenizar(pergunta))
+        pontuacoes = []
+        for idx, (freqs, tamanho) in enumerate(self._freqs):
+            pontuacao = 0.0
+            for termo in termos:
+                tf = freqs.get(termo)
+                if not tf:
+                    continue
+                df = self._df[termo]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                pontuacao += idf * tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * tamanho / self._media))
+            pontuacoes.append((pontuacao, idx))
+        melhores = sorted(pontuacoes, key=lambda p: (-p[0], p[1]))[:k]
+        return [self.trechos[idx] for _, idx in sorted(melhores, key=lambda p: p[1])]
+
+class IndiceBusca:
+    """
+    Índice invertido (SQLite FTS5, no mesmo arquivo do catálogo) sobre gravacao.txt, título/resumo/pontos do
+    gravacao_ia.json e as análises print_*.md de cada gravação. Cada arquivo é reindexado só quando seu mtime muda.
+    Sem FTS5 disponível, cai para uma busca simples por LIKE.
+    """
+    TIPOS = {'gravacao.txt': 'transcrição', 'gravacao_ia.json': 'resumo'}
+
+    def __init__(self, catalogo):
+        self.output_dir = catalogo.output_dir
+        self.conn = catalogo.conn
+        self._lock = catalogo._lock
+        self.fts = True
+        with self._lock, self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS busca_documentos ('
+                ' id INTEGER PRIMARY KEY,'
+                ' arquivo TEXT UNIQUE NOT NULL,'
+                ' pasta TEXT NOT NULL,'
+                ' mtime INTEGER NOT NULL)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_busca_documentos_pasta ON busca_documentos (pasta)')
+            try:
+                self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS busca USING fts5(titulo, conteudo, pasta UNINDEXED, tipo UNINDEXED, tokenize='unicode61 remove_diacritics 2')")
+            except sqlite3.OperationalError as e:
+                print(f"[BUSCA] FTS5 indisponível ({e}), usando busca simples.")
+                self.fts = False
+                self.conn.execute('CREATE TABLE IF NOT EXISTS busca_simples (rowid INTEGER PRIMARY KEY, titulo TEXT, conteudo TEXT, pasta TEXT, tipo TEXT)')
+
+    @property
+    def _tabela(self):
+        return 'busca' if self.fts else 'busca_simples'
+
+    def _documentos(self, full_dir):
+        try:
+            nomes = os.listdir(full_dir)
+        except OSError:
+            return []
+        return [n for n in nomes if n in self.TIPOS or (n.startswith('print_') and n.endswith('.md'))]
+
+    def _extrair(self, caminho, nome):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            conteudo = f.read()
+        if nome == 'gravacao_ia.json':
+            dados = json.loads(conteudo)
+            pontos = dados.get('pontos', [])
+            pontos = '\n'.join(str(p) for p in pontos) if isinstance(pontos, list) else str(pontos)
+            return dados.get('titulo', ''), f"{dados.get('resumo', '')}\n{pontos}"
+        return '', conteudo
+
+    def indexar_pasta(self, pasta):
+        """Reindexa os documentos novos ou alterados de uma gravação e remove os que sumiram."""
+        full_dir = os.path.join(self.output_dir, pasta)
+        nomes = self._documentos(full_dir)
+        with self._lock, self.conn:
+            indexados = {row[0]: (row[1], row[2]) for row in self.conn.execute('SELECT arquivo, id, mtime FROM busca_documentos WHERE pasta = ?', (pasta,))}
+            presentes = set()
+            for nome in nomes:
+                arquivo = f"{pasta}/{nome}"
+                presentes.add(arquivo)
+                caminho = os.path.join(full_dir, nome)
+                try:
+                    mtime = os.stat(caminho).st_mtime_ns
+                except OSError:
+                    continue
+                anterior = indexados.get(arquivo)
+                if anterior and anterior[1] == mtime:
+                    continue
+                try:
+                    titulo, conteudo = self._extrair(caminho, nome)
+                except Exception as e:
+                    print(f"[BUSCA] Falha ao ler {arquivo}: {e}")
+                    continue
+                if anterior:
+                    self.conn.execute(f'DELETE FROM {self._tabela} WHERE rowid = ?', (anterior[0],))
+                    self.conn.execute('UPDATE busca_documentos SET mtime = ? WHERE id = ?', (mtime, anterior[0]))
+                    doc_id = anterior[0]
+                else:
+                    doc_id = self.conn.execute('INSERT INTO busca_documentos (arquivo, pasta, mtime) VALUES (?, ?, ?)', (arquivo, pasta, mtime)).lastrowid
+                tipo = self.TIPOS.get(nome, 'print')
+                self.conn.execute(f'INSERT INTO {self._tabela} (rowid, titulo, conteudo, pasta, tipo) VALUES (?, ?, ?, ?, ?)', (doc_id, titulo, conteudo, pasta, tipo))
+            for arquivo in set(indexados) - presentes:
+                doc_id = indexados[arquivo][0]
+                self.conn.execute(f'DELETE FROM {self._tabela} WHERE rowid = ?', (doc_id,))
+                self.conn.execute('DELETE FROM busca_documentos WHERE id = ?', (doc_id,))
+
+    def sincronizar(self):
+        if not os.path.isdir(self.output_dir):
+            return
+        inicio = time.perf_counter()
+        with os.scandir(self.output_dir) as it:
+            pastas = {entry.name for entry in it if entry.is_dir()}
+        for pasta in pastas:
+            try:
+                self.indexar_pasta(pasta)
+            except Exception as e:
+                print(f"[BUSCA] Falha ao indexar {pasta}: {e}")
+        with self._lock, self.conn:
+            orfas = [row[0] for row in self.conn.execute('SELECT DISTINCT pasta FROM busca_documentos') if row[0] not in pastas]
+        for pasta in orfas:
+            self.indexar_pasta(pasta)
+        print(f"[BUSCA] Índice sincronizado em {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+
+    @staticmethod
+    def _consulta_fts(texto):
+        # Cada palavra vira um termo entre aspas; a última aceita prefixo (busca enquanto digita)
+        termos = [t.replace('"', '""') for t in re.findall(r'\w+', texto)]
+        if not termos:
+            return None
+        return ' '.join(f'"{t}"' for t in termos[:-1]) + (' ' if len(termos) > 1 else '') + f'"{termos[-1]}"*'
+
+    def buscar(self, texto, limite=50):
+        """Retorna [{pasta, tipo, trecho}] ordenados por relevância."""
+        with self._lock:
+            if self.fts:
+                consulta = self._consulta_fts(texto)
+                if not consulta:
+                    return []
+                linhas = self.conn.execute(
+                    "SELECT pasta, tipo, snippet(busca, 1, '«', '»', '…', 16) AS trecho, titulo"
+                    " FROM busca WHERE busca MATCH ? ORDER BY bm25(busca, 5.0, 1.0) LIMIT ?",
+                    (consulta, limite),
+                ).fetchall()
+            else:
+                padrao = f"%{texto}%"
+                linhas = self.conn.execute(
+                    'SELECT pasta, tipo, substr(conteudo, max(1, instr(lower(conteudo), lower(?)) - 60), 160) AS trecho, titulo'
+                    ' FROM busca_simples WHERE titulo LIKE ? OR conteudo LIKE ? LIMIT ?',
+                    (texto, padrao, padrao, limite),
+                ).fetchall()
+        return [{"pasta": row[0], "tipo": row[1], "trecho": row[2] or row[3]} for row in linhas]
+
+class ObservadorSaida:
+    """
+    Observa output/ e as pastas de gravação e avisa quais gravações mudaram, agrupando eventos próximos (debounce).
+    Usa inotify no Linux e, se indisponível, uma varredura periódica via CatalogoGravacoes.sincronizar().
+    'ao_alterar' recebe {pasta: {arquivos alterados}} ou None quando é preciso reler tudo (fila do inotify estourou).
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    MASCARA = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENTO = struct.Struct('iIII')
+
+    def __init__(self, output_dir, ao_alterar, debounce=0.3, intervalo_varredura=2.0, ignorar=(), catalogo=None):
+        self.output_dir = output_dir
+        self.catalogo = catalogo
+        self.ao_alterar = ao_alterar
+        self.debounce = debounce
+        self.intervalo_varredura = intervalo_varredura
+        self.ignorar = tuple(ignorar)
+        self._parar = threading.Event()
+        self._fd = None
+        self._wds = {}
+        self._thread = None
+
+    def iniciar(self):
+        if sys.platform.startswith('linux') and self._iniciar_inotify():
+            alvo = self._loop_inotify
+        else:
+            print("[OBSERVADOR] inotify indisponível, usando varredura periódica.")
+            alvo = self._loop_varredura
+        self._thread = threading.Thread(target=alvo, daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _iniciar_inotify(self):
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = self._libc.inotify_init1(os.O_CLOEXEC)
+            if fd < 0:
+                return False
+            self._fd = fd
+            if not self._observar(self.output_dir, None):
+                os.close(fd)
+                self._fd = None
+                return False
+            with os.scandir(self.output_dir) as it:
+                for entry in it:
+                    if entry.is_dir() and not self._observar(entry.path, entry.name):
+                        # Provável limite de max_user_watches: volta para a varredura
+                        os.close(fd)
+                        self._fd = None
+                        return False
+            return True
+        except Exception as e:
+            print(f"[OBSERVADOR] Falha ao iniciar inotify: {e}")
+            return False
+
+    def _observar(self, caminho, pasta):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(caminho), self.MASCARA)
+        if wd < 0:
+            print(f"[OBSERVADOR] inotify_add_watch falhou em {caminho}: {os.strerror(ctypes.get_errno())}")
+            return False
+        self._wds[wd] = pasta
+        return True
+
+    def _loop_inotify(self):
+        pendentes = {}
+        ultimo_evento = 0.0
+        while not self._parar.is_set():
+            prontos, _, _ = select.select([self._fd], [], [], self.debounce)
+            if prontos:
+                dados = os.read(self._fd, 64 * 1024)
+                if self._processar(dados, pendentes) is None:
+                    pendentes = None
+                ultimo_evento = time.monotonic()
+            if pendentes is None or (pendentes and time.monotonic() - ultimo_evento >= self.debounce):
+                self._entregar(pendentes)
+                pendentes = {}
+        os.close(self._fd)
+
+    def _processar(self, dados, pendentes):
+        pos = 0
+        while pos < len(dados):
+            wd, mascara, _, tamanho = self.EVENTO.unpack_from(dados, pos)
+            nome = dados[pos + self.EVENTO.size:pos + self.EVENTO.size + tamanho].rstrip(b'\0').decode('utf-8', 'replace')
+            pos += self.EVENTO.size + tamanho
+            if mascara & self.IN_Q_OVERFLOW:
+                return None
+            if mascara & self.IN_IGNORED:
+                self._wds.pop(wd, None)
+                continue
+            if wd not in self._wds:
+                continue
+            pasta = self._wds[wd]
+            if pasta is None:
+                # Evento direto em output/: criação, remoção ou renomeação de uma pasta de gravação
+                if not mascara & self.IN_ISDIR or nome.startswith(self.ignorar):
+                    continue
+                if mascara & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._observar(os.path.join(self.output_dir, nome), nome)
+                pendentes.setdefault(nome, set()).add('')
+            elif mascara & self.IN_DELETE_SELF:
+                pendentes.setdefault(pasta, set()).add('')
+            elif not nome.endswith('.tmp'):
+                pendentes.setdefault(pasta, set()).add(nome)
+        return pendentes
+
+    def _loop_varredura(self):
+        catalogo = self.catalogo or CatalogoGravacoes(self.output_dir)
+        while not self._parar.wait(self.intervalo_varredura):
+            try:
+                alteradas = catalogo.sincronizar()
+            except Exception as e:
+                print(f"[OBSERVADOR] Falha na varredura: {e}")
+                continue
+            if alteradas:
+                self._entregar({pasta: {''} for pasta in alteradas})
+
+    def _entregar(self, alteracoes):
+        try:
+            self.ao_alterar(alteracoes)
+        except Exception as e:
+            print(f"[OBSERVADOR] Erro ao aplicar alterações: {e}")
+
+class CapturaContinua:
+    """
+    Executa um pipeline GStreamer de gravação do início ao fim da sessão, em um único GLib.MainLoop.
+    A troca de blocos é feita pelo splitmuxsink dentro do pipeline e a parada é orientada a eventos (EOS).
+    """
+    def __init__(self, pipeline, ao_abrir_bloco=None, ao_fechar_bloco=None, timeout_parada=5, linha_tempo=None, transcricao_ao_vivo=None):
+        self.pipeline = pipeline
+        self.ao_abrir_bloco = ao_abrir_bloco
+        self.ao_fechar_bloco = ao_fechar_bloco
+        self.linha_tempo = linha_tempo
+        self.transcricao_ao_vivo = transcricao_ao_vivo
+        self.ao_encerrar = None
+        self.timeout_parada = timeout_parada
+        self.loop = GLib.MainLoop()
+        self.encerrada = threading.Event()
+        self.thread = None
+
+    def iniciar(self):
+        bus = self.pipeline.get_bus()
+        bus.add_signal_watch()
+        bus.connect('message', self._on_message)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.pipeline.set_state(Gst.State.PLAYING)
+
+    def parar(self, ao_encerrar=None):
+        self.ao_encerrar = ao_encerrar
+        if self.encerrada.is_set():
+            if ao_encerrar:
+                ao_encerrar()
+            return
+        # O EOS percorre o pipeline: o splitmuxsink finaliza o bloco atual e o bus avisa o fim.
+        self.pipeline.send_event(Gst.Event.new_eos())
+        # Proteção caso o EOS não chegue ao bus (ex.: dispositivo travado)
+        GLib.timeout_add_seconds(self.timeout_parada, self._forcar_parada)
+
+    def _forcar_parada(self):
+        if self.loop.is_running():
+            print("[CAPTURA] EOS não recebido a tempo, encerrando pipeline.")
+            self.loop.quit()
+        return False
+
+    def _on_message(self, bus, message):
+        if message.type == Gst.MessageType.EOS:
+            self.loop.quit()
+        elif message.type == Gst.MessageType.ERROR:
+            err, debug = message.parse_error()
+            print(f"Erro durante a gravação: {err} ({debug})")
+            self.loop.quit()
+        elif message.type == Gst.MessageType.ELEMENT:
+            estrutura = message.get_structure()
+            if not estrutura:
+                return
+            nome = estrutura.get_name()
+            if nome == 'level':
+                if self.linha_tempo:
+                    self.linha_tempo.registrar_nivel(estrutura)
+            elif nome == 'splitmuxsink-fragment-opened':
+                if self.linha_tempo:
+                    self.linha_tempo.abrir_bloco(estrutura.get_string('location'), estrutura.get_value('running-time'))
+                if self.ao_abrir_bloco:
+                    self.ao_abrir_bloco(estrutura.get_string('location'))
+            elif nome == 'splitmuxsink-fragment-closed':
+                # O sidecar é gravado antes do callback para já existir quando o bloco for processado
+                if self.linha_tempo:
+                    self.linha_tempo.fechar_bloco(estrutura.get_string('location'), estrutura.get_value('running-time'))
+                if self.transcricao_ao_vivo:
+                    self.transcricao_ao_vivo.fechar_bloco(estrutura.get_string('location'), estrutura.get_value('running-time'))
+                if self.ao_fechar_bloco:
+                    self.ao_fechar_bloco(estrutura.get_string('location'))
+
+    def _run(self):
+        try:
+            self.loop.run()
+        except Exception as e:
+            print(f"Erro durante a gravação: {e}")
+        finally:
+            self.pipeline.set_state(Gst.State.NULL)
+            bus = self.pipeline.get_bus()
+            bus.remove_signal_watch()
+            if self.linha_tempo:
+                # Parada forçada (sem EOS): grava a linha do tempo do bloco que ficou aberto
+                self.linha_tempo.fechar_pendentes()
+            self.encerrada.set()
+            print("[DEBUG] Gravação encerrada.")
+            if self.ao_encerrar:
+                self.ao_encerrar()
+
+class LinhaTempoVoz:
+    """
+    Linha do tempo de fala/silêncio por bloco, montada durante a captura a partir das mensagens do
+    elemento 'level'. Ao fechar cada bloco grava <bloco>.vad.json com os intervalos em amostras
+    (relativas ao início do bloco, na taxa da captura), para as etapas seguintes pularem o silêncio
+    sem decodificar o áudio.
+    """
+    INTERVALO = 100 * 1000 * 1000  # ns entre medições do 'level'
+    SUFIXO = '.vad.json'
+    _RMS = re.compile(r'rms=\([^)]*\)[{<]([^}>]*)[}>]')
+
+    def __init__(self, taxa=CAPTURA_TAXA, limiar_db=VAD_LIMIAR_DB, silencio_min_ms=VAD_SILENCIO_MIN_MS):
+        self.taxa = taxa
+        self.limiar_db = limiar_db
+        self.silencio_min_ns = silencio_min_ms * 1000 * 1000
+        self._lock = threading.Lock()
+        self._medicoes = []  # (inicio_ns, fim_ns, fala)
+        self._abertos = {}  # location -> running-time de abertura
+
+    @classmethod
+    def _rms(cls, estrutura):
+        try:
+            return list(estrutura.get_value('rms'))
+        except Exception:
+            # Algumas versões do PyGObject não convertem GValueArray; lê da forma textual da estrutura
+            m = cls._RMS.search(estrutura.to_string())
+            return [float(v) for v in m.group(1).split(',')] if m else []
+
+    def registrar_nivel(self, estrutura):
+        rms = self._rms(estrutura)
+        if not rms:
+            return
+        inicio = estrutura.get_value('running-time')
+        fim = inicio + estrutura.get_value('duration')
+        self.registrar(inicio, fim, max(rms) > self.limiar_db)
+
+    def registrar(self, inicio_ns, fim_ns, fala):
+        with self._lock:
+            self._medicoes.append((inicio_ns, fim_ns, fala))
+
+    def abrir_bloco(self, location, running_time):
+        with self._lock:
+            self._abertos[location] = running_time or 0
+
+    def fechar_bloco(self, location, running_time):
+        with self._lock:
+            inicio = self._abertos.pop(location, None)
+            if inicio is None:
+                return
+            fim = running_time if running_time and running_time > inicio else max((m[1] for m in self._medicoes), default=inicio)
+            medicoes = [m for m in self._medicoes if m[1] > inicio and m[0] < fim]
+            # Medições anteriores ao bloco seguinte não são mais necessárias
+            self._medicoes = [m for m in self._medicoes if m[1] > fim]
+        try:
+            self._gravar(location, self.intervalos(medicoes, inicio, fim), fim - inicio)
+        except Exception as e:
+            print(f"[VAD] Falha ao gravar linha do tempo de {location}: {e}")
+
+    def fechar_pendentes(self):
+        with self._lock:
+            abertos = list(self._abertos)
+        for location in abertos:
+            self.fechar_bloco(location, None)
+
+    def intervalos(self, medicoes, inicio_ns, fim_ns):
+        """Une as medições em intervalos [inicio, fim) de amostras; pausas curtas contam como fala."""
+        trechos = []
+        for ini, fim, fala in medicoes:
+            ini, fim = max(ini, inicio_ns), min(fim, fim_ns)
+            if trechos and trechos[-1][2] == fala:
+                trechos[-1][1] = fim
+            else:
+                trechos.append([ini, fim, fala])
+        # Silêncios menores que o mínimo (entre falas) são absorvidos pela fala vizinha
+        unidos = []
+        for idx, trecho in enumerate(trechos):
+            curto = not trecho[2] and 0 < idx < len(trechos) - 1 and trecho[1] - trecho[0] < self.silencio_min_ns
+            if curto:
+                trecho[2] = True
+            if unidos and unidos[-1][2] == trecho[2]:
+                unidos[-1][1] = trecho[1]
+            else:
+                unidos.append(trecho)
+        amostra = lambda ns: int(round((ns - inicio_ns) * self.taxa / Gst.SECOND))
+        return [{"inicio": amostra(ini), "fim": amostra(fim), "fala": fala} for ini, fim, fala in unidos]
+
+    def _gravar(self, location, intervalos, duracao_ns):
+        fala = sum(i["fim"] - i["inicio"] for i in intervalos if i["fala"])
+        dados = {
+            "taxa": self.taxa,
+            "limiar_db": self.limiar_db,
+            "amostras": int(round(duracao_ns * self.taxa / Gst.SECOND)),
+            "fala_amostras": fala,
+            "intervalos": intervalos,
+        }
+        caminho = os.path.splitext(location)[0] + self.SUFIXO
+        tmp = caminho + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(dados, f)
+        os.replace(tmp, caminho)
+        ajustar_permissao_usuario(caminho)
+        print(f"[VAD] {os.path.basename(location)}: {fala / self.taxa:.1f}s de fala em {dados['amostras'] / self.taxa:.1f}s.")
+
+def ler_linha_tempo_voz(caminho_audio):
+    """Lê a linha do tempo de fala gravada ao lado do bloco; None se não existir (ex.: gravações antigas)."""
+    caminho = os.path.splitext(caminho_audio)[0] + LinhaTempoVoz.SUFIXO
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[VAD] Linha do tempo inválida em {caminho}: {e}")
+        return None
+
+def trechos_de_fala(linha_tempo, taxa_destino, margem_ms=VAD_MARGEM_MS):
+    """Converte os intervalos de fala para amostras em 'taxa_destino', com margem e trechos sobrepostos unidos."""
+    escala = taxa_destino / linha_tempo["taxa"]
+    margem = int(margem_ms * taxa_destino / 1000)
+    trechos = []
+    for intervalo in linha_tempo["intervalos"]:
+        if not intervalo["fala"]:
+            continue
+        ini = max(0, int(intervalo["inicio"] * escala) - margem)
+        fim = int(intervalo["fim"] * escala) + margem
+        if trechos and ini <= trechos[-1][1]:
+            trechos[-1][1] = max(trechos[-1][1], fim)
+        else:
+            trechos.append([ini, fim])
+    return [tuple(t) for t in trechos]
+
+class TranscricaoAoVivo:
+    """
+    Consome o PCM (16 kHz, mono, S16LE) entregue pelo appsink da captura e transcreve cada bloco
+    em background assim que ele completa, anexando o texto ao gravacao.txt durante a gravação.
+    Os blocos são cortados no running-time em que o splitmuxsink fecha cada .ogg, então o texto e as falas
+    de cada bloco também vão para o CacheTranscricao: um "Transcrever" posterior só refaz o que falhou.
+    """
+    TAXA = ASR_TAXA
+    LARGURA = ASR_LARGURA
+    # Sobra de PCM no fim da gravação sem .ogg correspondente abaixo disto é descartada
+    SOBRA_MINIMA = ASR_TAXA * ASR_LARGURA // 2
+
+    def __init__(self, gravacao_dir, ao_atualizar=None):
+        self.gravacao_dir = gravacao_dir
+        self.caminho_txt = os.path.join(gravacao_dir, 'gravacao.txt')
+        self.ao_atualizar = ao_atualizar
+        self._buffer = bytearray()
+        self._inicio_buffer = None  # running-time (ns) do primeiro byte do buffer
+        self._cortes = collections.deque()  # (running-time do fim do bloco, caminho do .ogg)
+        self._numero_bloco = 1
+        self._lock = threading.Lock()
+        self._finalizada = False
+        self._fila = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def conectar(self, appsink):
+        appsink.connect('new-sample', self._on_new_sample)
+
+    def ativa(self):
+        return self._worker.is_alive()
+
+    def aguardar(self, timeout=None):
+        """Espera o worker terminar de transcrever o que já foi enfileirado (usar depois de finalizar())."""
+        self._worker.join(timeout)
+
+    def _on_new_sample(self, appsink):
+        # Executa na thread de streaming do GStreamer: apenas copia os bytes e devolve o controle
+        sample = appsink.emit('pull-sample')
+        if sample is None:
+            return Gst.FlowReturn.EOS
+        buf = sample.get_buffer()
+        ok, info = buf.map(Gst.MapFlags.READ)
+        if not ok:
+            return Gst.FlowReturn.OK
+        try:
+            dados = bytes(info.data)
+        finally:
+            buf.unmap(info)
+        with self._lock:
+            if not self._buffer and buf.pts != Gst.CLOCK_TIME_NONE:
+                self._inicio_buffer = buf.pts
+            self._buffer.extend(dados)
+            self._cortar()
+        return Gst.FlowReturn.OK
+
+    def fechar_bloco(self, caminho_ogg, running_time):
+        """Chamado quando o splitmuxsink fecha um .ogg: o PCM até 'running_time' forma o bloco correspondente."""
+        with self._lock:
+            self._cortes.append((running_time, caminho_ogg))
+            self._cortar()
+
+    def _cortar(self):
+        # Chamado com o lock: enfileira os blocos cujo fim já chegou pelo appsink
+        while self._cortes:
+            fim_ns, caminho_ogg = self._cortes[0]
+            tamanho = len(self._buffer)
+            if fim_ns is not None and self._inicio_buffer is not None:
+                quadros = int(round((fim_ns - self._inicio_buffer) * self.TAXA / Gst.SECOND))
+                if quadros * self.LARGURA > tamanho and not self._finalizada:
+                    # O ramo de PCM ainda não entregou o fim deste bloco
+                    return
+                tamanho = max(0, min(tamanho, quadros * self.LARGURA))
+            self._cortes.popleft()
+            pcm = bytes(self._buffer[:tamanho])
+            del self._buffer[:tamanho]
+            if self._inicio_buffer is not None:
+                self._inicio_buffer += tamanho // self.LARGURA * Gst.SECOND // self.TAXA
+            self._fila.put((self._numero_bloco, pcm, caminho_ogg))
+            self._numero_bloco += 1
+
+    def finalizar(self):
+        with self._lock:
+            if self._finalizada:
+                return
+            self._finalizada = True
+            self._cortar()
+            if len(self._buffer) >= self.SOBRA_MINIMA:
+                # Parada sem o fechamento do último .ogg: transcreve o trecho, mas sem guardar no cache
+                self._fila.put((self._numero_bloco, bytes(self._buffer), None))
+            self._buffer.clear()
+            self._fila.put(None)
+
+    def _run(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                break
+            numero_bloco, pcm, caminho_ogg = item
+            segmentos, textos = [], []
+            try:
+                amostras = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+                inicio = time.monotonic()
+                # Mesma segmentação do "Transcrever" (inclusive a linha do tempo de fala do .ogg), para as falas coincidirem
+                linha_tempo = ler_linha_tempo_voz(caminho_ogg) if caminho_ogg and TRANSCRICAO_PULAR_SILENCIO else None
+                segmentos = segmentar_bloco(amostras, self.TAXA, linha_tempo)
+                # Mesmo pool persistente do "Transcrever": o reconhecedor (e o modelo local) continua aquecido
+                pool = obter_pool_transcricao()
+                futuros = [pool.submit(transcrever_segmento, pcm_int16(normalizar_pcm(amostras[ini:fim])), numero_bloco, ini / self.TAXA)
+                           for ini, fim in segmentos]
+                textos = [futuro.result() for futuro in futuros]
+                texto = juntar_segmentos(textos, numero_bloco)
+                segundos_fala = sum(fim - ini for ini, fim in segmentos) / self.TAXA
+                registrar_fator_tempo_real(f'Bloco {numero_bloco} (ao vivo)', segundos_fala, time.monotonic() - inicio)
+            except Exception as e:
+                texto = f'[Bloco {numero_bloco}: erro ao transcrever: {e}]'
+            try:
+                self._anexar(texto)
+            except Exception as e:
+                print(f"[TRANSCRIÇÃO] Falha ao gravar transcrição ao vivo: {e}")
+                continue
+            if caminho_ogg:
+                try:
+                    self._guardar_cache(caminho_ogg, texto, segmentos, textos)
+                except Exception as e:
+                    print(f"[TRANSCRIÇÃO] Falha ao guardar o bloco {numero_bloco} no cache: {e}")
+            print(f"[TRANSCRIÇÃO] Bloco {numero_bloco} transcrito ao vivo.")
+            if self.ao_atualizar:
+                self.ao_atualizar(numero_bloco)
+
+    def _guardar_cache(self, caminho_ogg, texto, segmentos, textos):
+        # Falas com erro ficam de fora; se alguma falhou, o bloco fica sem texto em cache e volta a ser transcrito
+        erro = CacheTranscricao.MARCADOR_ERRO
+        falas = [{"inicio": ini, "fim": fim, "texto": t} for (ini, fim), t in zip(segmentos, textos) if not erro.search(t)]
+        cache = CacheTranscricao(self.gravacao_dir)
+        cache.guardar(caminho_ogg, None if erro.search(texto) else texto, falas)
+        cache.salvar()
+
+    def _anexar(self, texto):
+        existe = os.path.exists(self.caminho_txt) and os.path.getsize(self.caminho_txt) > 0
+        with open(self.caminho_txt, 'a', encoding='utf-8') as f:
+            f.write(('\n' if existe else '') + texto)
+        if not existe:
+            try:
+                ajustar_permissao_usuario(self.caminho_txt)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão do txt: {e}")
+
+def decodificar_audio(caminho):
+    """
+    Decodifica um arquivo de áudio em memória (ffmpeg via pipe, sem arquivo temporário).
+    Retorna (amostras float32 no formato [quadros, canais] em -1..1, taxa de amostragem).
+    """
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(caminho)
+    largura = audio.sample_width
+    if largura == 1:
+        # PCM de 8 bits é sem sinal
+        amostras = np.frombuffer(audio.raw_data, dtype=np.uint8).astype(np.float32) - 128.0
+    else:
+        amostras = np.frombuffer(audio.raw_data, dtype=f'<i{largura}').astype(np.float32)
+    amostras /= float(1 << (8 * largura - 1))
+    return amostras.reshape(-1, audio.channels), audio.frame_rate
+
+def normalizar_pcm(amostras, headroom_db=0.1, rms_alvo_db=-20.0):
+    """
+    Normalização vetorizada de pico/RMS: aplica o ganho que leva o RMS ao alvo, limitado
+    pelo ganho que leva o pico a 'headroom_db' abaixo de 0 dBFS. Áudio silencioso volta inalterado.
+    """
+    if not len(amostras):
+        return amostras
+    pico = float(np.max(np.abs(amostras)))
+    if pico == 0.0:
+        return amostras
+    rms = float(np.sqrt(np.mean(np.square(amostras, dtype=np.float64))))
+    ganho_pico = (10 ** (-headroom_db / 20)) / pico
+    ganho_rms = (10 ** (rms_alvo_db / 20)) / rms if rms > 0 else ganho_pico
+    return amostras * min(ganho_pico, ganho_rms)
+
+def _filtro_passa_baixa(corte, num_coef=63):
+    # FIR sinc janelado (Hamming); 'corte' é relativo à taxa de amostragem (0..0.5)
+    n = np.arange(num_coef) - (num_coef - 1) / 2
+    coef = 2 * corte * np.sinc(2 * corte * n) * np.hamming(num_coef)
+    return (coef / coef.sum()).astype(np.float32)
+
+def reamostrar(amostras, taxa_origem, taxa_destino):
+    """
+    Reamostra um sinal mono. Decimação inteira (ex.: 48 kHz -> 16 kHz) usa filtro anti-aliasing + salto de amostras;
+    razões não inteiras usam interpolação linear (com o mesmo filtro ao reduzir a taxa).
+    """
+    if taxa_origem == taxa_destino or not len(amostras):
+        return amostras
+    if taxa_destino < taxa_origem:
+        amostras = np.convolve(amostras, _filtro_passa_baixa(0.45 * taxa_destino / taxa_origem), mode='same')
+        if taxa_origem % taxa_destino == 0:
+            return amostras[::taxa_origem // taxa_destino]
+    duracao = len(amostras) / taxa_origem
+    posicoes = np.arange(int(duracao * taxa_destino)) * (taxa_origem / taxa_destino)
+    return np.interp(posicoes, np.arange(len(amostras)), amostras).astype(np.float32)
+
+def pcm_int16(amostras):
+    return (np.clip(amostras, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+def segmentar_falas(mono, taxa, limiar_db=VAD_LIMIAR_DB, silencio_min_ms=SEGMENTO_SILENCIO_MS, duracao_max_s=SEGMENTO_MAX_SEGUNDOS,
+                    duracao_min_ms=SEGMENTO_MIN_MS, margem_ms=VAD_MARGEM_MS, quadro_ms=20):
+    """
+    VAD por energia, vetorizado: mede o nível de quadros de 'quadro_ms', une falas separadas por pausas menores que
+    'silencio_min_ms', descarta ruídos curtos e divide falas longas no quadro mais silencioso da segunda metade
+    da janela máxima. Retorna [(inicio, fim)] em amostras; a margem só é aplicada nas bordas reais das falas.
+    """
+    quadro = max(1, int(taxa * quadro_ms / 1000))
+    num_quadros = len(mono) // quadro
+    if not num_quadros:
+        return []
+    energia = np.square(mono[:num_quadros * quadro].reshape(num_quadros, quadro), dtype=np.float64).mean(axis=1)
+    db = 10 * np.log10(energia + 1e-12)
+    bordas = np.diff(np.concatenate(([0], (db > limiar_db).astype(np.int8), [0])))
+    inicios, fins = np.flatnonzero(bordas == 1), np.flatnonzero(bordas == -1)
+    if not len(inicios):
+        return []
+    separadas = (inicios[1:] - fins[:-1]) * quadro_ms >= silencio_min_ms
+    inicios = np.concatenate((inicios[:1], inicios[1:][separadas]))
+    fins = np.concatenate((fins[:-1][separadas], fins[-1:]))
+    longas = (fins - inicios) * quadro_ms >= duracao_min_ms
+    max_quadros = max(2, int(duracao_max_s * 1000 / quadro_ms))
+    margem = int(margem_ms / quadro_ms)
+    segmentos = []
+    for ini, fim in zip(inicios[longas].tolist(), fins[longas].tolist()):
+        ini_seg = max(0, ini - margem)
+        while fim - ini > max_quadros:
+            metade = ini + max_quadros // 2
+            corte = metade + int(np.argmin(db[metade:ini + max_quadros]))
+            segmentos.append((ini_seg * quadro, corte * quadro))
+            ini = ini_seg = corte
+        segmentos.append((ini_seg * quadro, min(num_quadros, fim + margem) * quadro))
+    return segmentos
+
+def preparar_segmentos_asr(caminho, taxa_destino=ASR_TAXA, pular_silencio=TRANSCRICAO_PULAR_SILENCIO):
+    """
+    Prepara um bloco para o ASR inteiramente em memória: decodifica, faz downmix para mono, reamostra para
+    'taxa_destino' e divide em falas, cada uma normalizada separadamente. Retorna [(inicio, fim, PCM int16)],
+    com as posições em amostras de 'taxa_destino'. Com 'pular_silencio', a segmentação se limita aos trechos de
+    fala da linha do tempo gravada na captura, e blocos inteiramente em silêncio nem são decodificados.
+    Função de módulo para poder ser executada tanto em threads quanto em processos.
+    """
+    linha_tempo = ler_linha_tempo_voz(caminho) if pular_silencio else None
+    if linha_tempo and not linha_tempo.get("fala_amostras"):
+        return []
+    amostras, taxa = decodificar_audio(caminho)
+    mono = amostras.mean(axis=1) if amostras.shape[1] > 1 else amostras[:, 0]
+    mono = reamostrar(mono, taxa, taxa_destino)
+    return [(ini, fim, pcm_int16(normalizar_pcm(mono[ini:fim]))) for ini, fim in segmentar_bloco(mono, taxa_destino, linha_tempo)]
+
+def segmentar_bloco(mono, taxa, linha_tempo=None):
+    """Falas [(inicio, fim)] de um bloco mono; com a linha do tempo da captura, só dentro dos trechos de fala dela."""
+    regioes = trechos_de_fala(linha_tempo, taxa) if linha_tempo else [(0, len(mono))]
+    segmentos = []
+    for inicio_regiao, fim_regiao in regioes:
+        for ini, fim in segmentar_falas(mono[inicio_regiao:fim_regiao], taxa):
+            segmentos.append((inicio_regiao + ini, inicio_regiao + fim))
+    return segmentos
+
+def formatar_instante(segundos):
+    segundos = int(segundos)
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+def transcrever_segmento(pcm, numero_bloco, inicio_s=0.0):
+    """
+    Reconhece uma fala (PCM int16 a ASR_TAXA). Devolve '' se não houver fala reconhecível e um marcador de erro
+    com o instante da fala no bloco se o reconhecedor falhar, para que só ela seja refeita depois.
+    """
+    try:
+        return obter_backend_transcricao().reconhecer(pcm)
+    except Exception as e:
+        return f'[Bloco {numero_bloco}: erro ao transcrever trecho {formatar_instante(inicio_s)}: {e}]'
+
+def juntar_segmentos(textos, numero_bloco):
+    """Monta o texto do bloco a partir das falas, na ordem em que aparecem."""
+    if not textos:
+        return f'[Bloco {numero_bloco}: sem fala detectada]'
+    texto = ' '.join(t for t in textos if t)
+    return texto or f'[Bloco {numero_bloco}: não foi possível entender o áudio]'
+
+def criar_pool_transcricao(workers=None, tipo=None):
+    workers = workers or TRANSCRICAO_WORKERS
+    tipo = tipo or TRANSCRICAO_POOL
+    if tipo == 'process':
+        # 'spawn' evita herdar via fork as threads do Tk/GLib do processo principal;
+        # cada processo carrega o reconhecedor ao iniciar, antes da primeira fala
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=aquecer_backend_transcricao)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='transcricao')
+
+_pools_transcricao = {}
+_pools_transcricao_lock = threading.Lock()
+
+def obter_pool_transcricao(workers=None, tipo=None):
+    chave = (workers or TRANSCRICAO_WORKERS, tipo or TRANSCRICAO_POOL)
+    with _pools_transcricao_lock:
+        pool = _pools_transcricao.get(chave)
+        if pool is None or getattr(pool, '_broken', False):
+            pool = _pools_transcricao[chave] = criar_pool_transcricao(*chave)
+        return pool
+
+def transcrever_blocos(caminhos_ogg, ao_progresso=None, workers=None, tipo=None, numeros=None, cache=None):
+    """
+    Transcreve os blocos em um pool limitado e devolve os textos na ordem dos blocos. Cada bloco é decodificado e
+    segmentado em falas no pool, e cada fala vira uma requisição independente no mesmo pool; os textos são
+    remontados na ordem das falas. Com 'cache' (CacheTranscricao), falas já reconhecidas de um bloco que falhou
+    em parte são reaproveitadas e cada bloco é guardado assim que termina.
+    'numeros' são os números dos blocos usados nos marcadores (padrão: posição na lista, a partir de 1).
+    'ao_progresso(concluidos, total, numero_bloco)' é chamado a cada bloco finalizado.
+    """
+    total = len(caminhos_ogg)
+    numeros = numeros or list(range(1, total + 1))
+    transcricoes = [None] * total
+    segmentos = [None] * total
+    textos = [None] * total
+    faltam = [0] * total
+    concluidos = 0
+
+    def concluir(idx, texto=None):
+        nonlocal concluidos
+        transcricoes[idx] = texto if texto is not None else juntar_segmentos(textos[idx], numeros[idx])
+        if cache is not None:
+            falas = [{"inicio": ini, "fim": fim, "texto": t} for (ini, fim), t in zip(segmentos[idx] or [], textos[idx] or [])]
+            cache.guardar(caminhos_ogg[idx], transcricoes[idx], falas)
+            cache.salvar()
+        concluidos += 1
+        if ao_progresso:
+            ao_progresso(concluidos, total, numeros[idx])
+
+    # Pool compartilhado entre execuções: workers (e o modelo local de cada processo) continuam aquecidos
+    pool = obter_pool_transcricao(workers, tipo)
+    inicio_execucao = time.monotonic()
+    segundos_fala = 0.0
+    preparos = {pool.submit(preparar_segmentos_asr, caminho): idx for idx, caminho in enumerate(caminhos_ogg)}
+    falas = {}
+    andamento = set(preparos)
+    while andamento:
+        feitos, andamento = wait(andamento, return_when=FIRST_COMPLETED)
+        for futuro in feitos:
+            if futuro in preparos:
+                idx = preparos[futuro]
+                try:
+                    preparados = futuro.result()
+                except Exception as e:
+                    concluir(idx, f'[Bloco {numeros[idx]}: erro ao transcrever: {e}]')
+                    continue
+                anteriores = cache.falas(caminhos_ogg[idx]) if cache is not None else []
+                segmentos[idx] = [(ini, fim) for ini, fim, _ in preparados]
+                textos[idx] = [CacheTranscricao.reaproveitar(anteriores, ini, fim) for ini, fim, _ in preparados]
+                for pos, (ini, _, pcm) in enumerate(preparados):
+                    if textos[idx][pos] is None:
+                        fala = pool.submit(transcrever_segmento, pcm, numeros[idx], ini / ASR_TAXA)
+                        falas[fala] = (idx, pos, ini)
+                        andamento.add(fala)
+                        faltam[idx] += 1
+                        segundos_fala += len(pcm) / (ASR_TAXA * ASR_LARGURA)
+                if not faltam[idx]:
+                    concluir(idx)
+            else:
+                idx, pos, ini = falas.pop(futuro)
+                try:
+                    textos[idx][pos] = futuro.result()
+                except Exception as e:
+                    textos[idx][pos] = f'[Bloco {numeros[idx]}: erro ao transcrever trecho {formatar_instante(ini / ASR_TAXA)}: {e}]'
+                faltam[idx] -= 1
+                if not faltam[idx]:
+                    concluir(idx)
+    registrar_fator_tempo_real(f'Transcrição de {total} bloco(s)', segundos_fala, time.monotonic() - inicio_execucao)
+    return transcricoes
+
+def registrar_fator_tempo_real(descricao, segundos_fala, segundos_execucao):
+    """Loga o fator de tempo real (tempo de execução / duração da fala enviada ao reconhecedor) de uma execução."""
+    if segundos_fala <= 0:
+        return
+    print(f"[TRANSCRIÇÃO] {descricao} com '{obter_backend_transcricao().nome}': {segundos_fala:.1f}s de fala em {segundos_execucao:.1f}s "
+          f"(fator de tempo real {segundos_execucao / segundos_fala:.2f}).")
+
+def configuracao_transcricao():
+    # Tudo o que altera o texto produzido para um mesmo áudio entra na chave do cache
+    return {
+        "backend": obter_backend_transcricao().identidade(),
+        "taxa": ASR_TAXA,
+        "pular_silencio": TRANSCRICAO_PULAR_SILENCIO,
+        "segmentacao": [VAD_LIMIAR_DB, SEGMENTO_SILENCIO_MS, SEGMENTO_MAX_SEGUNDOS, SEGMENTO_MIN_MS],
+    }
+
+def transcricao_com_erros(caminho_txt):
+    """True se o gravacao.txt não existe ou tem algum marcador de erro de transcrição."""
+    try:
+        with open(caminho_txt, 'r', encoding='utf-8') as f:
+            return bool(CacheTranscricao.MARCADOR_ERRO.search(f.read()))
+    except FileNotFoundError:
+        return True
+
+def hash_arquivo(caminho, tamanho_leitura=1 << 20):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for parte in iter(lambda: f.read(tamanho_leitura), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+class CacheTranscricao:
+    """
+    Transcrições por bloco guardadas em gravacao_transcricao.json, endereçadas pelo SHA-256 do arquivo
+    do bloco combinado com a configuração do reconhecedor. Blocos inalterados são reaproveitados;
+    blocos novos, modificados ou com algum marcador de erro voltam a ser transcritos, mas as falas
+    já reconhecidas de um bloco inalterado são reaproveitadas e só as que falharam são reenviadas.
+    """
+    ARQUIVO = 'gravacao_transcricao.json'
+    MARCADOR_ERRO = re.compile(r'\[Bloco \d+: erro ao transcrever')
+    _travas = {}
+    _travas_lock = threading.Lock()
+
+    def __init__(self, gravacao_dir, configuracao=None):
+        self.caminho = os.path.join(gravacao_dir, self.ARQUIVO)
+        self.configuracao = json.dumps(configuracao or configuracao_transcricao(), sort_keys=True)
+        self._alterados = set()
+        with self._trava():
+            self.blocos = self._ler()
+
+    def _trava(self):
+        # Uma trava por pasta, compartilhada por todas as instâncias (transcrição ao vivo e tarefas da fila)
+        with self._travas_lock:
+            return self._travas.setdefault(os.path.realpath(self.caminho), threading.Lock())
+
+    def _ler(self):
+        if not os.path.exists(self.caminho):
+            return {}
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                return json.load(f).get('blocos', {})
+        except Exception as e:
+            print(f"[TRANSCRIÇÃO] Cache ilegível, será recriado: {e}")
+            return {}
+
+    def _chave(self, caminho_bloco):
+        # Evita reler o bloco inteiro quando tamanho e mtime não mudaram
+        st = os.stat(caminho_bloco)
+        entrada = self.blocos.get(os.path.basename(caminho_bloco), {})
+        if entrada.get('tamanho') == st.st_size and entrada.get('mtime') == st.st_mtime and entrada.get('hash_arquivo'):
+            digest = entrada['hash_arquivo']
+        else:
+            digest = hash_arquivo(caminho_bloco)
+        chave = hashlib.sha256((digest + self.configuracao).encode('utf-8')).hexdigest()
+        return chave, digest, st
+
+    def obter(self, caminho_bloco):
+        """Texto em cache do bloco, ou None se o bloco precisa ser (re)transcrito."""
+        entrada = self.blocos.get(os.path.basename(caminho_bloco))
+        if not entrada:
+            return None
+        chave, _, _ = self._chave(caminho_bloco)
+        texto = entrada.get('texto')
+        if entrada.get('chave') != chave or texto is None or self.MARCADOR_ERRO.search(texto):
+            return None
+        return texto
+
+    def falas(self, caminho_bloco):
+        """Falas reconhecidas com sucesso no bloco inalterado, como [(inicio, fim, texto)]."""
+        entrada = self.blocos.get(os.path.basename(caminho_bloco))
+        if not entrada or entrada.get('chave') != self._chave(caminho_bloco)[0]:
+            return []
+        return [
+            (fala["inicio"], fala["fim"], fala["texto"])
+            for fala in entrada.get('falas', [])
+            if fala.get("texto") is not None and not self.MARCADOR_ERRO.search(fala["texto"])
+        ]
+
+    @staticmethod
+    def reaproveitar(falas, inicio, fim, tolerancia=None):
+        """
+        Texto de uma fala já reconhecida com as mesmas bordas, a menos de 'tolerancia' amostras: as falas vindas
+        da transcrição ao vivo (PCM da captura) e do .ogg decodificado diferem por poucas amostras.
+        """
+        tolerancia = ASR_TAXA // 4 if tolerancia is None else tolerancia
+        for ini, f, texto in falas:
+            if abs(ini - inicio) <= tolerancia and abs(f - fim) <= tolerancia:
+                return texto
+        return None
+
+    def guardar(self, caminho_bloco, texto, falas=None):
+        chave, digest, st = self._chave(caminho_bloco)
+        self.blocos[os.path.basename(caminho_bloco)] = {
+            "chave": chave,
+            "hash_arquivo": digest,
+            "tamanho": st.st_size,
+            "mtime": st.st_mtime,
+            "texto": texto,
+            "falas": falas or [],
+        }
+        self._alterados.add(os.path.basename(caminho_bloco))
+
+    def falas_por_bloco(self, caminhos_blocos):
+        """
+        {número do bloco (posição em 'caminhos_blocos', a partir de 1): [(início em s, texto)]} com todas as falas
+        guardadas de cada bloco inalterado (mesmo tamanho e mtime), inclusive as vazias e as com erro.
+        """
+        resultado = {}
+        for numero, caminho in enumerate(caminhos_blocos, start=1):
+            entrada = self.blocos.get(os.path.basename(caminho))
+            if not entrada or not entrada.get('falas'):
+                continue
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            if entrada.get('tamanho') != st.st_size or entrada.get('mtime') != st.st_mtime:
+                continue
+            resultado[numero] = [(fala["inicio"] / ASR_TAXA, fala.get("texto") or '') for fala in entrada['falas']]
+        return resultado
+
+    def texto(self, caminho_bloco):
+        return self.blocos.get(os.path.basename(caminho_bloco), {}).get('texto') or ''
+
+    def salvar(self, caminhos_blocos=None):
+        """
+        Grava os blocos guardados por esta instância sobre o conteúdo atual do arquivo (relido sob a trava da pasta),
+        sem desfazer o que outra instância gravou depois que esta foi carregada.
+        """
+        with self._trava():
+            existia = os.path.exists(self.caminho)
+            blocos = self._ler()
+            blocos.update({nome: self.blocos[nome] for nome in self._alterados if nome in self.blocos})
+            if caminhos_blocos is not None:
+                # Descarta entradas de blocos que não existem mais
+                nomes = {os.path.basename(c) for c in caminhos_blocos}
+                blocos = {nome: entrada for nome, entrada in blocos.items() if nome in nomes}
+            self.blocos = blocos
+            self._alterados.clear()
+            tmp_path = self.caminho + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"blocos": self.blocos}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.caminho)
+        if not existia:
+            try:
+                ajustar_permissao_usuario(self.caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão do cache de transcrição: {e}")
+
+PROMPT_RESUMO = (
+    "Você receberá a transcrição de uma reunião em português do Brasil. "
+    "Gere um título objetivo para a reunião, um resumo de até 5 linhas e elenque os principais pontos discutidos (em tópicos).\n"
+    "Retorne a resposta exclusivamente no seguinte formato JSON, sem comentários, sem blocos de código markdown (como ```json), sem texto extra antes ou depois, apenas o JSON puro:\n"
+    '{\n  "titulo": "...",\n  "resumo": "...",\n  "pontos": [\n    "...",\n    "..."\n  ]\n}\n'
+    "Transcrição:\n"
+)
+
+PROMPT_RESUMO_PARTE = (
+    "Você receberá um trecho (parte {parte} de {total}) da transcrição de uma reunião em português do Brasil. "
+    "Resuma o que foi discutido neste trecho e elenque os pontos principais, decisões e pendências.\n"
+    "Retorne a resposta exclusivamente no seguinte formato JSON, sem blocos de código markdown e sem texto extra, apenas o JSON puro:\n"
+    '{{\n  "resumo": "...",\n  "pontos": [\n    "...",\n    "..."\n  ]\n}}\n'
+    "Trecho da transcrição:\n"
+)
+
+PROMPT_RESUMO_CONSOLIDADO = (
+    "Você receberá resumos parciais, em ordem cronológica, de partes consecutivas da transcrição de uma reunião em português do Brasil. "
+    "Com base neles, gere um título objetivo para a reunião inteira, um resumo de até 5 linhas e elenque os principais pontos discutidos (em tópicos), sem repetições.\n"
+    "Retorne a resposta exclusivamente no seguinte formato JSON, sem comentários, sem blocos de código markdown (como ```json), sem texto extra antes ou depois, apenas o JSON puro:\n"
+    '{\n  "titulo": "...",\n  "resumo": "...",\n  "pontos": [\n    "...",\n    "..."\n  ]\n}\n'
+    "Resumos parciais:\n"
+)
+
+class CacheIA:
+    """
+    Cache persistente (SQLite em output/) das respostas do Gemini, endereçado pelo modelo, pela configuração
+    de geração, pelo texto do prompt e pelo SHA-256 das imagens enviadas. Entradas não acessadas há mais de
+    max_dias são descartadas e, acima de max_bytes, as menos usadas recentemente saem primeiro.
+    """
+    ARQUIVO = 'cache_ia.sqlite3'
+
+    def __init__(self, output_dir, max_bytes=None, max_dias=None):
+        os.makedirs(output_dir, exist_ok=True)
+        self.caminho = os.path.join(output_dir, self.ARQUIVO)
+        self.max_bytes = int(IA_CACHE_MAX_MB * (1 << 20)) if max_bytes is None else max_bytes
+        self.max_segundos = (IA_CACHE_MAX_DIAS if max_dias is None else max_dias) * 86400
+        existia = os.path.exists(self.caminho)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS respostas ('
+                ' chave TEXT PRIMARY KEY,'
+                ' modelo TEXT,'
+                ' criado REAL,'
+                ' acessado REAL,'
+                ' tamanho INTEGER,'
+                ' texto TEXT)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_respostas_acessado ON respostas (acessado)')
+        if not existia:
+            try:
+                ajustar_permissao_usuario(self.caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão do cache da IA: {e}")
+
+    @staticmethod
+    def chave(modelo, conteudo, generation_config=None):
+        """Chave canônica: textos entram como estão, imagens/arquivos inline entram pelo SHA-256 dos bytes."""
+        def normalizar(parte):
+            if isinstance(parte, (bytes, bytearray)):
+                return {"sha256": hashlib.sha256(parte).hexdigest()}
+            if isinstance(parte, dict):
+                return {k: normalizar(v) for k, v in parte.items()}
+            if isinstance(parte, (list, tuple)):
+                return [normalizar(p) for p in parte]
+            return parte
+        bruto = json.dumps([modelo, normalizar(conteudo), generation_config or {}], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+    def obter(self, chave):
+        agora = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute('SELECT texto, acessado FROM respostas WHERE chave = ?', (chave,)).fetchone()
+            if row is None:
+                return None
+            if agora - row[1] > self.max_segundos:
+                self.conn.execute('DELETE FROM respostas WHERE chave = ?', (chave,))
+                return None
+            self.conn.execute('UPDATE respostas SET acessado = ? WHERE chave = ?', (agora, chave))
+            return row[0]
+
+    def guardar(self, chave, modelo, texto):
+        agora = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO respostas (chave, modelo, criado, acessado, tamanho, texto) VALUES (?, ?, ?, ?, ?, ?)',
+                (chave, modelo, agora, agora, len(texto.encode('utf-8')), texto),
+            )
+            self._despejar(agora)
+
+    def remover(self, chave):
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM respostas WHERE chave = ?', (chave,))
+
+    def _despejar(self, agora):
+        self.conn.execute('DELETE FROM respostas WHERE acessado < ?', (agora - self.max_segundos,))
+        total = self.conn.execute('SELECT COALESCE(SUM(tamanho), 0) FROM respostas').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removidas = []
+        for chave, tamanho in self.conn.execute('SELECT chave, tamanho FROM respostas ORDER BY acessado ASC'):
+            if total <= self.max_bytes:
+                break
+            removidas.append((chave,))
+            total -= tamanho
+        self.conn.executemany('DELETE FROM respostas WHERE chave = ?', removidas)
+        print(f"[IA] Cache acima do limite: {len(removidas)} respostas antigas removidas.")
+
+class BaldeFichas:
+    """Token bucket assíncrono: até `capacidade` requisições em rajada, reabastecido a `taxa` fichas por segundo."""
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = float(capacidade)
+        self.ultimo = time.monotonic()
+
+    async def adquirir(self):
+        while True:
+            agora = time.monotonic()
+            self.fichas = min(self.capacidade, self.fichas + (agora - self.ultimo) * self.taxa)
+            self.ultimo = agora
+            if self.fichas >= 1:
+                self.fichas -= 1
+                return
+            await asyncio.sleep((1 - self.fichas) / self.taxa)
+
+class AgendadorIA:
+    """
+    Agendador único das chamadas ao Gemini, com um event loop asyncio em thread própria. Configura o cliente
+    uma única vez e reaproveita o GenerativeModel; limita as chamadas simultâneas (concorrencia) e a taxa
+    (token bucket); atende primeiro as prioridades menores (perguntas interativas antes de análises de prints);
+    repete com backoff exponencial os erros 429/5xx.
+    """
+    CODIGOS_TRANSITORIOS = (429, 500, 502, 503, 504)
+
+    def __init__(self, concorrencia=None, requisicoes_por_minuto=None, rajada=None, max_tentativas=None, endpoint=None):
+        self.concorrencia = concorrencia or IA_CONCORRENCIA
+        self.max_tentativas = max_tentativas or IA_MAX_TENTATIVAS
+        self.endpoint = endpoint if endpoint is not None else GEMINI_API_ENDPOINT
+        self._balde = BaldeFichas((requisicoes_por_minuto or IA_REQUISICOES_POR_MINUTO) / 60.0, rajada or IA_RAJADA)
+        self._modelos = {}
+        self._configurado = False
+        self._lock = threading.Lock()
+        self._sequencia = 0
+        self._loop = asyncio.new_event_loop()
+        self._pronto = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self._pronto.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._fila = asyncio.PriorityQueue()
+        # As chamadas do SDK são bloqueantes; cada trabalhador as executa em uma thread do executor do loop
+        self._executor = ThreadPoolExecutor(max_workers=self.concorrencia)
+        for _ in range(self.concorrencia):
+            self._loop.create_task(self._trabalhador())
+        self._pronto.set()
+        self._loop.run_forever()
+
+    def _modelo(self, nome):
+        import google.generativeai as genai
+        with self._lock:
+            if not self._configurado:
+                api_key = os.environ.get("GEMINI_API_KEY") or GEMINI_API_KEY
+                if self.endpoint:
+                    genai.configure(api_key=api_key, transport='rest', client_options={"api_endpoint": self.endpoint})
+                else:
+                    genai.configure(api_key=api_key)
+                self._configurado = True
+            if nome not in self._modelos:
+                self._modelos[nome] = genai.GenerativeModel(nome)
+            return self._modelos[nome]
+
+    def _chamar(self, conteudo, generation_config):
+        model = self._modelo(GEMINI_MODEL)
+        if generation_config:
+            response = model.generate_content(conteudo, generation_config=generation_config)
+        else:
+            response = model.generate_content(conteudo)
+        return response.text.strip()
+
+    @classmethod
+    def transitorio(cls, erro):
+        codigo = getattr(erro, 'code', None)
+        if callable(codigo):
+            codigo = codigo()
+        codigo = getattr(codigo, 'value', codigo)
+        if isinstance(codigo, int):
+            return codigo in cls.CODIGOS_TRANSITORIOS
+        return bool(re.search(r'\b(429|50[0234])\b', str(erro)))
+
+    async def _trabalhador(self):
+        while True:
+            # Primeiro o pedido, depois a ficha: trabalhadores ociosos não guardam fichas (a rajada fica limitada
+            # a IA_RAJADA) e pedidos cancelados não gastam nenhuma
+            prioridade, seq, pedido = await self._fila.get()
+            if pedido[2].cancelled():
+                continue
+            await self._balde.adquirir()
+            prioridade, seq, pedido = self._mais_prioritario(prioridade, seq, pedido)
+            if pedido is None:
+                continue
+            conteudo, generation_config, futuro, tentativa = pedido
+            try:
+                texto = await self._loop.run_in_executor(self._executor, self._chamar, conteudo, generation_config)
+            except Exception as e:
+                if tentativa + 1 < self.max_tentativas and self.transitorio(e):
+                    espera = min(60.0, 2 ** tentativa) * (0.5 + random.random())
+                    print(f"[IA] Erro transitório ({e.__class__.__name__}); nova tentativa {tentativa + 2}/{self.max_tentativas} em {espera:.1f}s.")
+                    # Volta para a fila com a mesma prioridade e ordem, sem ocupar um trabalhador durante a espera
+                    self._loop.call_later(espera, self._fila.put_nowait, (prioridade, seq, (conteudo, generation_config, futuro, tentativa + 1)))
+                elif not futuro.cancelled():
+                    futuro.set_exception(e)
+                continue
+            if not futuro.cancelled():
+                futuro.set_result(texto)
+
+    def _mais_prioritario(self, prioridade, seq, pedido):
+        # Enquanto o trabalhador esperava a ficha pode ter chegado um pedido mais prioritário: ele passa na frente
+        while not self._fila.empty():
+            outro = self._fila.get_nowait()
+            if outro[2][2].cancelled():
+                continue
+            if outro[:2] < (prioridade, seq):
+                self._fila.put_nowait((prioridade, seq, pedido))
+                return outro
+            self._fila.put_nowait(outro)
+            break
+        if pedido[2].cancelled():
+            # Cancelado durante a espera pela ficha: a ficha já foi gasta, mas não há chamada
+            return prioridade, seq, None
+        return prioridade, seq, pedido
+
+    def enviar(self, conteudo, generation_config=None, prioridade=PRIORIDADE_RESUMO):
+        """Agenda a chamada e devolve um concurrent.futures.Future com o texto da resposta."""
+        futuro = concurrent.futures.Future()
+        with self._lock:
+            self._sequencia += 1
+            item = (prioridade, self._sequencia, (conteudo, generation_config, futuro, 0))
+        self._loop.call_soon_threadsafe(self._fila.put_nowait, item)
+        return futuro
+
+    def executar(self, conteudo, generation_config=None, prioridade=PRIORIDADE_RESUMO):
+        return self.enviar(conteudo, generation_config, prioridade).result()
+
+_agendador_ia = None
+_agendador_ia_lock = threading.Lock()
+
+def obter_agendador_ia():
+    global _agendador_ia
+    with _agendador_ia_lock:
+        if _agendador_ia is None:
+            _agendador_ia = AgendadorIA()
+        return _agendador_ia
+
+_cache_ia = None
+
+def configurar_cache_ia(output_dir):
+    global _cache_ia
+    if not IA_CACHE:
+        return
+    try:
+        _cache_ia = CacheIA(output_dir)
+    except Exception as e:
+        print(f"[IA] Cache de respostas indisponível: {e}")
+
+def gerar_conteudo_ia(conteudo, generation_config=None, usar_cache=True, prioridade=PRIORIDADE_RESUMO, validar=None):
+    """
+    Único ponto de chamada a GenerativeModel.generate_content. Devolve o texto da resposta, consultando
+    antes o cache em disco; usar_cache=False (ou IA_CACHE=false) força uma nova chamada.
+    A chamada em si passa pelo AgendadorIA, que limita concorrência e taxa e repete erros transitórios.
+    'validar(texto)' levanta exceção para respostas inutilizáveis: elas não entram no cache (a exceção chega
+    a quem chamou) e, se já estiverem nele, são descartadas e a IA é consultada de novo.
+    """
+    cache = _cache_ia if usar_cache else None
+    chave = None
+    if cache is not None:
+        chave = CacheIA.chave(GEMINI_MODEL, conteudo, generation_config)
+        texto = cache.obter(chave)
+        if texto is not None:
+            try:
+                if validar:
+                    validar(texto)
+                print("[IA] Resposta obtida do cache.")
+                return texto
+            except Exception as e:
+                print(f"[IA] Resposta em cache descartada: {e}")
+                cache.remover(chave)
+    inicio = time.perf_counter()
+    texto = obter_agendador_ia().executar(conteudo, generation_config, prioridade)
+    anexos = sum(len(p['inline_data']['data']) for p in conteudo if isinstance(p, dict) and 'inline_data' in p) if isinstance(conteudo, list) else 0
+    print(f"[IA] Resposta em {(time.perf_counter() - inicio) * 1000:.0f} ms" + (f" ({anexos / 1024:.0f} KB de imagem enviados)." if anexos else "."))
+    if validar:
+        validar(texto)
+    if cache is not None and texto:
+        cache.guardar(chave, GEMINI_MODEL, texto)
+    return texto
+
+class RespostaIAInvalida(ValueError):
+    def __init__(self, resposta):
+        super().__init__("A resposta da IA não está em formato JSON válido.")
+        self.resposta = resposta
+
+def gerar_json_ia(prompt):
+    """Chama o modelo e devolve a resposta já convertida de JSON (tolerando blocos de código markdown)."""
+    # Respostas que não são JSON não ficam no cache: uma nova tentativa volta a consultar a IA
+    return interpretar_json_ia(gerar_conteudo_ia(prompt, validar=interpretar_json_ia))
+
+def interpretar_json_ia(resposta):
+    # Limpa blocos de markdown se vierem
+    resposta_limpa = re.sub(r"^```[a-zA-Z]*\n?|```$", "", resposta, flags=re.MULTILINE).strip()
+    try:
+        dados = json.loads(resposta_limpa)
+    except ValueError:
+        raise RespostaIAInvalida(resposta)
+    if not isinstance(dados, dict):
+        raise RespostaIAInvalida(resposta)
+    return dados
+
+def dividir_transcricao(transcricao, max_chars=None):
+    """
+    Agrupa as linhas (blocos) da transcrição em partes de até max_chars, sem quebrar blocos.
+    O agrupamento é guloso a partir do início, então acrescentar blocos ao final só altera a última parte.
+    """
+    max_chars = max_chars or IA_RESUMO_CHARS_PARTE
+    partes, atual, tamanho = [], [], 0
+    for linha in transcricao.splitlines():
+        if not linha.strip():
+            continue
+        if atual and tamanho + len(linha) + 1 > max_chars:
+            partes.append('\n'.join(atual))
+            atual, tamanho = [], 0
+        atual.append(linha)
+        tamanho += len(linha) + 1
+    if atual:
+        partes.append('\n'.join(atual))
+    return partes
+
+class ResumosParciais:
+    """
+    Resumos das partes da transcrição guardados em gravacao_ia_partes.json, endereçados pelo SHA-256
+    do texto da parte e do modelo. Também guarda o resultado da consolidação, endereçado pelos resumos
+    parciais, para que reprocessar uma gravação inalterada não chame a IA novamente.
+    """
+    ARQUIVO = 'gravacao_ia_partes.json'
+
+    def __init__(self, gravacao_dir):
+        self.caminho = os.path.join(gravacao_dir, self.ARQUIVO)
+        self.partes = {}
+        self.consolidado = {}
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+                self.partes = dados.get('partes', {})
+                self.consolidado = dados.get('consolidado', {})
+            except Exception as e:
+                print(f"[IA] Resumos parciais ilegíveis, serão recriados: {e}")
+
+    @staticmethod
+    def chave(texto):
+        return hashlib.sha256(f"{GEMINI_MODEL}\n{texto}".encode('utf-8')).hexdigest()
+
+    def obter(self, texto_parte):
+        return self.partes.get(self.chave(texto_parte))
+
+    def guardar(self, texto_parte, resumo):
+        self.partes[self.chave(texto_parte)] = resumo
+
+    def salvar(self, textos_partes):
+        # Mantém apenas as partes atuais da transcrição
+        chaves = {self.chave(t) for t in textos_partes}
+        self.partes = {c: r for c, r in self.partes.items() if c in chaves}
+        existia = os.path.exists(self.caminho)
+        tmp_path = self.caminho + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"partes": self.partes, "consolidado": self.consolidado}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.caminho)
+        if not existia:
+            try:
+                ajustar_permissao_usuario(self.caminho)
+            except Exception as e:
+                print(f"[PERMISSAO] Falha ao ajustar permissão dos resumos parciais: {e}")
+
+def resumir_transcricao(transcricao, gravacao_dir, ao_progresso=None, workers=None):
+    """
+    Gera {titulo, resumo, pontos} para a transcrição. Transcrições curtas vão em uma única chamada;
+    as longas são divididas em partes resumidas em paralelo (map) e consolidadas em uma chamada final (reduce).
+    """
+    if len(transcricao) <= IA_RESUMO_LIMITE_CHARS:
+        return gerar_json_ia(PROMPT_RESUMO + transcricao)
+    partes = dividir_transcricao(transcricao)
+    cache = ResumosParciais(gravacao_dir)
+    pendentes = [i for i, texto in enumerate(partes) if cache.obter(texto) is None]
+    print(f"[IA] Resumo em {len(partes)} partes ({len(pendentes)} a resumir, {len(partes) - len(pendentes)} reaproveitadas).")
+    feitas = len(partes) - len(pendentes)
+    if ao_progresso:
+        ao_progresso(feitas, len(partes))
+    if pendentes:
+        with ThreadPoolExecutor(max_workers=min(workers or IA_RESUMO_WORKERS, len(pendentes))) as pool:
+            futuros = {
+                pool.submit(gerar_json_ia, PROMPT_RESUMO_PARTE.format(parte=i + 1, total=len(partes)) + partes[i]): i
+                for i in pendentes
+            }
+            try:
+                for futuro in as_completed(futuros):
+                    cache.guardar(partes[futuros[futuro]], futuro.result())
+                    feitas += 1
+                    if ao_progresso:
+                        ao_progresso(feitas, len(partes))
+            finally:
+                # Partes já resumidas ficam salvas mesmo se outra falhar
+                cache.salvar(partes)
+    resumos = []
+    for i, texto in enumerate(partes, start=1):
+        parcial = cache.obter(texto)
+        pontos = parcial.get('pontos', [])
+        if not isinstance(pontos, list):
+            pontos = [str(pontos)]
+        resumos.append(f"Parte {i}:\nResumo: {parcial.get('resumo', '')}\nPontos:\n" + '\n'.join(f"- {p}" for p in pontos))
+    entrada = '\n\n'.join(resumos)
+    chave = ResumosParciais.chave(entrada)
+    if cache.consolidado.get('chave') == chave:
+        return cache.consolidado['resultado']
+    resultado = gerar_json_ia(PROMPT_RESUMO_CONSOLIDADO + entrada)
+    cache.consolidado = {"chave": chave, "resultado": resultado}
+    cache.salvar(partes)
+    return resultado
+
+class BackendTranscricao(abc.ABC):
+    """
+    Interface dos reconhecedores de fala. Há uma instância por processo (obter_backend_transcricao), reutilizada
+    entre falas, blocos e gravações; backends locais carregam o modelo uma única vez e o mantêm em memória.
+    """
+    nome = None
+    local = False
+
+    def identidade(self):
+        """O que determina o texto produzido (entra na chave do cache de transcrição); não carrega o modelo."""
+        return {"nome": self.nome}
+
+    def carregar(self):
+        pass
+
+    @abc.abstractmethod
+    def reconhecer(self, pcm, taxa=ASR_TAXA):
+        """Reconhece PCM int16 mono e devolve o texto, ou '' sem fala reconhecível. Erros são propagados."""
+
+class BackendGoogle(BackendTranscricao):
+    """Google Speech Recognition via SpeechRecognition (necessita internet)."""
+    nome = 'google'
+
+    def __init__(self, idioma=TRANSCRICAO_IDIOMA):
+        self.idioma = idioma
+        self._sr = None
+        self._recognizer = None
+
+    def identidade(self):
+        return {"nome": self.nome, "idioma": self.idioma}
+
+    def carregar(self):
+        if self._recognizer is None:
+            import speech_recognition as sr
+            self._sr = sr
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+
+    def reconhecer(self, pcm, taxa=ASR_TAXA):
+        recognizer = self.carregar()
+        try:
+            return recognizer.recognize_google(self._sr.AudioData(pcm, taxa, ASR_LARGURA), language=self.idioma)
+        except self._sr.UnknownValueError:
+            return ''
+
+class BackendVosk(BackendTranscricao):
+    """Reconhecimento local (CPU) com Vosk; o modelo é compartilhado por todas as falas do processo."""
+    nome = 'vosk'
+    local = True
+
+    def __init__(self, caminho_modelo=VOSK_MODELO):
+        self.caminho_modelo = caminho_modelo
+        self._vosk = None
+        self._modelo = None
+        self._lock = threading.Lock()
+
+    def identidade(self):
+        # Caminho completo e tamanho/mtime do modelo acústico: trocar o modelo na mesma pasta invalida o cache
+        caminho = os.path.realpath(self.caminho_modelo)
+        try:
+            st = os.stat(os.path.join(caminho, 'am', 'final.mdl'))
+            modelo_acustico = f"{st.st_size}:{st.st_mtime_ns}"
+        except OSError:
+            modelo_acustico = None
+        return {"nome": self.nome, "modelo": caminho, "final_mdl": modelo_acustico}
+
+    def carregar(self):
+        with self._lock:
+            if self._modelo is None:
+                try:
+                    import vosk
+                except ImportError:
+                    raise RuntimeError("TRANSCRICAO_BACKEND=vosk requer o pacote vosk (pip install vosk).")
+                if not os.path.isdir(self.caminho_modelo):
+                    raise FileNotFoundError(f"Modelo Vosk não encontrado em {self.caminho_modelo} (VOSK_MODELO).")
+                inicio = time.monotonic()
+                vosk.SetLogLevel(-1)
+                self._modelo = vosk.Model(self.caminho_modelo)
+                self._vosk = vosk
+                print(f"[TRANSCRIÇÃO] Modelo Vosk carregado em {time.monotonic() - inicio:.1f}s ({self.caminho_modelo}).")
+            return self._modelo
+
+    def reconhecer(self, pcm, taxa=ASR_TAXA):
+        modelo = self.carregar()
+        # O reconhecedor guarda o estado da decodificação: um por fala, sobre o mesmo modelo
+        reconhecedor = self._vosk.KaldiRecognizer(modelo, taxa)
+        reconhecedor.AcceptWaveform(pcm)
+        return json.loads(reconhecedor.FinalResult()).get('text', '')
+
+BACKENDS_TRANSCRICAO = {BackendGoogle.nome: BackendGoogle, BackendVosk.nome: BackendVosk}
+_backend_transcricao = None
+_backend_transcricao_lock = threading.Lock()
+
+def obter_backend_transcricao():
+    global _backend_transcricao
+    with _backend_transcricao_lock:
+        if _backend_transcricao is None:
+            classe = BACKENDS_TRANSCRICAO.get(TRANSCRICAO_BACKEND)
+            if classe is None:
+                print(f"[TRANSCRIÇÃO] TRANSCRICAO_BACKEND desconhecido '{TRANSCRICAO_BACKEND}', usando 'google'.")
+                classe = BackendGoogle
+            _backend_transcricao = classe()
+        return _backend_transcricao
+
+def aquecer_backend_transcricao():
+    """Carrega o modelo do backend local antecipadamente (no início do programa e em cada processo do pool)."""
+    try:
+        obter_backend_transcricao().carregar()
+    except Exception as e:
+        print(f"[TRANSCRIÇÃO] Falha ao carregar o reconhecedor: {e}")
+
+def ajustar_permissao_usuario(path):
+    try:
+        user = os.getenv("SUDO_USER") or getpass.getuser()
+        if user and user != "root":
+            import pwd
+            uid = pwd.getpwnam(user).pw_uid
+            gid = pwd.getpwnam(user).pw_gid
+            os.chown(path, uid, gid)
+    except Exception as e:
+        print(f"[PERMISSAO] Não foi possível ajustar permissões do arquivo: {e}")
+
+def detectar_corte_silencio(amostras, taxa, largura, inicio_quadro, fim_quadro, min_silencio_ms=700, silencio_thresh_db=-40, janela_final_ms=30000):
+    """
+    Procura o ponto de corte por silêncio de um segmento [inicio_quadro, fim_quadro) de 'amostras' ([quadros, canais], inteiros).
+    Equivale a silence.detect_silence (seek_step=1) seguido da escolha do último silêncio que termina nos
+    últimos 'janela_final_ms' do segmento, mas calcula o RMS de todas as janelas candidatas de uma vez, com NumPy,
+    e só olha para a cauda do segmento. Retorna o corte em ms relativo ao início do segmento, ou None.
+    """
+    canais = amostras.shape[1]
+    quadros_seg = fim_quadro - inicio_quadro
+    disponiveis = max(0, min(fim_quadro, len(amostras)) - inicio_quadro)
+    duracao_ms = int(round(1000 * quadros_seg / taxa))
+    ultima_janela = duracao_ms - min_silencio_ms
+    if ultima_janela < 0:
+        return None
+    # O fim do silêncio (início da janela + min_silencio_ms) precisa cair dentro da janela final
+    primeira_janela = max(0, duracao_ms - janela_final_ms - min_silencio_ms + 1)
+    if primeira_janela > ultima_janela:
+        return None
+    inicios_ms = np.arange(primeira_janela, ultima_janela + 1, dtype=np.int64)
+    # Mesma conversão ms -> quadro usada no fatiamento do pydub (truncamento)
+    ini = (inicios_ms * (taxa / 1000.0)).astype(np.int64)
+    fim = ((inicios_ms + min_silencio_ms) * (taxa / 1000.0)).astype(np.int64)
+    base = ini[0]
+    limite = np.minimum(fim, disponiveis)
+    # Com 32 bits a soma dos quadrados estoura o int64: nesse caso acumula em float64 (o audioop também usa double)
+    trecho = amostras[inicio_quadro + base:inicio_quadro + max(base, int(limite[-1]))].astype(np.float64 if largura > 2 else np.int64)
+    energia = np.concatenate(([0], np.cumsum(np.square(trecho).sum(axis=1))))
+    soma = energia[np.maximum(limite - base, 0)] - energia[np.minimum(ini - base, len(trecho))]
+    # Quadros que faltam no fim do segmento contam como silêncio (o pydub completa com zeros)
+    rms = np.floor(np.sqrt(soma / ((fim - ini) * canais)))
+    limiar = (10 ** (silencio_thresh_db / 20)) * (2 ** (8 * largura) / 2)
+    silenciosas = np.flatnonzero(rms <= limiar)
+    if not len(silenciosas):
+        return None
+    return int(inicios_ms[silenciosas[-1]]) + min_silencio_ms
+
+class WavMapeado:
+    """
+    Abre um .wav por mmap e expõe o chunk 'data' como array NumPy [quadros, canais] sem cópia.
+    Só as páginas efetivamente lidas entram na memória, independente do tamanho do arquivo.
+    """
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, 'rb')
+        try:
+            self._mm = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            self._ler_cabecalho()
+        except Exception:
+            self._arquivo.close()
+            raise
+
+    def _ler_cabecalho(self):
+        mm = self._mm
+        if mm[0:4] != b'RIFF' or mm[8:12] != b'WAVE':
+            raise ValueError("Arquivo não é um WAV (RIFF/WAVE).")
+        pos = 12
+        formato = None
+        while pos + 8 <= len(mm):
+            chunk_id = mm[pos:pos + 4]
+            tamanho = struct.unpack_from('<I', mm, pos + 4)[0]
+            inicio = pos + 8
+            if chunk_id == b'fmt ':
+                codigo, self.canais, self.taxa, _, self.alinhamento, bits = struct.unpack_from('<HHIIHH', mm, inicio)
+                if codigo == 0xFFFE and tamanho >= 26:
+                    # WAVE_FORMAT_EXTENSIBLE: o formato real está no início do SubFormat
+                    codigo = struct.unpack_from('<H', mm, inicio + 24)[0]
+                formato = codigo
+                self.largura = bits // 8
+            elif chunk_id == b'data':
+                if formato is None:
+                    raise ValueError("Chunk 'fmt ' ausente antes de 'data'.")
+                # Gravações longas podem ter tamanho 0/0xFFFFFFFF no cabeçalho: usa o que existe no arquivo
+                disponivel = len(mm) - inicio
+                if tamanho == 0 or tamanho > disponivel:
+                    tamanho = disponivel
+                break
+            pos = inicio + tamanho + (tamanho & 1)
+        else:
+            raise ValueError("Chunk 'data' não encontrado.")
+        if formato != 1 or self.largura not in (1, 2, 4):
+            raise ValueError(f"Formato WAV não suportado (formato={formato}, bits={self.largura * 8}).")
+        self.quadros = tamanho // self.alinhamento
+        # Inteiros com sinal também em 8 bits, como o audioop/pydub interpretam as amostras
+        self.amostras = np.frombuffer(self._mm, dtype=f'<i{self.largura}', count=self.quadros * self.canais, offset=inicio).reshape(-1, self.canais)
+
+    def close(self):
+        self.amostras = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # Ainda há views de blocos em uso; o mmap é liberado quando elas forem coletadas
+            pass
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iterar_blocos_wav(caminho_wav, duracao_bloco_seg=240, min_silencio_ms=700, silencio_thresh_db=-40):
+    """
+    Percorre um .wav mapeado em memória e gera (inicio_quadro, fim_quadro, amostras, motivo) para cada bloco de até
+    'duracao_bloco_seg' segundos, cortando preferencialmente nos silêncios. 'amostras' é uma view sem cópia do arquivo,
+    válida enquanto a iteração não terminar; só as janelas usadas na busca do corte são lidas do disco.
+    É o caminho recomendado para dividir um .wav: nenhum bloco é copiado (dividir_audio_em_blocos grava cópias).
+    """
+    with WavMapeado(caminho_wav) as wav:
+        yield from _blocos_wav(wav, duracao_bloco_seg, min_silencio_ms, silencio_thresh_db)
+
+def _blocos_wav(wav, duracao_bloco_seg, min_silencio_ms, silencio_thresh_db):
+    taxa = wav.taxa
+    por_ms = taxa / 1000.0
+    duracao_ms = int(round(1000 * wav.quadros / taxa))
+    inicio = 0
+    inicio_quadro = 0
+    while inicio < duracao_ms:
+        fim = min(inicio + duracao_bloco_seg * 1000, duracao_ms)
+        corte = None
+        if duracao_ms > duracao_bloco_seg * 1000:
+            corte = detectar_corte_silencio(wav.amostras, taxa, wav.largura, int(inicio * por_ms), int(fim * por_ms), min_silencio_ms, silencio_thresh_db)
+        if corte:
+            fim_quadro = min(int(inicio * por_ms) + int(corte * por_ms), wav.quadros)
+            proximo_inicio = inicio + corte
+            motivo = f"corte por silêncio em {corte/1000:.2f}s do bloco"
+        else:
+            fim_quadro = min(int(fim * por_ms), wav.quadros)
+            proximo_inicio = fim
+            motivo = "corte por tempo máximo" if duracao_ms > duracao_bloco_seg * 1000 else "sem cortes"
+        # Blocos contíguos: cada um começa exatamente no quadro em que o anterior terminou
+        yield inicio_quadro, fim_quadro, wav.amostras[inicio_quadro:fim_quadro], motivo
+        inicio = proximo_inicio
+        inicio_quadro = fim_quadro
+
+def dividir_audio_em_blocos(caminho_wav, destino, duracao_bloco_seg=240, min_silencio_ms=700, silencio_thresh_db=-40):
+    """
+    Divide um arquivo .wav em blocos de até 'duracao_bloco_seg' segundos, cortando preferencialmente nos silêncios,
+    e grava cada bloco em 'destino' (obrigatório: não há mais cópia implícita no diretório temporário).
+    Se o áudio for menor ou igual ao limite, retorna um único bloco.
+    Para processar os blocos sem gravá-los, use iterar_blocos_wav, que entrega views do próprio arquivo.
+    Lê o arquivo por mmap (WavMapeado), então o uso de memória fica limitado a um bloco. A entrada pode ser PCM
+    simples ou WAVE_FORMAT_EXTENSIBLE com SubFormat PCM; os blocos são sempre gravados como PCM simples
+    (WAVE_FORMAT_PCM), com as mesmas amostras, taxa, canais e largura da origem.
+    """
+    blocos = []
+    with WavMapeado(caminho_wav) as wav:
+        taxa, canais, largura = wav.taxa, wav.canais, wav.largura
+        for bloco_idx, (_, _, amostras, _) in enumerate(_blocos_wav(wav, duracao_bloco_seg, min_silencio_ms, silencio_thresh_db)):
+            bloco_path = os.path.join(destino, f"bloco_{os.path.basename(caminho_wav)}_{bloco_idx}.wav")
+            with wave.open(bloco_path, 'wb') as saida:
+                saida.setnchannels(canais)
+                saida.setsampwidth(largura)
+                saida.setframerate(taxa)
+                saida.writeframes(memoryview(amostras).cast('B'))
+            blocos.append(bloco_path)
+    return blocos
+
+def main():
+    output_dir = "output"
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename_mic = os.path.join(output_dir, f"mic_{timestamp}.wav")
+    os.makedirs(output_dir, exist_ok=True)
+    mic_device = get_default_source()
+    run_pipeline(mic_device, filename_mic)
+
+def aquecer_modulos():
+    """
+    Pré-carrega em background o que foi tirado da importação (GStreamer e módulos pesados de decodificação,
+    reconhecimento, IA e markdown), para que o primeiro uso de cada um não espere por isso.
+    """
+    inicio = time.perf_counter()
+    try:
+        inicializar_gst()
+    except Exception as e:
+        print(f"[INICIO] Falha ao inicializar o GStreamer: {e}")
+    for modulo in ('pydub', 'speech_recognition', 'google.generativeai', 'markdown', 'tkinterweb'):
+        try:
+            importlib.import_module(modulo)
+        except Exception as e:
+            print(f"[INICIO] Falha ao pré-carregar {modulo}: {e}")
+    print(f"[INICIO] Módulos pré-carregados em {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+
+def verificar_orcamento_inicio(tempo_importacao, tempo_janela):
+    """Loga os tempos de inicialização e devolve False se algum passou do seu orçamento."""
+    dentro = True
+    for etapa, segundos, orcamento_ms in (('importação', tempo_importacao, INICIO_ORCAMENTO_IMPORTACAO_MS),
+                                          ('janela exibida', tempo_janela, INICIO_ORCAMENTO_JANELA_MS)):
+        ms = segundos * 1000
+        if orcamento_ms > 0 and ms > orcamento_ms:
+            print(f"[INICIO] {etapa}: {ms:.0f} ms, acima do orçamento de {orcamento_ms:.0f} ms.")
+            dentro = False
+        else:
+            print(f"[INICIO] {etapa}: {ms:.0f} ms.")
+    return dentro
+
+TEMPO_IMPORTACAO = time.perf_counter() - _INICIO_IMPORTACAO
 
 if __name__ == "__main__":
+    # --verificar-inicio: mede importação e exibição da janela, fecha e sai com erro se passar do orçamento
+    verificar_inicio = '--verificar-inicio' in sys.argv
     root = tk.Tk()
-    app = RecorderGUI(root)
-    root.mainloop() 
\ No newline at end of file
+    app = RecorderGUI(root, verificar_inicio=verificar_inicio)
+    root.mainloop()
+    if verificar_inicio:
+        sys.exit(0 if app.inicio_dentro_orcamento else 1)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(scope="session")
+def recordai():
+    # recordai exige o GStreamer (gi + Gst 1.0) já na importação
+    try:
+        import recordai
+    except (ImportError, ValueError) as e:
+        pytest.skip(f"recordai não pode ser importado neste ambiente: {e}")
+    return recordai
@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+
+class ServidorGemini:
+    """Servidor local que imita o generateContent da API REST do Gemini e anota cada requisição recebida."""
+
+    def __init__(self, falhas_429=0):
+        self.falhas_429 = falhas_429
+        self.requisicoes = []  # (instante, prompt, status)
+        self.liberado = threading.Event()
+        self.liberado.set()
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = corpo["contents"][0]["parts"][0]["text"]
+                with servidor._lock:
+                    if servidor.falhas_429 > 0:
+                        servidor.falhas_429 -= 1
+                        status = 429
+                    else:
+                        status = 200
+                    servidor.requisicoes.append((time.monotonic(), prompt, status))
+                if status == 429:
+                    resposta = {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}}
+                else:
+                    servidor.liberado.wait(10)
+                    resposta = {"candidates": [{"content": {"parts": [{"text": f"ok {prompt}"}], "role": "model"},
+                                                "finishReason": "STOP", "index": 0}]}
+                dados = json.dumps(resposta).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.endpoint = f"http://127.0.0.1:{self._http.server_address[1]}"
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.liberado.set()
+        self._http.shutdown()
+        self._http.server_close()
+
+
+@pytest.fixture
+def ambiente(recordai, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "chave-teste")
+    monkeypatch.setattr(recordai, "GEMINI_MODEL", "gemini-teste")
+    return recordai
+
+
+def agendador(recordai, servidor, **kwargs):
+    kwargs.setdefault("requisicoes_por_minuto", 6000)
+    kwargs.setdefault("rajada", 10)
+    return recordai.AgendadorIA(endpoint=servidor.endpoint, **kwargs)
+
+
+def test_429_e_repetido_com_backoff(ambiente):
+    servidor = ServidorGemini(falhas_429=1)
+    try:
+        ag = agendador(ambiente, servidor, concorrencia=1, max_tentativas=3)
+        assert ag.executar("ola") == "ok ola"
+        (t0, _, s0), (t1, _, s1) = servidor.requisicoes
+        assert (s0, s1) == (429, 200)
+        # Primeira espera: 2**0 s com jitter entre 0,5x e 1,5x
+        assert 0.45 <= t1 - t0 <= 2.0
+    finally:
+        servidor.fechar()
+
+
+def test_429_esgota_tentativas(ambiente):
+    servidor = ServidorGemini(falhas_429=5)
+    try:
+        ag = agendador(ambiente, servidor, concorrencia=1, max_tentativas=1)
+        with pytest.raises(Exception) as erro:
+            ag.executar("ola")
+        assert ambiente.AgendadorIA.transitorio(erro.value)
+        assert len(servidor.requisicoes) == 1
+    finally:
+        servidor.fechar()
+
+
+def test_ordem_de_prioridade(ambiente):
+    servidor = ServidorGemini()
+    try:
+        ag = agendador(ambiente, servidor, concorrencia=1)
+        servidor.liberado.clear()
+        primeiro = ag.enviar("bloqueia", prioridade=ambiente.PRIORIDADE_RESUMO)
+        while not servidor.requisicoes:
+            time.sleep(0.01)
+        futuros = [ag.enviar("print 1", prioridade=ambiente.PRIORIDADE_FUNDO),
+                   ag.enviar("resumo", prioridade=ambiente.PRIORIDADE_RESUMO),
+                   ag.enviar("print 2", prioridade=ambiente.PRIORIDADE_FUNDO),
+                   ag.enviar("pergunta", prioridade=ambiente.PRIORIDADE_INTERATIVA)]
+        cancelado = ag.enviar("cancelado", prioridade=ambiente.PRIORIDADE_INTERATIVA)
+        assert cancelado.cancel()
+        servidor.liberado.set()
+        primeiro.result(10)
+        for futuro in futuros:
+            futuro.result(10)
+        assert [p for _, p, _ in servidor.requisicoes] == ["bloqueia", "pergunta", "resumo", "print 1", "print 2"]
+    finally:
+        servidor.fechar()
+
+
+def test_limite_de_taxa(ambiente):
+    servidor = ServidorGemini()
+    try:
+        taxa, rajada, total = 10.0, 2, 6
+        ag = agendador(ambiente, servidor, concorrencia=4, requisicoes_por_minuto=taxa * 60, rajada=rajada)
+        # Ociosos, os trabalhadores não podem acumular fichas além da rajada
+        time.sleep(0.5)
+        inicio = time.monotonic()
+        futuros = [ag.enviar(f"p{i}") for i in range(total)]
+        for futuro in futuros:
+            futuro.result(10)
+        instantes = sorted(t - inicio for t, _, _ in servidor.requisicoes)
+        assert len(instantes) == total
+        assert sum(1 for t in instantes if t < 0.5 / taxa) <= rajada
+        for i, t in enumerate(instantes[rajada:], start=1):
+            assert t >= i / taxa - 0.05
+    finally:
+        servidor.fechar()
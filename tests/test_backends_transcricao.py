@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+
+def test_backend_sem_reconhecer_nao_pode_ser_instanciado(recordai):
+    class Incompleto(recordai.BackendTranscricao):
+        nome = 'incompleto'
+
+    with pytest.raises(TypeError):
+        Incompleto()
+
+
+def test_identidade_vosk_muda_com_o_modelo(recordai, tmp_path):
+    modelo = tmp_path / "modelo"
+    (modelo / "am").mkdir(parents=True)
+    final = modelo / "am" / "final.mdl"
+    final.write_bytes(b"a" * 10)
+
+    identidade = recordai.BackendVosk(str(modelo)).identidade()
+    assert identidade["modelo"] == os.path.realpath(modelo)
+    assert recordai.BackendVosk(str(modelo)).identidade() == identidade
+
+    # Outro modelo copiado para a mesma pasta
+    final.write_bytes(b"b" * 20)
+    assert recordai.BackendVosk(str(modelo)).identidade() != identidade
+
+    # Mesmo nome de pasta em outro lugar
+    outro = tmp_path / "outro" / "modelo"
+    (outro / "am").mkdir(parents=True)
+    (outro / "am" / "final.mdl").write_bytes(b"b" * 20)
+    assert recordai.BackendVosk(str(outro)).identidade()["modelo"] != identidade["modelo"]
@@ -0,0 +1,95 @@
+import os
+import struct
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+silence = pytest.importorskip("pydub.silence")
+from pydub import AudioSegment
+
+
+def gravar_wav(caminho, amostras, taxa, extensivel=False):
+    """Grava 'amostras' ([quadros, canais], int16) como PCM simples ou WAVE_FORMAT_EXTENSIBLE."""
+    canais = amostras.shape[1]
+    dados = amostras.astype("<i2").tobytes()
+    if not extensivel:
+        with wave.open(caminho, "wb") as w:
+            w.setnchannels(canais)
+            w.setsampwidth(2)
+            w.setframerate(taxa)
+            w.writeframes(dados)
+        return
+    sub_formato_pcm = struct.pack("<IHH8s", 1, 0x0000, 0x0010, bytes.fromhex("800000aa00389b71"))
+    fmt = struct.pack("<HHIIHHHHI", 0xFFFE, canais, taxa, taxa * canais * 2, canais * 2, 16, 22, 16, 0) + sub_formato_pcm
+    corpo = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(dados)) + dados
+    with open(caminho, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", len(corpo)) + corpo)
+
+
+def sinal_com_pausas(taxa, segundos, seed):
+    rng = np.random.default_rng(seed)
+    quadros = taxa * segundos
+    x = rng.normal(0, 3000, (quadros, 1))
+    for inicio in rng.integers(0, quadros, 40):
+        x[inicio:inicio + int(1.5 * taxa)] *= 0.001
+    return np.clip(x, -32768, 32767).astype(np.int16)
+
+
+def cortes_pydub(caminho, duracao_bloco_seg, min_silencio_ms=700, silencio_thresh_db=-40):
+    """Implementação anterior do dividir_audio_em_blocos (pydub inteiro na memória): fins dos blocos, em ms."""
+    audio = AudioSegment.from_wav(caminho)
+    cortes = []
+    inicio = 0
+    while inicio < len(audio):
+        fim = min(inicio + duracao_bloco_seg * 1000, len(audio))
+        segmento = audio[inicio:fim]
+        corte = None
+        if len(audio) > duracao_bloco_seg * 1000:
+            for s in reversed(silence.detect_silence(segmento, min_silence_len=min_silencio_ms, silence_thresh=silencio_thresh_db)):
+                if s[1] > len(segmento) - 30000:
+                    corte = s[1]
+                    break
+        inicio = inicio + corte if corte else fim
+        cortes.append(inicio)
+    return cortes
+
+
+def test_cortes_iguais_ao_pydub_em_200s(recordai, tmp_path):
+    taxa = 16000
+    amostras = sinal_com_pausas(taxa, 200, seed=3)
+    caminho = str(tmp_path / "longo.wav")
+    gravar_wav(caminho, amostras, taxa)
+
+    esperado = cortes_pydub(caminho, 40)
+    blocos = list(recordai.iterar_blocos_wav(caminho, 40))
+    assert [round(fim * 1000 / taxa) for _, fim, _, _ in blocos] == esperado
+    assert any("silêncio" in motivo for _, _, _, motivo in blocos)
+    # Contíguos, sem sobreposição nem lacunas
+    assert blocos[0][0] == 0 and blocos[-1][1] == len(amostras)
+    assert all(a[1] == b[0] for a, b in zip(blocos, blocos[1:]))
+
+
+def test_divide_wav_extensivel_em_blocos_pcm(recordai, tmp_path):
+    taxa = 16000
+    amostras = np.repeat(sinal_com_pausas(taxa, 100, seed=5), 2, axis=1)
+    simples = str(tmp_path / "simples.wav")
+    extensivel = str(tmp_path / "extensivel.wav")
+    gravar_wav(simples, amostras, taxa)
+    gravar_wav(extensivel, amostras, taxa, extensivel=True)
+
+    destino = tmp_path / "blocos"
+    destino.mkdir()
+    caminhos = recordai.dividir_audio_em_blocos(extensivel, str(destino), 40)
+    assert len(caminhos) > 1
+    juntos = []
+    for caminho in caminhos:
+        assert os.path.dirname(caminho) == str(destino)
+        with wave.open(caminho, "rb") as w:
+            assert (w.getframerate(), w.getnchannels(), w.getsampwidth()) == (taxa, 2, 2)
+            juntos.append(np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").reshape(-1, 2))
+    np.testing.assert_array_equal(np.concatenate(juntos), amostras)
+    # Mesmos cortes que a leitura do WAV em PCM simples
+    fins = [fim for _, fim, _, _ in recordai.iterar_blocos_wav(simples, 40)]
+    assert fins == np.cumsum([len(bloco) for bloco in juntos]).tolist()
@@ -0,0 +1,105 @@
+CONFIGURACAO = {"nome": "teste"}
+
+
+def gravar_bloco(pasta, nome, conteudo=b"ogg"):
+    caminho = pasta / nome
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+def test_salvar_nao_desfaz_o_que_outra_instancia_gravou(recordai, tmp_path):
+    b1 = gravar_bloco(tmp_path, "gravacao_01.ogg", b"1")
+    b2 = gravar_bloco(tmp_path, "gravacao_02.ogg", b"2")
+    # Tarefa da fila carrega o cache antes de a transcrição ao vivo guardar o bloco 2
+    tarefa = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    ao_vivo = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    ao_vivo.guardar(b2, "dois")
+    ao_vivo.salvar()
+
+    tarefa.guardar(b1, "um")
+    tarefa.salvar([b1, b2])
+    assert tarefa.blocos.keys() == {"gravacao_01.ogg", "gravacao_02.ogg"}
+    relido = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    assert (relido.obter(b1), relido.obter(b2)) == ("um", "dois")
+
+
+def test_bloco_inalterado_e_reaproveitado(recordai, tmp_path):
+    bloco = gravar_bloco(tmp_path, "gravacao_01.ogg")
+    cache = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    assert cache.obter(bloco) is None
+    cache.guardar(bloco, "texto do bloco")
+    cache.salvar()
+    assert recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO).obter(bloco) == "texto do bloco"
+
+
+def test_chave_muda_com_o_conteudo_do_bloco(recordai, tmp_path):
+    bloco = gravar_bloco(tmp_path, "gravacao_01.ogg", b"original")
+    cache = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    cache.guardar(bloco, "texto")
+    cache.salvar()
+    gravar_bloco(tmp_path, "gravacao_01.ogg", b"regravado")
+    relido = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    assert relido.obter(bloco) is None
+    assert relido.falas(bloco) == []
+
+
+def test_chave_muda_com_a_configuracao_do_reconhecedor(recordai, tmp_path):
+    bloco = gravar_bloco(tmp_path, "gravacao_01.ogg")
+    cache = recordai.CacheTranscricao(str(tmp_path), {"nome": "google", "idioma": "pt-BR"})
+    cache.guardar(bloco, "texto")
+    cache.salvar()
+    assert recordai.CacheTranscricao(str(tmp_path), {"nome": "google", "idioma": "pt-BR"}).obter(bloco) == "texto"
+    assert recordai.CacheTranscricao(str(tmp_path), {"nome": "vosk", "modelo": "/m"}).obter(bloco) is None
+    assert recordai.CacheTranscricao(str(tmp_path), {"nome": "google", "idioma": "en-US"}).obter(bloco) is None
+
+
+def test_hash_reaproveitado_enquanto_tamanho_e_mtime_nao_mudam(recordai, tmp_path, monkeypatch):
+    bloco = gravar_bloco(tmp_path, "gravacao_01.ogg")
+    cache = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    cache.guardar(bloco, "texto")
+    cache.salvar()
+
+    def nao_chamar(caminho):
+        raise AssertionError("o bloco não deveria ser relido")
+
+    monkeypatch.setattr(recordai, "hash_arquivo", nao_chamar)
+    assert recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO).obter(bloco) == "texto"
+
+
+def test_bloco_com_erro_volta_a_ser_transcrito_reaproveitando_as_falas(recordai, tmp_path):
+    taxa = recordai.ASR_TAXA
+    bloco = gravar_bloco(tmp_path, "gravacao_03.ogg")
+    erro = "[Bloco 3: erro ao transcrever trecho 00:00:10: timeout]"
+    cache = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    cache.guardar(bloco, f"bom dia {erro}", [
+        {"inicio": 0, "fim": 2 * taxa, "texto": "bom dia"},
+        {"inicio": 10 * taxa, "fim": 12 * taxa, "texto": erro},
+        {"inicio": 20 * taxa, "fim": 21 * taxa, "texto": ""},
+    ])
+    cache.salvar()
+
+    relido = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    assert relido.obter(bloco) is None
+    falas = relido.falas(bloco)
+    assert falas == [(0, 2 * taxa, "bom dia"), (20 * taxa, 21 * taxa, "")]
+    # Bordas um pouco diferentes (PCM da captura x .ogg decodificado) dentro da tolerância
+    tolerancia = taxa // 4
+    assert recordai.CacheTranscricao.reaproveitar(falas, 40, 2 * taxa - 40) == "bom dia"
+    assert recordai.CacheTranscricao.reaproveitar(falas, tolerancia, 2 * taxa) == "bom dia"
+    assert recordai.CacheTranscricao.reaproveitar(falas, tolerancia + 1, 2 * taxa) is None
+    # A fala que falhou não é reaproveitada: só ela volta ao reconhecedor
+    assert recordai.CacheTranscricao.reaproveitar(falas, 10 * taxa, 12 * taxa) is None
+    assert recordai.CacheTranscricao.reaproveitar(falas, 20 * taxa, 21 * taxa) == ""
+
+
+def test_salvar_com_caminhos_descarta_blocos_que_sumiram(recordai, tmp_path):
+    b1 = gravar_bloco(tmp_path, "gravacao_01.ogg", b"1")
+    b2 = gravar_bloco(tmp_path, "gravacao_02.ogg", b"2")
+    cache = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    cache.guardar(b1, "um")
+    cache.guardar(b2, "dois")
+    cache.salvar()
+    cache.salvar([b1])
+    relido = recordai.CacheTranscricao(str(tmp_path), CONFIGURACAO)
+    assert relido.blocos.keys() == {"gravacao_01.ogg"}
+    assert relido.texto(b2) == ""
@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+silence = pytest.importorskip("pydub.silence")
+from pydub import AudioSegment
+
+
+def corte_pydub(segmento, min_silencio_ms, silencio_thresh_db):
+    """Escolha anterior do corte: último silêncio do detect_silence que termina nos 30 s finais do segmento."""
+    for s in reversed(silence.detect_silence(segmento, min_silence_len=min_silencio_ms, silence_thresh=silencio_thresh_db)):
+        if s[1] > len(segmento) - 30000:
+            return s[1]
+    return None
+
+
+def sinal(taxa, canais, largura, segundos, pausas, seed):
+    rng = np.random.default_rng(seed)
+    quadros = int(segundos * taxa)
+    x = rng.normal(0, {1: 30, 2: 3000, 4: 5e8}[largura], (quadros, canais))
+    for _ in range(pausas):
+        inicio = rng.integers(0, quadros)
+        x[inicio:inicio + int(rng.uniform(0.2, 2.5) * taxa)] *= 0.005
+    if largura == 4:
+        return np.clip(x, -2**31, 2**31 - 1).astype("<i4").tobytes()
+    if largura == 2:
+        return np.clip(x, -32768, 32767).astype("<i2").tobytes()
+    # 8 bits com sinal, que é como o pydub (audioop) e o detectar_corte_silencio interpretam as amostras
+    return np.clip(x, -128, 127).astype(np.int8).tobytes()
+
+
+CASOS = [
+    # taxa, canais, largura, segundos, pausas, min_silencio_ms, silencio_thresh_db
+    (8000, 1, 2, 6.0, 3, 700, -40),
+    (16000, 1, 2, 12.0, 6, 700, -40),
+    (16000, 2, 2, 9.5, 4, 300, -30),
+    (22050, 1, 1, 7.3, 2, 1000, -40),
+    (44100, 2, 1, 5.0, 5, 700, -50),
+    (48000, 2, 2, 8.0, 6, 1000, -30),
+    (48000, 1, 2, 4.0, 0, 700, -40),
+    (16000, 1, 2, 0.5, 0, 700, -40),
+    (16000, 1, 2, 40.0, 8, 700, -40),
+    (16000, 1, 4, 12.0, 5, 700, -40),
+    (48000, 2, 4, 8.0, 6, 1000, -30),
+    (16000, 1, 4, 40.0, 8, 700, -40),
+]
+
+
+@pytest.mark.parametrize("taxa, canais, largura, segundos, pausas, min_silencio_ms, silencio_thresh_db", CASOS)
+@pytest.mark.parametrize("deslocamento", [0.0, 0.1])
+def test_corte_igual_ao_detect_silence(recordai, taxa, canais, largura, segundos, pausas, min_silencio_ms, silencio_thresh_db, deslocamento):
+    dados = sinal(taxa, canais, largura, segundos, pausas, seed=int(taxa + segundos * 10 + canais))
+    audio = AudioSegment(dados, frame_rate=taxa, sample_width=largura, channels=canais)
+    amostras = np.frombuffer(dados, dtype=f"<i{largura}").reshape(-1, canais)
+    inicio = int(len(audio) * deslocamento)
+    fim = len(audio)
+
+    esperado = corte_pydub(audio[inicio:fim], min_silencio_ms, silencio_thresh_db)
+    obtido = recordai.detectar_corte_silencio(amostras, taxa, largura, int(inicio * taxa / 1000.0), int(fim * taxa / 1000.0),
+                                              min_silencio_ms, silencio_thresh_db)
+    assert obtido == esperado
+
+
+def test_32_bits_alto_sem_estouro(recordai):
+    # Ruído forte em 32 bits: a soma dos quadrados não cabe em int64
+    taxa = 16000
+    rng = np.random.default_rng(7)
+    x = np.clip(rng.normal(0, 1e9, (taxa * 40, 1)), -2**31, 2**31 - 1).astype("<i4")
+    x[30 * taxa:31 * taxa] = 0
+    audio = AudioSegment(x.tobytes(), frame_rate=taxa, sample_width=4, channels=1)
+    assert corte_pydub(audio, 700, -40) == 31000
+    assert recordai.detectar_corte_silencio(x, taxa, 4, 0, len(x), 700, -40) == 31000
+
+
+def test_silencio_no_fim_fora_do_audio_disponivel(recordai):
+    # Segmento que passa do fim do arquivo: os quadros ausentes contam como silêncio, como no pydub
+    taxa = 16000
+    amostras = np.full((taxa * 3, 1), 8000, dtype=np.int16)
+    assert recordai.detectar_corte_silencio(amostras, taxa, 2, 0, taxa * 4, 700, -40) == 4000
+    assert recordai.detectar_corte_silencio(amostras, taxa, 2, 0, taxa * 3, 700, -40) is None
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+import pytest
+
+
+def aguardar(condicao, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() > limite:
+            pytest.fail("tempo esgotado esperando a fila")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    for nome in ("g1", "g2", "g3"):
+        (tmp_path / nome).mkdir()
+    return tmp_path
+
+
+def executores_registrando(executados, falhar=(), bloquear=None):
+    def executor(tipo):
+        def executar(gravacao_dir):
+            if bloquear is not None and tipo == bloquear[0]:
+                bloquear[1].wait(5)
+            executados.append((tipo, os.path.basename(gravacao_dir)))
+            if tipo in falhar:
+                raise RuntimeError(f"{tipo} falhou")
+        return executar
+    return {"transcricao": executor("transcricao"), "resumo": executor("resumo")}
+
+
+def test_enfileirar_repetida_so_eleva_a_prioridade(recordai, pastas):
+    fila = recordai.FilaTarefas(str(pastas), executores_registrando([]))
+    F = recordai.FilaTarefas
+    assert fila.enfileirar("g1", F.TRANSCRICAO, recordai.PRIORIDADE_FUNDO)
+    assert not fila.enfileirar("g1", F.TRANSCRICAO, recordai.PRIORIDADE_INTERATIVA)
+    # Uma prioridade menos urgente não rebaixa a tarefa
+    assert not fila.enfileirar("g1", F.TRANSCRICAO, recordai.PRIORIDADE_RESUMO)
+    linhas = fila.conn.execute("SELECT prioridade FROM tarefas WHERE pasta = 'g1'").fetchall()
+    assert linhas == [(recordai.PRIORIDADE_INTERATIVA,)]
+    assert fila.estado("g1") == "Na fila: transcrição"
+
+
+def test_ordem_por_prioridade_e_chegada(recordai, pastas):
+    executados = []
+    F = recordai.FilaTarefas
+    fila = recordai.FilaTarefas(str(pastas), executores_registrando(executados), workers=1)
+    fila.enfileirar("g1", F.TRANSCRICAO, recordai.PRIORIDADE_FUNDO)
+    fila.enfileirar("g2", F.TRANSCRICAO, recordai.PRIORIDADE_FUNDO)
+    fila.enfileirar("g3", F.TRANSCRICAO, recordai.PRIORIDADE_INTERATIVA)
+    fila.iniciar()
+    aguardar(lambda: len(executados) == 3)
+    assert [pasta for _, pasta in executados] == ["g3", "g1", "g2"]
+    aguardar(lambda: fila.pendentes() == 0)
+
+
+def test_resumo_espera_a_transcricao_da_mesma_gravacao(recordai, pastas):
+    executados = []
+    liberar = threading.Event()
+    F = recordai.FilaTarefas
+    fila = recordai.FilaTarefas(str(pastas), executores_registrando(executados, bloquear=("transcricao", liberar)), workers=2)
+    # O resumo é mais prioritário e chegou antes, mas depende da transcrição pendente
+    fila.enfileirar("g1", F.RESUMO, recordai.PRIORIDADE_INTERATIVA)
+    fila.enfileirar("g1", F.TRANSCRICAO, recordai.PRIORIDADE_FUNDO)
+    fila.iniciar()
+    aguardar(lambda: fila.estado("g1") == F.EM_EXECUCAO[F.TRANSCRICAO])
+    time.sleep(0.2)
+    assert executados == []
+    liberar.set()
+    aguardar(lambda: fila.pendentes() == 0)
+    assert executados == [("transcricao", "g1"), ("resumo", "g1")]
+    assert fila.estado("g1") == ""
+
+
+def test_transcricao_com_erro_marca_o_resumo_pendente(recordai, pastas):
+    executados = []
+    F = recordai.FilaTarefas
+    fila = recordai.FilaTarefas(str(pastas), executores_registrando(executados, falhar=("transcricao",)), workers=2)
+    fila.enfileirar("g1", F.TRANSCRICAO)
+    fila.enfileirar("g1", F.RESUMO)
+    fila.iniciar()
+    aguardar(lambda: fila.pendentes() == 0)
+    assert executados == [("transcricao", "g1")]
+    assert fila.estado("g1") == "Erro: transcrição + resumo IA"
+    erros = dict(fila.conn.execute("SELECT tipo, erro FROM tarefas WHERE pasta = 'g1' AND estado = 'erro'").fetchall())
+    assert erros == {"transcricao": "transcricao falhou", "resumo": "Transcrição falhou."}
+    # Reenfileirar substitui o registro de erro (a transcrição com erro não segura mais o resumo)
+    assert fila.enfileirar("g1", F.RESUMO)
+    aguardar(lambda: fila.pendentes() == 0)
+    assert executados == [("transcricao", "g1"), ("resumo", "g1")]
+    assert fila.conn.execute("SELECT tipo FROM tarefas WHERE pasta = 'g1'").fetchall() == [("transcricao",)]
+
+
+def test_iniciar_retoma_tarefas_interrompidas(recordai, pastas):
+    F = recordai.FilaTarefas
+    anterior = recordai.FilaTarefas(str(pastas), executores_registrando([]))
+    anterior.enfileirar("g2", F.TRANSCRICAO)
+    # Programa fechado no meio da execução
+    with anterior.conn:
+        anterior.conn.execute("UPDATE tarefas SET estado = 'executando'")
+    anterior.conn.close()
+
+    executados = []
+    fila = recordai.FilaTarefas(str(pastas), executores_registrando(executados))
+    fila.iniciar()
+    aguardar(lambda: fila.pendentes() == 0)
+    assert executados == [("transcricao", "g2")]
+    assert fila.conn.execute("SELECT COUNT(*) FROM tarefas").fetchone() == (0,)
+
+
+def test_gravacao_removida_descarta_a_tarefa(recordai, pastas):
+    executados = []
+    F = recordai.FilaTarefas
+    fila = recordai.FilaTarefas(str(pastas), executores_registrando(executados))
+    fila.enfileirar("sumiu", F.TRANSCRICAO)
+    fila.iniciar()
+    aguardar(lambda: fila.pendentes() == 0)
+    assert executados == []
+    assert fila.estado("sumiu") == ""
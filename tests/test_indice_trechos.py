@@ -0,0 +1,40 @@
+def gravar_bloco(pasta, nome, conteudo=b"ogg"):
+    caminho = pasta / nome
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+def test_referencia_usa_o_inicio_real_das_falas(recordai, tmp_path):
+    taxa = recordai.ASR_TAXA
+    blocos = [gravar_bloco(tmp_path, "gravacao_01.ogg", b"a"), gravar_bloco(tmp_path, "gravacao_02.ogg", b"b")]
+    cache = recordai.CacheTranscricao(str(tmp_path))
+    cache.guardar(blocos[0], "um dois tres quatro", [
+        {"inicio": 0, "fim": taxa, "texto": ""},
+        {"inicio": 5 * taxa, "fim": 7 * taxa, "texto": "um dois"},
+        {"inicio": 200 * taxa, "fim": 210 * taxa, "texto": "tres quatro"},
+    ])
+    cache.guardar(blocos[1], "cinco seis", [{"inicio": 30 * taxa, "fim": 32 * taxa, "texto": "cinco seis"}])
+    cache.salvar()
+
+    falas = recordai.CacheTranscricao(str(tmp_path)).falas_por_bloco(blocos)
+    indice = recordai.IndiceTrechos("um dois tres quatro\ncinco seis", palavras_por_trecho=2, segundos_bloco=240, falas_por_bloco=falas)
+    assert [t["referencia"] for t in indice.trechos] == [
+        "Bloco 1, 00:00:05",
+        "Bloco 1, 00:03:20",
+        "Bloco 2, 00:04:30",
+    ]
+
+
+def test_sem_falas_correspondentes_estima_pela_posicao(recordai, tmp_path):
+    taxa = recordai.ASR_TAXA
+    bloco = gravar_bloco(tmp_path, "gravacao_01.ogg")
+    cache = recordai.CacheTranscricao(str(tmp_path))
+    # Falas de outra transcrição: não reproduzem o texto da linha
+    cache.guardar(bloco, "outro texto", [{"inicio": 5 * taxa, "fim": 7 * taxa, "texto": "outro texto"}])
+    falas = cache.falas_por_bloco([bloco])
+    indice = recordai.IndiceTrechos("um dois tres quatro", palavras_por_trecho=2, segundos_bloco=240, falas_por_bloco=falas)
+    assert [t["referencia"] for t in indice.trechos] == ["Bloco 1, ~00:00:00", "Bloco 1, ~00:02:00"]
+
+    # Bloco alterado depois da transcrição: as falas guardadas não valem mais
+    gravar_bloco(tmp_path, "gravacao_01.ogg", b"regravado")
+    assert cache.falas_por_bloco([bloco]) == {}
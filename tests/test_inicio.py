@@ -0,0 +1,43 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RAIZ
+
+MODULOS_PESADOS = ("pydub", "speech_recognition", "google.generativeai", "tkinterweb", "markdown")
+
+
+def executar(argumentos, cwd, timeout=60):
+    return subprocess.run(argumentos, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+
+
+def test_importacao_dentro_do_orcamento_e_sem_modulos_pesados(recordai):
+    # Processo novo: no processo do pytest outros testes já importaram parte desses módulos
+    codigo = (
+        "import json, sys, recordai\n"
+        f"pesados = [m for m in {MODULOS_PESADOS!r} if m in sys.modules]\n"
+        "print(json.dumps({'tempo_ms': recordai.TEMPO_IMPORTACAO * 1000,\n"
+        "                  'orcamento_ms': recordai.INICIO_ORCAMENTO_IMPORTACAO_MS, 'pesados': pesados}))\n"
+    )
+    resultado = executar([sys.executable, "-c", codigo], cwd=RAIZ)
+    assert resultado.returncode == 0, resultado.stderr
+    medida = json.loads(resultado.stdout.strip().splitlines()[-1])
+    assert medida["pesados"] == []
+    if medida["orcamento_ms"] > 0:
+        assert medida["tempo_ms"] < medida["orcamento_ms"]
+
+
+def test_verificar_inicio_abre_a_janela_dentro_do_orcamento(recordai, tmp_path):
+    comando = [sys.executable, os.path.join(RAIZ, "recordai.py"), "--verificar-inicio"]
+    if not os.environ.get("DISPLAY"):
+        if not shutil.which("xvfb-run"):
+            pytest.skip("sem $DISPLAY e sem xvfb-run")
+        comando = ["xvfb-run", "-a"] + comando
+    # Executa em uma pasta temporária para que a pasta output/ criada pela janela não suje o repositório
+    resultado = executar(comando, cwd=str(tmp_path))
+    assert resultado.returncode == 0, resultado.stdout + resultado.stderr
+    assert "[INICIO] janela exibida" in resultado.stdout